@@ -0,0 +1,227 @@
+"""
+Agregados de vendas por dia e por produto/dia.
+
+Cada pagamento soma os itens do pedido às tabelas sales_daily e
+sales_daily_product na mesma transação que marca o pedido como PAID
+(record_paid), com um INSERT ... SELECT ... ON CONFLICT por tabela. Como PAID
+é um estado final, os agregados só crescem. Os painéis de administração leem
+só essas tabelas: um dia custa uma linha, não uma varredura de orders.
+
+O histórico (pedidos pagos antes dos agregados existirem) é reconstruído por
+linha de comando, um dia por transação: as linhas do dia são apagadas e
+recalculadas a partir dos pedidos. Pagamentos concorrentes entram antes (e
+estão no recálculo) ou depois (e somam ao recálculo), nunca duas vezes.
+
+Uso:
+    python -m app.analytics backfill                          # todo o histórico
+    python -m app.analytics backfill --start 2024-01-01 --end 2024-01-31
+"""
+import argparse
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import Date, and_, delete, distinct, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.order_status import OrderStatus
+from app.models.product import Product
+from app.models.sales_rollup import DailySales, ProductDailySales
+from app.money import from_cents
+
+analytics_logger = logging.getLogger("app.analytics")
+
+# Dia do pagamento; date() existe no SQLite e no PostgreSQL
+PAID_DAY = func.date(Order.paid_at, type_=Date)
+
+REVENUE_CENTS = func.sum(OrderItem.quantity * OrderItem.unit_price_cents)
+
+
+def _insert(db: Session, model):
+    # INSERT ... ON CONFLICT tem a mesma API nos dois dialetos
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(model)
+
+
+def _add_to(db: Session, model, keys: list[str], source):
+    # Soma as linhas de `source` às existentes (ou as cria)
+    columns = [column.name for column in source.selected_columns]
+    stmt = _insert(db, model).from_select(columns, source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={
+            column: getattr(model, column) + stmt.excluded[column]
+            for column in columns
+            if column not in keys
+        },
+    )
+    db.execute(stmt)
+
+
+def _rollup(db: Session, criterion):
+    # Agrega os itens dos pedidos que casam com `criterion` (em centavos)
+    items = (
+        select()
+        .select_from(OrderItem)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(criterion)
+    )
+    _add_to(
+        db,
+        ProductDailySales,
+        ["day", "product_id"],
+        items.add_columns(
+            PAID_DAY.label("day"),
+            OrderItem.product_id.label("product_id"),
+            func.sum(OrderItem.quantity).label("quantity"),
+            REVENUE_CENTS.label("revenue_cents"),
+            func.count(distinct(OrderItem.order_id)).label("order_count"),
+        ).group_by(PAID_DAY, OrderItem.product_id),
+    )
+    _add_to(
+        db,
+        DailySales,
+        ["day"],
+        items.add_columns(
+            PAID_DAY.label("day"),
+            func.count(distinct(OrderItem.order_id)).label("order_count"),
+            func.sum(OrderItem.quantity).label("quantity"),
+            REVENUE_CENTS.label("revenue_cents"),
+        ).group_by(PAID_DAY),
+    )
+
+
+def record_paid(db: Session, order_ids: list[int]):
+    """
+    Soma aos agregados pedidos que acabaram de virar PAID (com paid_at já
+    gravado na transação). Dois comandos, seja qual for o número de pedidos.
+    Não faz commit.
+    """
+    if order_ids:
+        _rollup(db, Order.id.in_(order_ids))
+
+
+def rebuild_day(db: Session, day: date):
+    # Recalcula um dia inteiro a partir dos pedidos pagos. Não faz commit.
+    start = datetime.combine(day, time.min)
+    for model in (ProductDailySales, DailySales):
+        db.execute(delete(model).where(model.day == day))
+    _rollup(
+        db,
+        and_(
+            Order.status == OrderStatus.PAID,
+            Order.paid_at >= start,
+            Order.paid_at < start + timedelta(days=1),
+        ),
+    )
+
+
+def backfill(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> int:
+    """
+    Reconstrói os agregados dos dias com pagamentos em [start, end], um dia
+    por commit. Retorna quantos dias foram recalculados.
+    """
+    stmt = select(PAID_DAY).distinct().where(Order.status == OrderStatus.PAID, Order.paid_at.is_not(None))
+    if start is not None:
+        stmt = stmt.where(Order.paid_at >= datetime.combine(start, time.min))
+    if end is not None:
+        stmt = stmt.where(Order.paid_at < datetime.combine(end + timedelta(days=1), time.min))
+    days = sorted(db.scalars(stmt))
+
+    for day in days:
+        rebuild_day(db, day)
+        db.commit()
+        analytics_logger.info("agregados de %s recalculados", day)
+    return len(days)
+
+
+# --- Consultas dos painéis (só tabelas de agregados) ----------------------
+
+def _between(column, start: Optional[date], end: Optional[date]) -> list:
+    criteria = []
+    if start is not None:
+        criteria.append(column >= start)
+    if end is not None:
+        criteria.append(column <= end)
+    return criteria
+
+
+def daily_sales_statement(start: Optional[date] = None, end: Optional[date] = None):
+    return (
+        select(DailySales.day, DailySales.order_count, DailySales.quantity, DailySales.revenue_cents)
+        .where(*_between(DailySales.day, start, end))
+        .order_by(DailySales.day)
+    )
+
+
+def product_sales_statement(product_id: int, start: Optional[date] = None, end: Optional[date] = None):
+    # Série diária de um produto pelo índice (product_id, day)
+    return (
+        select(
+            ProductDailySales.day,
+            ProductDailySales.order_count,
+            ProductDailySales.quantity,
+            ProductDailySales.revenue_cents,
+        )
+        .where(ProductDailySales.product_id == product_id, *_between(ProductDailySales.day, start, end))
+        .order_by(ProductDailySales.day)
+    )
+
+
+def top_products_statement(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    by: str = "revenue",
+    limit: int = 10,
+):
+    quantity = func.sum(ProductDailySales.quantity).label("quantity")
+    revenue_cents = func.sum(ProductDailySales.revenue_cents).label("revenue_cents")
+    ranked = revenue_cents if by == "revenue" else quantity
+    return (
+        select(
+            ProductDailySales.product_id,
+            Product.name,
+            func.sum(ProductDailySales.order_count).label("order_count"),
+            quantity,
+            revenue_cents,
+        )
+        .outerjoin(Product, Product.id == ProductDailySales.product_id)
+        .where(*_between(ProductDailySales.day, start, end))
+        .group_by(ProductDailySales.product_id, Product.name)
+        .order_by(ranked.desc(), ProductDailySales.product_id)
+        .limit(limit)
+    )
+
+
+def sales_row(row) -> dict:
+    # Linha de agregado -> resposta (centavos inteiros viram Decimal exato)
+    result = {
+        "orders": row.order_count,
+        "quantity": row.quantity,
+        "revenue": from_cents(row.revenue_cents),
+    }
+    for key in ("day", "product_id", "name"):
+        if key in row._fields:
+            result[key] = getattr(row, key)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agregados de vendas")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--start", type=date.fromisoformat, help="primeiro dia (AAAA-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="último dia (AAAA-MM-DD)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    with SessionLocal() as db:
+        days = backfill(db, args.start, args.end)
+    print(f"{days} dia(s) recalculado(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
+import time
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.cache import TTLCache
+from app.config import AUTH_ADMIN_CACHE_TTL_SECONDS, AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS
+from app.database import get_async_db, get_db
 from app.models.user import User
 from app.auth.jwt import decode_access_token
 
@@ -9,10 +15,35 @@ from app.auth.jwt import decode_access_token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-):
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    # Identidade mínima usada pelas rotas (não é um objeto ORM)
+    id: int
+    email: str
+    is_admin: bool
+
+
+# token verificado -> AuthenticatedUser
+# Evita decodificar o JWT e consultar o usuário no banco a cada requisição
+user_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: int):
+    user_cache.discard_where(lambda _, identity: identity.id == user_id)
+
+
+# Qualquer alteração no usuário feita pelo ORM deste processo derruba as
+# identidades em cache. Limite: UPDATE/DELETE direto (update(User)) e escritas
+# de outros workers não passam por aqui; a identidade antiga vale até a
+# entrada vencer (AUTH_CACHE_TTL_SECONDS, ou AUTH_ADMIN_CACHE_TTL_SECONDS para
+# admins, para um rebaixamento não manter o acesso por muito tempo).
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    invalidate_user(target.id)
+
+
+def _verify_token(token: str) -> tuple[dict, str]:
     # 1️⃣ Valida o JWT
     payload = decode_access_token(token)
 
@@ -32,20 +63,64 @@ def get_current_user(
             detail="Token inválido",
         )
 
-    # Busca usuário no banco
-    user = db.query(User).filter(User.email == email).first()
+    return payload, email
 
+
+def _remember(token: str, payload: dict, user: User | None, generation: int) -> AuthenticatedUser:
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuário não encontrado",
         )
 
-    return user
+    identity = AuthenticatedUser(id=user.id, email=user.email, is_admin=user.is_admin)
+
+    # A entrada nunca sobrevive à expiração do próprio token
+    max_ttl = AUTH_ADMIN_CACHE_TTL_SECONDS if identity.is_admin else AUTH_CACHE_TTL_SECONDS
+    ttl = min(max_ttl, payload.get("exp", 0) - time.time())
+    if ttl > 0:
+        user_cache.set(token, identity, ttl=ttl, generation=generation)
+
+    return identity
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> AuthenticatedUser:
+    # 0️⃣ Token já verificado recentemente
+    cached = user_cache.get(token)
+    if cached is not None:
+        return cached
+
+    generation = user_cache.generation
+    payload, email = _verify_token(token)
+
+    # Busca usuário no banco
+    user = db.query(User).filter(User.email == email).first()
+
+    return _remember(token, payload, user, generation)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> AuthenticatedUser:
+    # Mesma lógica de get_current_user, sem passar pelo threadpool
+    cached = user_cache.get(token)
+    if cached is not None:
+        return cached
+
+    generation = user_cache.generation
+    payload, email = _verify_token(token)
+
+    user = await db.scalar(select(User).where(User.email == email))
+
+    return _remember(token, payload, user, generation)
 
 # Dependência de permissão ADMIN
 def get_current_admin_user(
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
     if not current_user.is_admin:
         raise HTTPException(
@@ -55,3 +130,8 @@ def get_current_admin_user(
 
     return current_user
 
+
+async def get_current_admin_user_async(
+    current_user: AuthenticatedUser = Depends(get_current_user_async),
+):
+    return get_current_admin_user(current_user)
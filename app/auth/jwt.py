@@ -6,6 +6,7 @@ from app.config import (
     ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
+from app.metrics import stage
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -20,12 +21,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
     # geracao do token
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    with stage("jwt"):
+        return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
 def decode_access_token(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with stage("jwt"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload # retorna dados, se o token for valido
     except JWTError:
         return None
@@ -1,13 +1,129 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from app.config import (
+    BCRYPT_ROUNDS,
+    PASSWORD_HASH_EXECUTOR,
+    PASSWORD_HASH_MAX_PENDING,
+    PASSWORD_HASH_WORKERS,
+)
+from app.metrics import stage
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max iguais ao custo atual: hashes com outro custo passam a "precisar de
+# atualização" e são refeitos no próximo login (verify_and_update)
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 # transforma a senha em HASH
 def get_password_hash(password: str) -> str:
-    
+
     return pwd_context.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
 
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    # Retorna (senha confere, novo hash ou None se o atual ainda serve)
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Executa o bcrypt fora do threadpool das rotas, num pool próprio e limitado.
+
+    No máximo `max_pending` operações ficam em andamento ou na fila; além
+    disso a requisição é recusada com 503 em vez de esperar indefinidamente.
+    Com `workers=0` não há pool dedicado (usa o threadpool padrão, sem limite).
+    """
+
+    def __init__(self, workers: int, max_pending: int, kind: str = "thread"):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def executor(self) -> Executor:
+        # Criado na primeira utilização (processos só sobem se forem usados)
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="bcrypt"
+                    )
+            return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Serviço de autenticação sobrecarregado, tente novamente.",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+
+    def _release(self):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    async def run(self, fn, *args):
+        # A etapa inclui a espera na fila do pool
+        with stage("bcrypt"):
+            if self.workers <= 0:
+                return await run_in_threadpool(fn, *args)
+
+            self._acquire()
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, fn, *args)
+            finally:
+                self._release()
+
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        return await self.run(verify_and_update, password, hashed_password)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+password_hasher = PasswordHasher(
+    PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_EXECUTOR
+)
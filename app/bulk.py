@@ -0,0 +1,188 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterator, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.money import from_cents, to_cents
+from app.schemas.product import ProductCreate
+
+# Importação/exportação em massa do catálogo.
+# Nada aqui carrega o arquivo ou a tabela inteira em memória: a importação
+# consome o corpo da requisição em pedaços e a exportação lê por keyset.
+
+CSV_FIELDS = ["name", "description", "price", "stock"]
+EXPORT_FIELDS = ["id", *CSV_FIELDS]
+
+# Limite de erros detalhados no relatório (os demais só entram na contagem)
+MAX_REPORTED_ERRORS = 1000
+
+
+def _decode(line: bytes) -> Optional[str]:
+    # None marca a linha que não é UTF-8 válido (vai para o relatório)
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        return None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Optional[str]]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield _decode(line)
+    if buffer:
+        yield _decode(buffer)
+
+
+async def iter_csv_records(lines: AsyncIterator[Optional[str]]) -> AsyncIterator[Optional[str]]:
+    # Junta linhas físicas até as aspas fecharem (campos com quebra de linha).
+    # Uma linha ilegível vira um registro None e descarta o registro em aberto
+    pending = None
+    async for line in lines:
+        if line is None:
+            pending = None
+            yield None
+            continue
+        pending = line if pending is None else f"{pending}\n{line}"
+        if pending.count('"') % 2 == 0:
+            yield pending
+            pending = None
+    if pending is not None:
+        yield pending
+
+
+def product_row(raw: dict) -> dict:
+    # Valida a linha e a converte para as colunas da tabela (preço em centavos)
+    product = ProductCreate.model_validate(raw)
+    return {
+        "name": product.name,
+        "description": product.description,
+        "price_cents": to_cents(product.price),
+        "stock": product.stock,
+    }
+
+
+def _format_errors(exc: ValidationError) -> list[str]:
+    return [
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    ]
+
+
+class ImportResult:
+
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+
+    def add_error(self, line: int, errors: list[str]):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self) -> dict:
+        return {"inserted": self.inserted, "failed": self.failed, "errors": self.errors}
+
+
+async def parse_rows(chunks: AsyncIterator[bytes], fmt: str, report: ImportResult) -> AsyncIterator[dict]:
+    """
+    Produz as linhas válidas (já validadas com ProductCreate) e registra
+    as inválidas no relatório, com o número da linha no arquivo.
+    """
+    lines = iter_lines(chunks)
+
+    if fmt == "csv":
+        header = None
+        line_no = 0
+        async for record in iter_csv_records(lines):
+            line_no += 1
+            if record is None:
+                report.add_error(line_no, ["UTF-8 inválido"])
+                continue
+            if not record.strip():
+                continue
+            values = next(csv.reader([record]))
+            if header is None:
+                header = [value.strip() for value in values]
+                continue
+            raw = dict(zip(header, values))
+            try:
+                yield product_row(raw)
+            except ValidationError as exc:
+                report.add_error(line_no, _format_errors(exc))
+        return
+
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if line is None:
+            report.add_error(line_no, ["UTF-8 inválido"])
+            continue
+        if not line.strip():
+            continue
+        try:
+            raw = json.loads(line)
+        except ValueError:
+            report.add_error(line_no, ["JSON inválido"])
+            continue
+        try:
+            yield product_row(raw)
+        except ValidationError as exc:
+            report.add_error(line_no, _format_errors(exc))
+
+
+def insert_chunk(db: Session, rows: list[dict]):
+    # executemany + commit por lote: uma falha no meio preserva os lotes anteriores
+    db.execute(insert(Product), rows)
+    db.commit()
+
+
+def iter_products(db: Session, batch_size: int = 1000) -> Iterator[tuple]:
+    # Lê o catálogo em lotes por id (keyset), apenas as colunas exportadas
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Product.id, Product.name, Product.description, Product.price_cents, Product.stock)
+            .where(Product.id > last_id)
+            .order_by(Product.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        for product_id, name, description, price_cents, stock in rows:
+            yield product_id, name, description, from_cents(price_cents), stock
+        last_id = rows[-1].id
+
+
+def export_ndjson(db: Session, batch_size: int = 1000) -> Iterator[str]:
+    batch = []
+    for row in iter_products(db, batch_size):
+        batch.append(json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False, default=float))
+        if len(batch) == batch_size:
+            yield "\n".join(batch) + "\n"
+            batch = []
+    if batch:
+        yield "\n".join(batch) + "\n"
+
+
+def export_csv(db: Session, batch_size: int = 1000) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    count = 0
+    for row in iter_products(db, batch_size):
+        writer.writerow(row)
+        count += 1
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
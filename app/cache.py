@@ -0,0 +1,173 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import (
+    PRODUCT_CACHE_SIZE,
+    PRODUCT_CACHE_TTL_SECONDS,
+    PRODUCT_PAGE_CACHE_SIZE,
+)
+from app.models.product import Product
+from app.schemas.product import ProductResponse
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache LRU limitado por tamanho e com expiração (TTL) por entrada.
+    Seguro para uso entre threads (os handlers sync rodam no threadpool).
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # Incrementada a cada invalidação; evita regravar um valor lido antes dela
+        self.generation = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        # Leitura sem efeitos: não conta hit/miss nem altera a ordem LRU
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING or entry[0] <= self._clock():
+            return default
+        return entry[1]
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        generation: Optional[int] = None,
+    ):
+        """
+        Grava o valor. Se `generation` for informada e houve invalidação desde
+        a leitura, o valor já pode estar velho e é descartado.
+        """
+        if self.maxsize <= 0:
+            return
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self.generation += 1
+            self._data.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Hashable, Any], bool]):
+        with self._lock:
+            self.generation += 1
+            for key in [k for k, (_, v) in self._data.items() if predicate(k, v)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Cache do catálogo: snapshots por id e páginas da listagem.
+# Nunca guardamos objetos ORM (presos a uma sessão), apenas schemas imutáveis.
+product_cache = TTLCache(PRODUCT_CACHE_SIZE, PRODUCT_CACHE_TTL_SECONDS)
+product_page_cache = TTLCache(PRODUCT_PAGE_CACHE_SIZE, PRODUCT_CACHE_TTL_SECONDS)
+
+
+def invalidate_products(*product_ids: int):
+    """
+    Write-through: chamada após qualquer escrita em produtos (inclusive estoque).
+    As páginas são todas descartadas, pois qualquer produto pode aparecer nelas.
+    """
+    for product_id in product_ids:
+        product_cache.pop(product_id)
+    product_page_cache.clear()
+
+
+def get_product_snapshot(
+    db: Session, product_id: int, version: Optional[int] = None
+) -> Optional[ProductResponse]:
+    """
+    Leitura do produto via cache. O estoque do snapshot serve apenas para
+    validações informativas (ex.: carrinho); caminhos que baixam estoque
+    devem ler do banco.
+
+    `version` é a versão do catálogo (a mesma do ETag): o snapshot é guardado
+    com ela e, se outro worker escreveu (o invalidate_products dele não
+    chega aqui), a versão não bate e o produto é relido.
+    """
+    cached = product_cache.get(product_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    generation = product_cache.generation
+    product = db.get(Product, product_id)
+    if product is None:
+        return None
+
+    snapshot = ProductResponse.model_validate(product)
+    product_cache.set(product_id, (version, snapshot), generation=generation)
+    return snapshot
+
+
+async def get_product_snapshot_async(
+    db: AsyncSession, product_id: int, version: Optional[int] = None
+) -> Optional[ProductResponse]:
+    cached = product_cache.get(product_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    generation = product_cache.generation
+    product = await db.get(Product, product_id)
+    if product is None:
+        return None
+
+    snapshot = ProductResponse.model_validate(product)
+    product_cache.set(product_id, (version, snapshot), generation=generation)
+    return snapshot
@@ -0,0 +1,196 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.order_status import OrderStatus
+from app.models.product import Product
+from app.money import from_cents
+from app.schemas.cart import CartOp, CartOpType
+from app.stock import StockFailure, failures_detail
+
+# Carrinho como agregado: um lote de operações vira um número fixo de
+# comandos SQL (upsert em lote + delete + recálculo do total), seja qual for
+# o tamanho do lote. O total é sempre recalculado em centavos inteiros a
+# partir dos itens, nunca acumulado em float.
+# Nenhuma função aqui faz commit: quem chama decide a transação.
+
+
+def _insert(db: Session):
+    # INSERT ... ON CONFLICT tem a mesma API nos dois dialetos
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(OrderItem)
+
+
+def fold_ops(ops: list[CartOp]) -> dict[int, tuple[str, int]]:
+    """
+    Reduz o lote, na ordem, a uma instrução por produto:
+    ("add", n) soma n ao que já estiver no carrinho; ("set", n) define n.
+    """
+    folded: dict[int, tuple[str, int]] = {}
+    for op in ops:
+        kind, quantity = folded.get(op.product_id, ("add", 0))
+        if op.op == CartOpType.ADD:
+            folded[op.product_id] = (kind, quantity + op.quantity)
+        elif op.op == CartOpType.SET:
+            folded[op.product_id] = ("set", op.quantity)
+        else:
+            folded[op.product_id] = ("set", 0)
+    return folded
+
+
+def touch_cart(db: Session, user_id: int) -> Optional[int]:
+    """
+    Carrinho do usuário para uma escrita. Em vez de um SELECT, o carrinho é
+    "tocado" com um UPDATE condicional (status ainda CART): a última
+    atividade adia a expiração e, com a escrita já travada, a varredura não
+    consegue cancelá-lo antes de os itens serem gravados.
+    """
+    return db.scalar(
+        update(Order)
+        .where(Order.user_id == user_id, Order.status == OrderStatus.CART)
+        .values(last_activity_at=datetime.utcnow())
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def get_or_create_cart_id(db: Session, user_id: int) -> int:
+    cart_id = touch_cart(db, user_id)
+    if cart_id is not None:
+        return cart_id
+
+    # INSERT num savepoint: se outra requisição criou o carrinho nesse meio
+    # tempo, o índice único uq_orders_user_cart recusa o segundo e usamos o dela
+    cart = Order(user_id=user_id, status=OrderStatus.CART, total_cents=0)
+    try:
+        with db.begin_nested():
+            db.add(cart)
+            db.flush()
+    except IntegrityError:
+        return touch_cart(db, user_id)
+    return cart.id
+
+
+def recompute_total(db: Session, cart_id: int):
+    # SUM inteiro em centavos: exato, sem acumular erro de arredondamento
+    cents = (
+        select(func.coalesce(func.sum(OrderItem.quantity * OrderItem.unit_price_cents), 0))
+        .where(OrderItem.order_id == cart_id)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(Order)
+        .where(Order.id == cart_id)
+        .values(total_cents=cents, version=Order.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def apply_ops(db: Session, user_id: int, ops: list[CartOp]) -> dict[int, Product]:
+    """
+    Aplica o lote ao carrinho do usuário (criando-o se preciso).
+    Retorna os produtos envolvidos. Levanta 404 para produto inexistente e
+    400 se alguma quantidade final passar do estoque; nesse caso as escritas
+    já feitas ficam na transação e quem chama deve desfazê-la.
+    """
+    folded = fold_ops(ops)
+    products = {
+        product.id: product
+        for product in db.scalars(select(Product).where(Product.id.in_(list(folded))))
+    }
+    missing = sorted(set(folded) - set(products))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"message": "Produto não encontrado", "product_ids": missing},
+        )
+
+    cart_id = get_or_create_cart_id(db, user_id)
+
+    rows = {
+        kind: [
+            {"order_id": cart_id, "product_id": product_id, "quantity": quantity, "unit_price_cents": products[product_id].price_cents}
+            for product_id, (row_kind, quantity) in folded.items()
+            if row_kind == kind and quantity > 0
+        ]
+        for kind in ("add", "set")
+    }
+    removed = [product_id for product_id, (kind, quantity) in folded.items() if kind == "set" and quantity == 0]
+
+    quantities: dict[int, int] = {}
+    for kind, values in rows.items():
+        if not values:
+            continue
+        stmt = _insert(db).values(values)
+        new_quantity = stmt.excluded.quantity
+        if kind == "add":
+            new_quantity = OrderItem.quantity + stmt.excluded.quantity
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OrderItem.order_id, OrderItem.product_id],
+            set_={"quantity": new_quantity, "unit_price_cents": stmt.excluded.unit_price_cents},
+        ).returning(OrderItem.product_id, OrderItem.quantity)
+        quantities.update(db.execute(stmt).all())
+
+    if removed:
+        db.execute(
+            delete(OrderItem)
+            .where(OrderItem.order_id == cart_id, OrderItem.product_id.in_(removed))
+            .execution_options(synchronize_session=False)
+        )
+
+    # Validação informativa: o estoque é revalidado de forma atômica no checkout
+    failures = [
+        StockFailure(product_id=product_id, requested=quantity, available=products[product_id].stock)
+        for product_id, quantity in sorted(quantities.items())
+        if quantity > products[product_id].stock
+    ]
+    if failures:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=failures_detail("Estoque insuficiente", failures),
+        )
+
+    recompute_total(db, cart_id)
+    return products
+
+
+def cart_view_statement(user_id: int):
+    # Carrinho, itens e nomes dos produtos numa única consulta
+    return (
+        select(
+            Order.id,
+            Order.total_cents,
+            OrderItem.product_id,
+            Product.name,
+            OrderItem.quantity,
+            OrderItem.unit_price_cents,
+        )
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .where(Order.user_id == user_id, Order.status == OrderStatus.CART)
+        .order_by(OrderItem.id)
+    )
+
+
+def build_cart_view(rows: list) -> dict:
+    if not rows:
+        return {"id": None, "total": from_cents(0), "items": []}
+    items = [
+        {
+            "product_id": row.product_id,
+            "name": row.name,
+            "quantity": row.quantity,
+            "unit_price": from_cents(row.unit_price_cents),
+            "subtotal": from_cents(row.quantity * row.unit_price_cents),
+        }
+        for row in rows
+        if row.product_id is not None
+    ]
+    return {"id": rows[0].id, "total": from_cents(rows[0].total_cents), "items": items}
@@ -6,3 +6,112 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+
+# Cache do catálogo de produtos (por processo)
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", 10000))
+PRODUCT_PAGE_CACHE_SIZE = int(os.getenv("PRODUCT_PAGE_CACHE_SIZE", 1000))
+PRODUCT_CACHE_TTL_SECONDS = float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", 30))
+
+# Hash de senhas (bcrypt): custo e pool dedicado com fila limitada.
+# Hashes com outro custo são refeitos no próximo login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+# Em andamento + na fila; acima disso login/registro respondem 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")  # thread | process
+
+# Cache de tokens já verificados (token -> identidade do usuário)
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", 60))
+# Identidades de admin vencem antes: um rebaixamento que a invalidação não vê
+# (outro worker, UPDATE fora do ORM) vale no máximo depois desse prazo
+AUTH_ADMIN_CACHE_TTL_SECONDS = float(os.getenv("AUTH_ADMIN_CACHE_TTL_SECONDS", 5))
+
+# Tempo que o estoque fica reservado entre o checkout e o pagamento
+RESERVATION_TTL_MINUTES = int(os.getenv("RESERVATION_TTL_MINUTES", 15))
+
+# Camada de banco assíncrona (AsyncSession + rotas async)
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+# Permite desligar o rate limit (ex.: testes de carga)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# Onde ficam os contadores: memory://, sqlite:///caminho.db ou resp://host:porta/db
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+RATE_LIMIT_STRATEGY = os.getenv("RATE_LIMIT_STRATEGY", "fixed-window")
+# Limites (sintaxe do slowapi, vários separados por ";"), por usuário autenticado ou IP
+RATE_LIMIT_DEFAULT = os.getenv("RATE_LIMIT_DEFAULT", "200/day;50/hour")
+RATE_LIMIT_REGISTER = os.getenv("RATE_LIMIT_REGISTER", "3/hour")
+RATE_LIMIT_LOGIN = os.getenv("RATE_LIMIT_LOGIN", "5/minute")
+
+# Banco de dados
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/ecommerce.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# PRAGMAs aplicados a cada conexão SQLite
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))  # 256 MB
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -65536))  # negativo = KiB (64 MB)
+
+# Log de requisições lentas (0 = desligado): acima do limite, registra
+# as etapas e o SQL emitido (até SLOW_REQUEST_MAX_STATEMENTS comandos)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 0))
+SLOW_REQUEST_MAX_STATEMENTS = int(os.getenv("SLOW_REQUEST_MAX_STATEMENTS", 50))
+
+# Importação em massa: linhas por INSERT/commit
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", 1000))
+
+# Idempotency-Key em checkout e pagamentos: por quanto tempo a resposta fica
+# guardada para replay, validade da trava de uma requisição em andamento
+# (se o processo morrer no meio) e quanto uma duplicata espera por ela
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 86400))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", 60))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 10))
+
+# Varredura periódica (0 = desligada): cancela carrinhos e pedidos pendentes
+# abandonados, devolvendo o estoque reservado, em lotes limitados
+SWEEP_INTERVAL_SECONDS = float(os.getenv("SWEEP_INTERVAL_SECONDS", 60))
+SWEEP_BATCH_SIZE = int(os.getenv("SWEEP_BATCH_SIZE", 500))
+# Lotes por rodada: o que sobrar fica para a próxima
+SWEEP_MAX_BATCHES = int(os.getenv("SWEEP_MAX_BATCHES", 10))
+CART_TTL_HOURS = float(os.getenv("CART_TTL_HOURS", 72))
+PENDING_ORDER_TTL_HOURS = float(os.getenv("PENDING_ORDER_TTL_HOURS", 24))
+
+# Migrações de schema (app/migrations.py). No startup só a versão é
+# conferida (uma consulta); se estiver atrasada, migra na hora ou, com
+# DB_MIGRATE_ON_STARTUP=false, recusa subir (rode `python -m app.migrations`)
+DB_MIGRATE_ON_STARTUP = os.getenv("DB_MIGRATE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+# Linhas por UPDATE/commit nos preenchimentos de colunas novas
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", 5000))
+
+# Cache HTTP do catálogo (GET /products): por quantos segundos clientes e
+# proxies podem reutilizar a resposta sem revalidar o ETag
+CATALOG_MAX_AGE_SECONDS = int(os.getenv("CATALOG_MAX_AGE_SECONDS", 5))
+
+# Pagamentos em lote (POST /payments/batch): pedidos por transação
+SETTLEMENT_BATCH_SIZE = int(os.getenv("SETTLEMENT_BATCH_SIZE", 200))
+
+# Outbox de eventos dos pedidos (app/outbox.py): a cada intervalo (0 = desligado)
+# o despachante entrega os pendentes em lotes aos destinos de OUTBOX_SINKS,
+# separados por vírgula: queue (fila asyncio em processo), file (NDJSON) e
+# webhook (POST JSON). Sem destinos o despachante não roda: os eventos ficam
+# pendentes na tabela até algum destino ser configurado
+OUTBOX_DISPATCH_INTERVAL_SECONDS = float(os.getenv("OUTBOX_DISPATCH_INTERVAL_SECONDS", 1))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 200))
+OUTBOX_SINKS = [name.strip() for name in os.getenv("OUTBOX_SINKS", "").split(",") if name.strip()]
+OUTBOX_QUEUE_SIZE = int(os.getenv("OUTBOX_QUEUE_SIZE", 10000))
+OUTBOX_FILE_PATH = os.getenv("OUTBOX_FILE_PATH", "data/outbox.ndjson")
+OUTBOX_WEBHOOK_URL = os.getenv("OUTBOX_WEBHOOK_URL", "")
+OUTBOX_WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("OUTBOX_WEBHOOK_TIMEOUT_SECONDS", 5))
+# Validade da reserva de um lote por um despachante (se o processo morrer, outro o reenvia)
+OUTBOX_CLAIM_SECONDS = int(os.getenv("OUTBOX_CLAIM_SECONDS", 30))
+# Falha na entrega: o lote volta depois de 2^tentativas segundos (no máximo
+# OUTBOX_RETRY_MAX_SECONDS); com OUTBOX_MAX_ATTEMPTS o evento é deixado de lado
+# (dead letter), fica na tabela e deixa de segurar os seguintes
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 20))
+OUTBOX_RETRY_MAX_SECONDS = int(os.getenv("OUTBOX_RETRY_MAX_SECONDS", 3600))
+# Eventos já entregues são removidos pela varredura depois desse prazo
+OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", 72))
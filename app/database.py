@@ -1,15 +1,185 @@
-from sqlalchemy import create_engine
+import os
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
-
-# Endereço do banco de dados
-DATABASE_URL = "sqlite:///./data/ecommerce.db"
-
-# Estabelece conexão ao BD
-engine = create_engine(
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.config import (
     DATABASE_URL,
-    connect_args={"check_same_thread": False}
+    DB_ASYNC,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE,
+    SQLITE_MMAP_SIZE,
 )
 
+# Drivers assíncronos equivalentes a cada driver síncrono
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+
+class PoolMetrics:
+    """
+    Contadores do pool de conexões: quantas vezes uma conexão foi retirada,
+    quanto tempo se esperou por ela e quantas esperas estouraram o timeout.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def increment(self, counter: str):
+        # `+=` não é atômico: eventos do pool chegam de várias threads
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def observe_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            data = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+        # Estado atual (nem todo pool expõe, ex.: StaticPool em memória)
+        for name in ("size", "checkedout", "overflow"):
+            if hasattr(pool, name):
+                data[name] = getattr(pool, name)()
+        return data
+
+
+def metered_pool(base, metrics: PoolMetrics):
+    # _do_get é onde o pool bloqueia esperando uma conexão livre
+    class MeteredPool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except PoolTimeoutError:
+                metrics.observe_wait(time.perf_counter() - start, timed_out=True)
+                raise
+            metrics.observe_wait(time.perf_counter() - start)
+            return connection
+
+    return MeteredPool
+
+
+def _is_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite"
+
+
+def _is_memory(url) -> bool:
+    return _is_sqlite(url) and url.database in (None, "", ":memory:")
+
+
+def engine_options(url: str, metrics: PoolMetrics, async_mode: bool = False) -> dict:
+    parsed = make_url(url)
+    options = {}
+
+    if _is_sqlite(parsed):
+        options["connect_args"] = {"check_same_thread": False}
+        if _is_memory(parsed):
+            return options  # pool próprio do SQLite em memória
+
+    options.update(
+        poolclass=metered_pool(AsyncAdaptedQueuePool if async_mode else QueuePool, metrics),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    return options
+
+
+def instrument(sync_engine, metrics: PoolMetrics):
+    """
+    Registra os contadores do pool e, em SQLite, aplica os PRAGMAs de
+    desempenho em cada nova conexão.
+    """
+    sqlite = _is_sqlite(sync_engine.url)
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.increment("connects")
+        if not sqlite:
+            return
+        cursor = dbapi_connection.cursor()
+        # WAL: leitores não bloqueiam escritores (e vice-versa)
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # Em WAL, NORMAL só faz fsync no checkpoint; continua seguro contra corrupção
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        # Espera pelo lock em vez de falhar com "database is locked"
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+        cursor.close()
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.increment("checkouts")
+
+    @event.listens_for(sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        metrics.increment("checkins")
+
+    @event.listens_for(sync_engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.increment("invalidations")
+
+
+def create_db_engine(url: str, metrics: PoolMetrics):
+    parsed = make_url(url)
+    # Garante que a pasta do arquivo SQLite exista (ex.: ./data)
+    if _is_sqlite(parsed) and not _is_memory(parsed):
+        os.makedirs(os.path.dirname(os.path.abspath(parsed.database)), exist_ok=True)
+
+    db_engine = create_engine(url, **engine_options(url, metrics))
+    instrument(db_engine, metrics)
+    return db_engine
+
+
+def create_async_db_engine(url: str, metrics: PoolMetrics):
+    async_url = to_async_url(url)
+    db_engine = create_async_engine(async_url, **engine_options(async_url, metrics, async_mode=True))
+    instrument(db_engine.sync_engine, metrics)
+    return db_engine
+
+
+# Estabelece conexão ao BD (endereço e pool vêm de app/config.py)
+pool_metrics = PoolMetrics()
+engine = create_db_engine(DATABASE_URL, pool_metrics)
+
 # Fábrica de sessões
 SessionLocal = sessionmaker(
     bind=engine,
@@ -17,6 +187,25 @@ SessionLocal = sessionmaker(
     autocommit=False
 )
 
+# Engine/sessões assíncronas, criadas apenas com DB_ASYNC ligado
+# (o driver async, ex. aiosqlite, só é exigido nesse modo)
+async_pool_metrics = PoolMetrics()
+async_engine = create_async_db_engine(DATABASE_URL, async_pool_metrics) if DB_ASYNC else None
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    # Sem expirar no commit: atributos não podem ser recarregados de forma implícita em async
+    expire_on_commit=False
+)
+
+
+def pool_stats() -> dict:
+    stats = {"sync": pool_metrics.snapshot(engine.pool)}
+    if async_engine is not None:
+        stats["async"] = async_pool_metrics.snapshot(async_engine.sync_engine.pool)
+    return stats
+
 
 class Base(DeclarativeBase):
     pass
@@ -30,3 +219,8 @@ def get_db():
     finally:
         db.close()
 
+
+# ✅ Dependência do FastAPI (modo assíncrono)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
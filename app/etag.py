@@ -0,0 +1,52 @@
+from typing import Optional
+
+from fastapi import Request, Response, status
+from sqlalchemy import select
+
+from app.config import CATALOG_MAX_AGE_SECONDS
+from app.models.table_version import TableVersion
+
+# GET condicional: o ETag vem de um contador de versão (por tabela no
+# catálogo, por linha nos pedidos), então responder 304 custa uma consulta
+# pela chave primária, sem montar nem serializar o corpo.
+
+CATALOG_CACHE_CONTROL = f"public, max-age={CATALOG_MAX_AGE_SECONDS}"
+# Pedidos são do usuário: só o cliente guarda, sempre revalidando
+ORDER_CACHE_CONTROL = "private, no-cache"
+
+
+def catalog_version_statement():
+    return select(TableVersion.version).where(TableVersion.name == "products")
+
+
+def catalog_etag(version: Optional[int]) -> Optional[str]:
+    # Sem a linha de versão (banco sem os triggers) não há ETag
+    return None if version is None else f'"products-{version}"'
+
+
+def order_etag(order_id: int, version: int) -> str:
+    return f'"order-{order_id}-{version}"'
+
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header or etag is None:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match usa comparação fraca: W/"x" casa com "x"
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return etag in candidates
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+def set_cache_headers(response: Response, etag: Optional[str], cache_control: str):
+    if etag is not None:
+        response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
@@ -0,0 +1,303 @@
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from app.config import IDEMPOTENCY_LOCK_SECONDS, IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_WAIT_SECONDS
+from app.database import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+from app.ratelimit import rate_limit_key
+
+# Header Idempotency-Key nas rotas de checkout e pagamento.
+# A primeira requisição com uma chave grava uma linha "em andamento" (a chave
+# primária garante que só uma vence, mesmo entre processos), executa a rota e
+# guarda status e corpo da resposta. Repetições com a mesma chave custam uma
+# busca pela chave primária e recebem a resposta gravada, sem refazer o
+# pagamento. Duplicatas concorrentes esperam a primeira terminar.
+
+IDEMPOTENT_ROUTES = ("/checkout/", "/payments/{order_id}")
+
+MAX_KEY_LENGTH = 255
+# Intervalo entre consultas enquanto outro processo segura a chave
+POLL_INTERVAL_SECONDS = 0.05
+
+NEW, REPLAY, IN_PROGRESS, MISMATCH = "new", "replay", "in_progress", "mismatch"
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    content_type: Optional[str]
+    body: bytes
+
+
+def fingerprint(method: str, path: str, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def should_store(status_code: int) -> bool:
+    # Erros do servidor e rate limit não são definitivos: a chave é liberada
+    # para o cliente tentar de novo
+    return status_code < 500 and status_code != 429
+
+
+def purge_expired(db: Session, now: Optional[datetime] = None) -> int:
+    # Não faz commit: quem chama decide a transação
+    result = db.execute(
+        delete(IdempotencyKey)
+        .where(IdempotencyKey.expires_at <= (now or datetime.utcnow()))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+class IdempotencyStore:
+    """
+    Respostas gravadas por (dono, chave) na tabela idempotency_keys.
+    Métodos síncronos (cada um com sua sessão e commit); o middleware os
+    chama pelo threadpool.
+    """
+
+    def __init__(self, session_factory=SessionLocal, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS,
+                 lock_seconds: int = IDEMPOTENCY_LOCK_SECONDS):
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self._lock = threading.Lock()
+        self.started = 0
+        self.replayed = 0
+        self.mismatched = 0
+        self.waited = 0
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def begin(self, owner: str, key: str, fingerprint: str) -> tuple[str, Optional[StoredResponse]]:
+        """
+        NEW: a chave foi reservada para esta requisição (execute e depois
+        chame complete/abandon). REPLAY: resposta gravada. IN_PROGRESS: outra
+        requisição está com a chave. MISMATCH: a chave já foi usada com outro corpo.
+        """
+        now = datetime.utcnow()
+        with self.session_factory() as db:
+            record = db.get(IdempotencyKey, (owner, key))
+            if record is not None and record.expires_at <= now:
+                # Vencida (ou trava de um processo que morreu): pode ser reutilizada
+                db.delete(record)
+                db.flush()
+                record = None
+
+            if record is None:
+                db.add(IdempotencyKey(
+                    owner=owner,
+                    key=key,
+                    fingerprint=fingerprint,
+                    created_at=now,
+                    expires_at=now + timedelta(seconds=self.lock_seconds),
+                ))
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # Outro processo gravou a mesma chave entre a busca e o INSERT
+                    db.rollback()
+                    return IN_PROGRESS, None
+                self.count("started")
+                return NEW, None
+
+            if record.fingerprint != fingerprint:
+                self.count("mismatched")
+                return MISMATCH, None
+            if record.status_code is None:
+                return IN_PROGRESS, None
+            self.count("replayed")
+            return REPLAY, StoredResponse(record.status_code, record.content_type, record.body)
+
+    def complete(self, owner: str, key: str, response: StoredResponse):
+        with self.session_factory() as db:
+            db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.owner == owner, IdempotencyKey.key == key)
+                .values(
+                    status_code=response.status_code,
+                    content_type=response.content_type,
+                    body=response.body,
+                    expires_at=datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+                )
+            )
+            db.commit()
+
+    def abandon(self, owner: str, key: str):
+        with self.session_factory() as db:
+            db.execute(
+                delete(IdempotencyKey)
+                .where(IdempotencyKey.owner == owner, IdempotencyKey.key == key)
+            )
+            db.commit()
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "replayed": self.replayed,
+            "mismatched": self.mismatched,
+            "waited": self.waited,
+        }
+
+
+idempotency_store = IdempotencyStore()
+
+
+def _route_pattern(path: str) -> re.Pattern:
+    # "/payments/{order_id}" -> ^/payments/[^/]+$
+    return re.compile("^" + re.sub(r"\\\{[^}]+\\\}", "[^/]+", re.escape(path)) + "$")
+
+
+async def _send_json(send, status_code: int, detail: str, headers: Iterable[tuple[bytes, bytes]] = ()):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """
+    Middleware ASGI: aplica o Idempotency-Key aos POST das rotas informadas.
+    Sem o header a requisição segue normalmente.
+    """
+
+    def __init__(self, app, store: IdempotencyStore = idempotency_store,
+                 routes: Iterable[str] = IDEMPOTENT_ROUTES, wait_seconds: float = IDEMPOTENCY_WAIT_SECONDS):
+        self.app = app
+        self.store = store
+        self.patterns = [_route_pattern(route) for route in routes]
+        self.wait_seconds = wait_seconds
+        # Trava por chave dentro do processo: duplicatas simultâneas esperam
+        # aqui em vez de consultar o banco em loop
+        self._locks: dict[tuple[str, str], list] = {}
+
+    def _applies(self, scope) -> bool:
+        return (
+            scope["type"] == "http"
+            and scope["method"] == "POST"
+            and any(pattern.match(scope["path"]) for pattern in self.patterns)
+        )
+
+    async def __call__(self, scope, receive, send):
+        if not self._applies(scope):
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
+        key = request.headers.get("idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key deve ter de 1 a {MAX_KEY_LENGTH} caracteres.")
+            return
+
+        # O corpo entra na impressão digital, então é lido por inteiro aqui
+        body = await request.body()
+        owner = rate_limit_key(request)
+        digest = fingerprint(scope["method"], scope["path"], body)
+
+        async with self._key_lock(owner, key):
+            outcome, stored = await self._begin(owner, key, digest)
+            if outcome == MISMATCH:
+                await _send_json(send, 422, "Idempotency-Key já utilizada com outra requisição.")
+            elif outcome == IN_PROGRESS:
+                await _send_json(
+                    send, 409, "Requisição com esta Idempotency-Key ainda em processamento.",
+                    [(b"retry-after", b"1")],
+                )
+            elif outcome == REPLAY:
+                await self._replay(send, stored)
+            else:
+                await self._execute(scope, body, receive, send, owner, key)
+
+    @asynccontextmanager
+    async def _key_lock(self, owner: str, key: str):
+        # O asyncio.Lock da chave some quando ninguém mais espera por ele
+        entry = self._locks.setdefault((owner, key), [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[(owner, key)]
+
+    async def _begin(self, owner: str, key: str, digest: str):
+        # Outro processo com a chave: consulta até ele terminar ou o prazo acabar
+        deadline = time.monotonic() + self.wait_seconds
+        outcome, stored = await run_in_threadpool(self.store.begin, owner, key, digest)
+        if outcome == IN_PROGRESS:
+            self.store.count("waited")
+        while outcome == IN_PROGRESS and time.monotonic() < deadline:
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+            outcome, stored = await run_in_threadpool(self.store.begin, owner, key, digest)
+        return outcome, stored
+
+    async def _replay(self, send, stored: StoredResponse):
+        headers = [(b"content-length", str(len(stored.body)).encode()), (b"idempotent-replayed", b"true")]
+        if stored.content_type:
+            headers.append((b"content-type", stored.content_type.encode()))
+        await send({"type": "http.response.start", "status": stored.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": stored.body})
+
+    async def _execute(self, scope, body: bytes, receive, send, owner: str, key: str):
+        body_sent = False
+
+        async def replay_receive():
+            # A rota recebe o corpo já lido; depois, os eventos reais (disconnect)
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status_code, content_type, chunks = 500, None, []
+
+        async def send_wrapper(message):
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                for name, value in message.get("headers", []):
+                    if name.lower() == b"content-type":
+                        content_type = value.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, send_wrapper)
+        except BaseException:
+            await run_in_threadpool(self.store.abandon, owner, key)
+            raise
+
+        if should_store(status_code):
+            response = StoredResponse(status_code, content_type, b"".join(chunks))
+            await run_in_threadpool(self.store.complete, owner, key, response)
+        else:
+            await run_in_threadpool(self.store.abandon, owner, key)
+
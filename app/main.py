@@ -1,18 +1,42 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
-from app.database import Base, engine
-import app.models
-from app.routers import auth, products, cart, checkout, payments, orders
+from app.config import DB_ASYNC
+from app.database import engine, pool_stats
+from app.migrations import check_schema
+from app.auth.security import password_hasher
+from app.auth.dependencies import user_cache
+from app.cache import product_cache, product_page_cache
+from app.idempotency import IdempotencyMiddleware, idempotency_store
+from app.outbox import outbox_dispatcher
+from app.sweeper import sweeper
+from app.metrics import MetricsMiddleware, gauge_lines, render_metrics
+from app.routers import auth
 from app.utils import limiter  # Importando o limiter isolado
 
+# Com DB_ASYNC=true as rotas de catálogo, carrinho, checkout, pagamentos,
+# pedidos e vendas usam AsyncSession e handlers async (sem passar pelo threadpool)
+if DB_ASYNC:
+    from app.routers.aio import products, cart, checkout, payments, orders, analytics
+else:
+    from app.routers import products, cart, checkout, payments, orders, analytics
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Cria as tabelas no banco de dados ao iniciar
-    Base.metadata.create_all(bind=engine)
+    # Só confere a versão do schema (uma consulta); migra se estiver atrasado
+    check_schema(engine)
+    # Cancela carrinhos/pedidos abandonados em segundo plano
+    sweeper.start()
+    # Entrega os eventos do outbox aos destinos configurados
+    outbox_dispatcher.start()
     yield
+    await outbox_dispatcher.stop()
+    await sweeper.stop()
+    # Encerra o pool do bcrypt (threads/processos)
+    password_hasher.shutdown()
 
 app = FastAPI(
     title="E-commerce API",
@@ -23,7 +47,11 @@ app = FastAPI(
 # Configuração do Rate Limiting
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# Idempotency-Key em checkout/pagamentos (dentro do rate limit: duplicatas também contam)
+app.add_middleware(IdempotencyMiddleware)
 app.add_middleware(SlowAPIMiddleware)
+# Por último: é o mais externo, então mede também o rate limit
+app.add_middleware(MetricsMiddleware)
 
 # Registro dos Routers
 app.include_router(auth.router)
@@ -32,10 +60,56 @@ app.include_router(cart.router)
 app.include_router(checkout.router)
 app.include_router(payments.router)
 app.include_router(orders.router)
+app.include_router(analytics.router)
 
 @app.get("/")
 def health_check():
     return {"status": "API online"}
 
+# Métricas do pool de conexões (retiradas, esperas, timeouts)
+@app.get("/health/db")
+def database_health():
+    return pool_stats()
 
-
+# Métricas em formato Prometheus (latência por rota, SQL, pool, caches, bcrypt)
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+@limiter.exempt
+def metrics(request: Request):
+    pools = pool_stats()
+    caches = {
+        "product": product_cache.stats(),
+        "product_page": product_page_cache.stats(),
+        "auth": user_cache.stats(),
+    }
+    return render_metrics([
+        gauge_lines(
+            "db_pool", "Contadores e estado do pool de conexões.",
+            {(mode, key): value for mode, stats in pools.items() for key, value in stats.items()},
+            ("mode", "stat"),
+        ),
+        gauge_lines(
+            "cache", "Contadores dos caches em memória.",
+            {(name, key): value for name, stats in caches.items() for key, value in stats.items()},
+            ("cache", "stat"),
+        ),
+        gauge_lines(
+            "password_hasher", "Pool do bcrypt.",
+            {(key,): value for key, value in password_hasher.stats().items()},
+            ("stat",),
+        ),
+        gauge_lines(
+            "idempotency", "Chaves de idempotência iniciadas, replays, conflitos e esperas.",
+            {(key,): value for key, value in idempotency_store.stats().items()},
+            ("stat",),
+        ),
+        gauge_lines(
+            "sweeper", "Rodadas da varredura e total varrido por tipo.",
+            {(key,): value for key, value in sweeper.stats().items()},
+            ("stat",),
+        ),
+        gauge_lines(
+            "outbox", "Eventos pendentes, atraso da entrega (s) e lotes despachados.",
+            {(key,): value for key, value in outbox_dispatcher.stats().items()},
+            ("stat",),
+        ),
+    ])
@@ -0,0 +1,233 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import SLOW_REQUEST_MAX_STATEMENTS, SLOW_REQUEST_MS
+
+# Instrumentação por requisição: latência por rota, queries SQL e tempo por
+# etapa (sql, jwt, bcrypt), expostos em formato Prometheus em GET /metrics.
+
+slow_request_logger = logging.getLogger("app.slow_requests")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: tuple = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Histograma com buckets fixos (cumulativos na exposição, como o Prometheus).
+    """
+
+    def __init__(self, name: str, help: str, buckets: Iterable[float], labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        # labels -> [contagem por bucket (+Inf no fim), soma]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, labels: tuple) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        names = self.labelnames + ("le",)
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latência das requisições por rota.",
+    LATENCY_BUCKETS, ("method", "route"),
+)
+REQUESTS = Counter(
+    "http_requests_total", "Requisições por rota e status.", ("method", "route", "status"),
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "Queries SQL emitidas por requisição.",
+    QUERY_BUCKETS, ("method", "route"),
+)
+STAGE_SECONDS = Counter(
+    "http_request_stage_seconds_total", "Tempo gasto por etapa (sql, jwt, bcrypt).",
+    ("route", "stage"),
+)
+
+
+class RequestStats:
+
+    def __init__(self, capture_statements: bool):
+        self.queries = 0
+        self.stages: dict[str, float] = {}
+        self.statements: Optional[list] = [] if capture_statements else None
+
+    def add_stage(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+# Objeto mutável: os handlers sync rodam no threadpool com uma cópia do
+# contexto, mas a cópia aponta para a mesma instância
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    # Mede um trecho da requisição atual (sem requisição ativa, não faz nada)
+    stats = current_request.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_stage(name, time.perf_counter() - start)
+
+
+# Vale para todas as engines (inclusive a sync_engine por trás da async)
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    if stats is None or not conn.info.get("query_started_at"):
+        return
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+    stats.queries += 1
+    stats.add_stage("sql", elapsed)
+    if stats.statements is not None and len(stats.statements) < SLOW_REQUEST_MAX_STATEMENTS:
+        stats.statements.append((round(elapsed * 1000, 3), statement))
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: mede cada requisição HTTP e, com SLOW_REQUEST_MS > 0,
+    registra no log as que passarem do limite junto com o SQL emitido.
+    """
+
+    def __init__(self, app, slow_request_ms: float = SLOW_REQUEST_MS):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(capture_statements=self.slow_request_ms > 0)
+        token = current_request.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request.reset(token)
+            self._record(scope, stats, status_code, elapsed)
+
+    def _record(self, scope, stats: RequestStats, status_code: int, elapsed: float):
+        # Template da rota (ex.: /orders/{order_id}), nunca o caminho cru
+        route = getattr(scope.get("route"), "path", "<unmatched>")
+        method = scope["method"]
+
+        REQUEST_LATENCY.observe((method, route), elapsed)
+        REQUESTS.inc((method, route, str(status_code)))
+        REQUEST_QUERIES.observe((method, route), stats.queries)
+        for name, seconds in stats.stages.items():
+            STAGE_SECONDS.inc((route, name), seconds)
+
+        if self.slow_request_ms > 0 and elapsed * 1000 >= self.slow_request_ms:
+            slow_request_logger.warning(
+                "requisição lenta: %s %s %d em %.1f ms, %d queries, etapas %s\n%s",
+                method,
+                scope["path"],
+                status_code,
+                elapsed * 1000,
+                stats.queries,
+                {name: round(seconds * 1000, 3) for name, seconds in stats.stages.items()},
+                "\n".join(f"  [{ms} ms] {sql}" for ms, sql in stats.statements),
+            )
+
+
+def gauge_lines(name: str, help: str, samples: dict[tuple, float], labelnames: tuple = ()) -> list[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    for labels, value in samples.items():
+        lines.append(f"{name}{_format_labels(labelnames, labels)} {value}")
+    return lines
+
+
+def render_metrics(extra: Iterable[list[str]] = ()) -> str:
+    blocks = [metric.render() for metric in (REQUEST_LATENCY, REQUESTS, REQUEST_QUERIES, STAGE_SECONDS)]
+    blocks.extend(extra)
+    return "\n".join(line for block in blocks for line in block) + "\n"
@@ -0,0 +1,380 @@
+"""
+Migrações de schema versionadas.
+
+Cada migração tem um número crescente e fica registrada na tabela
+`schema_version` depois de aplicada. No startup da aplicação só a versão atual
+é conferida (uma consulta); as migrações pendentes rodam ali mesmo ou antes do
+deploy, pela linha de comando.
+
+Toda migração precisa ser idempotente: os preenchimentos em lote fazem commit
+a cada lote, então uma migração interrompida é simplesmente executada de novo.
+Com vários workers, rode as migrações antes de subi-los e use
+DB_MIGRATE_ON_STARTUP=false.
+
+Uso:
+    python -m app.migrations            # aplica as pendentes
+    python -m app.migrations current    # mostra a versão do banco
+"""
+import argparse
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, insert, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+import app.models  # noqa: F401 - registra os modelos no metadata
+from app.config import DB_MIGRATE_ON_STARTUP, MIGRATION_BATCH_SIZE
+from app.database import Base, engine
+from app.models.product_search import FTS_DDL, FTS_TABLE
+from app.models.order import Order
+from app.models.outbox_event import OutboxEvent
+from app.models.sales_rollup import DailySales, ProductDailySales
+from app.models.table_version import POSTGRESQL_VERSION_DDL, SQLITE_VERSION_DDL, TableVersion
+
+migrations_logger = logging.getLogger("app.migrations")
+
+# Metadata própria: os testes criam o schema com create_all sem versionar
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100)),
+    Column("applied_at", DateTime),
+)
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Engine], None]
+
+
+def backfill(engine: Engine, table: str, assignments: str, where: str,
+             batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """
+    UPDATE em lotes de `batch_size` linhas, um commit por lote, para não
+    segurar a escrita do banco durante a tabela inteira. `where` precisa
+    deixar de valer para as linhas já atualizadas.
+    """
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            result = conn.execute(
+                text(
+                    f"UPDATE {table} SET {assignments} WHERE id IN "
+                    f"(SELECT id FROM {table} WHERE {where} LIMIT :batch_size)"
+                ),
+                {"batch_size": batch_size},
+            )
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+
+
+def create_index(engine: Engine, name: str):
+    """
+    Cria um índice declarado nos modelos, se ainda não existir. No PostgreSQL
+    usa CONCURRENTLY (não bloqueia escritas; não pode rodar em transação).
+    """
+    index = next(
+        index
+        for table in Base.metadata.sorted_tables
+        for index in table.indexes
+        if index.name == name
+    )
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect))
+    if engine.dialect.name == "postgresql":
+        ddl = ddl.replace("INDEX", "INDEX CONCURRENTLY", 1)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql(ddl)
+        return
+    with engine.begin() as conn:
+        conn.exec_driver_sql(ddl)
+
+
+# --- Migrações -------------------------------------------------------------
+
+def baseline(engine: Engine):
+    # Tabelas que ainda não existem (num banco novo, o schema inteiro e atual)
+    Base.metadata.create_all(bind=engine)
+
+
+# Bancos anteriores aos centavos: (tabela, coluna antiga em reais, coluna nova)
+MONEY_COLUMNS = [
+    ("products", "price", "price_cents"),
+    ("order_items", "unit_price", "unit_price_cents"),
+    ("orders", "total", "total_cents"),
+]
+
+
+def money_cents(engine: Engine):
+    # Colunas Float em reais viram INTEGER em centavos (meio-para-cima)
+    if engine.dialect.name != "sqlite":
+        return
+
+    for table, old, new in MONEY_COLUMNS:
+        columns = {column["name"] for column in inspect(engine).get_columns(table)}
+        if old not in columns:
+            continue
+        if new not in columns:
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {new} INTEGER"))
+        backfill(
+            engine, table,
+            f"{new} = CAST(ROUND({old} * 100) AS INTEGER)",
+            f"{new} IS NULL AND {old} IS NOT NULL",
+        )
+        with engine.begin() as conn:
+            if table == "products":
+                # O índice da ordenação por preço passa para a coluna em centavos
+                conn.execute(text("DROP INDEX IF EXISTS ix_products_price_id"))
+                conn.execute(text("CREATE INDEX ix_products_price_id ON products (price_cents, id)"))
+            conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {old}"))
+
+
+def products_fts(engine: Engine):
+    # Índice FTS5 da busca de produtos, populado a partir do conteúdo atual
+    if engine.dialect.name != "sqlite":
+        return
+
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first()
+        if exists:
+            return
+        for statement in FTS_DDL:
+            conn.execute(text(statement))
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def order_items_unique(engine: Engine):
+    # Junta itens duplicados (pedido, produto) e cria a restrição única
+    if engine.dialect.name != "sqlite":
+        return
+
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"),
+            {"name": "uq_order_items_order_product"},
+        ).first()
+        if exists:
+            return
+        conn.execute(text(
+            """
+            UPDATE order_items SET quantity = (
+                SELECT SUM(o.quantity) FROM order_items o
+                WHERE o.order_id = order_items.order_id AND o.product_id = order_items.product_id
+            )
+            WHERE id IN (SELECT MIN(id) FROM order_items GROUP BY order_id, product_id HAVING COUNT(*) > 1)
+            """
+        ))
+        conn.execute(text(
+            "DELETE FROM order_items WHERE id NOT IN "
+            "(SELECT MIN(id) FROM order_items GROUP BY order_id, product_id)"
+        ))
+        conn.execute(text(
+            "CREATE UNIQUE INDEX uq_order_items_order_product ON order_items (order_id, product_id)"
+        ))
+
+
+def order_indexes(engine: Engine):
+    # Consultas por usuário/status e a varredura de pedidos antigos
+    # (o índice da varredura, antes em created_at, é criado em order_activity)
+    for name in ("ix_orders_user_status_id", "ix_orders_user_id_id"):
+        create_index(engine, name)
+
+
+def etag_versions(engine: Engine):
+    # Contador do catálogo (tabela + triggers em products) e versão por pedido
+    TableVersion.__table__.create(bind=engine, checkfirst=True)
+    statements = {"sqlite": SQLITE_VERSION_DDL, "postgresql": POSTGRESQL_VERSION_DDL}
+    with engine.begin() as conn:
+        for statement in statements.get(engine.dialect.name, []):
+            conn.execute(text(statement))
+        columns = {column["name"] for column in inspect(conn).get_columns("orders")}
+        if "version" not in columns:
+            conn.execute(text("ALTER TABLE orders ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+
+
+def sales_rollups(engine: Engine):
+    # Tabelas de agregados de vendas e data de pagamento dos pedidos. Pedidos
+    # pagos antes disso ficam com a data de criação; os agregados do histórico
+    # são reconstruídos à parte (`python -m app.analytics backfill`)
+    for model in (ProductDailySales, DailySales):
+        model.__table__.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        columns = {column["name"] for column in inspect(conn).get_columns("orders")}
+        if "paid_at" not in columns:
+            column_type = "TIMESTAMP" if engine.dialect.name == "postgresql" else "DATETIME"
+            conn.execute(text(f"ALTER TABLE orders ADD COLUMN paid_at {column_type}"))
+    backfill(engine, "orders", "paid_at = created_at", "status = 'PAID' AND paid_at IS NULL")
+    create_index(engine, "ix_orders_paid_at")
+
+
+def outbox(engine: Engine):
+    # Eventos de mudança de status dos pedidos (app/outbox.py)
+    OutboxEvent.__table__.create(bind=engine, checkfirst=True)
+
+
+def order_activity(engine: Engine):
+    # Última atividade do pedido: a varredura expira carrinhos parados, não
+    # carrinhos antigos. Até aqui a idade contava de created_at. A coluna fica
+    # como num banco novo (NOT NULL, default CURRENT_TIMESTAMP)
+    if engine.dialect.name == "sqlite":
+        rebuild_orders_with_activity(engine)
+    else:
+        with engine.begin() as conn:
+            columns = {column["name"] for column in inspect(conn).get_columns("orders")}
+            if "last_activity_at" not in columns:
+                conn.execute(text("ALTER TABLE orders ADD COLUMN last_activity_at TIMESTAMP"))
+        backfill(engine, "orders", "last_activity_at = created_at", "last_activity_at IS NULL")
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE orders ALTER COLUMN last_activity_at SET DEFAULT CURRENT_TIMESTAMP"))
+            conn.execute(text("ALTER TABLE orders ALTER COLUMN last_activity_at SET NOT NULL"))
+    create_index(engine, "ix_orders_status_last_activity_at")
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_orders_status_created_at"))
+
+
+def rebuild_orders_with_activity(engine: Engine):
+    # O SQLite não aceita ADD COLUMN com default não constante nem muda uma
+    # coluna depois: a tabela é recriada pelo modelo e os dados copiados. A
+    # cópia, o DROP e o RENAME vão numa transação só
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS orders_rebuild"))
+        columns = {column["name"]: column for column in inspect(conn).get_columns("orders")}
+        activity = columns.get("last_activity_at")
+        if activity is not None and not activity["nullable"]:
+            return
+        indexes = {index["name"] for index in inspect(conn).get_indexes("orders")}
+
+        ddl = str(CreateTable(Order.__table__).compile(dialect=engine.dialect))
+        conn.exec_driver_sql(ddl.replace("CREATE TABLE orders ", "CREATE TABLE orders_rebuild ", 1))
+        copied = [
+            column.name for column in Order.__table__.columns
+            if column.name in columns and column.name != "last_activity_at"
+        ]
+        source = "last_activity_at, created_at" if activity is not None else "created_at"
+        conn.execute(text(
+            f"INSERT INTO orders_rebuild ({', '.join(copied)}, last_activity_at) "
+            f"SELECT {', '.join(copied)}, COALESCE({source}, CURRENT_TIMESTAMP) FROM orders"
+        ))
+        conn.execute(text("DROP TABLE orders"))
+        conn.execute(text("ALTER TABLE orders_rebuild RENAME TO orders"))
+        # Os índices caem junto com a tabela antiga; voltam os declarados nos modelos
+        for index in Order.__table__.indexes:
+            if index.name in indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def unique_cart(engine: Engine):
+    # Um carrinho por usuário. Carrinhos duplicados (criados por adições
+    # simultâneas) são cancelados, ficando o mais recente, antes do índice único
+    with engine.begin() as conn:
+        conn.execute(text(
+            "UPDATE orders SET status = 'CANCELLED', version = version + 1 "
+            "WHERE status = 'CART' AND id NOT IN "
+            "(SELECT MAX(id) FROM orders WHERE status = 'CART' GROUP BY user_id)"
+        ))
+    create_index(engine, "uq_orders_user_cart")
+
+
+MIGRATIONS = [
+    Migration(1, "baseline", baseline),
+    Migration(2, "money_cents", money_cents),
+    Migration(3, "products_fts", products_fts),
+    Migration(4, "order_items_unique", order_items_unique),
+    Migration(5, "order_indexes", order_indexes),
+    Migration(6, "etag_versions", etag_versions),
+    Migration(7, "sales_rollups", sales_rollups),
+    Migration(8, "outbox", outbox),
+    Migration(9, "order_activity", order_activity),
+    Migration(10, "unique_cart", unique_cart),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(engine: Engine) -> int:
+    # Uma consulta; banco sem a tabela (novo ou anterior às migrações) = 0
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(schema_version.c.version).order_by(schema_version.c.version.desc()).limit(1)
+            ).scalar() or 0
+    except (OperationalError, ProgrammingError):
+        return 0
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> list[int]:
+    """
+    Aplica, em ordem, as migrações ainda não registradas (até `target`).
+    Retorna as versões aplicadas.
+    """
+    schema_version.create(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        applied = set(conn.execute(select(schema_version.c.version)).scalars())
+
+    done = []
+    for migration in MIGRATIONS:
+        if migration.version in applied or (target is not None and migration.version > target):
+            continue
+        migrations_logger.info("aplicando migração %d (%s)", migration.version, migration.name)
+        migration.upgrade(engine)
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(schema_version).values(
+                    version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Outro processo aplicou a mesma migração ao mesmo tempo (são idempotentes)
+            pass
+        done.append(migration.version)
+    return done
+
+
+def check_schema(engine: Engine, migrate: bool = DB_MIGRATE_ON_STARTUP):
+    """
+    Startup: confere a versão do banco. Atrasado, migra (ou recusa subir com
+    migrate=False); adiantado (deploy em andamento), apenas avisa.
+    """
+    version = current_version(engine)
+    if version == LATEST_VERSION:
+        return
+    if version > LATEST_VERSION:
+        migrations_logger.warning(
+            "banco na versão %d, mais nova que a do código (%d)", version, LATEST_VERSION
+        )
+        return
+    if not migrate:
+        raise RuntimeError(
+            f"Banco na versão {version}, a aplicação espera {LATEST_VERSION}: "
+            "rode `python -m app.migrations`"
+        )
+    upgrade(engine)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", nargs="?", choices=["upgrade", "current"], default="upgrade")
+    parser.add_argument("--target", type=int, help="para nesta versão (padrão: a mais recente)")
+    args = parser.parse_args()
+
+    if args.command == "current":
+        print(f"{current_version(engine)} (mais recente: {LATEST_VERSION})")
+        return
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    applied = upgrade(engine, args.target)
+    print(f"aplicadas: {applied or 'nenhuma'}; versão atual: {current_version(engine)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,3 +2,9 @@ from app.models.user import User
 from app.models.product import Product
 from app.models.order import Order
 from app.models.order_item import OrderItem
+from app.models.stock_reservation import StockReservation
+from app.models.product_search import products_fts
+from app.models.idempotency_key import IdempotencyKey
+from app.models.table_version import TableVersion
+from app.models.sales_rollup import DailySales, ProductDailySales
+from app.models.outbox_event import OutboxEvent
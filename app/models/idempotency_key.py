@@ -0,0 +1,26 @@
+from sqlalchemy import Integer, String, LargeBinary, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import Optional
+from app.database import Base
+
+class IdempotencyKey(Base):
+
+    __tablename__ = "idempotency_keys"
+
+    # Dono da chave (user:<email> ou IP) + valor do header Idempotency-Key
+    owner: Mapped[str] = mapped_column(String(255), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+
+    # sha256 de método, caminho e corpo: a mesma chave com outro corpo é recusada
+    fingerprint: Mapped[str] = mapped_column(String(64))
+
+    # Nulo enquanto a primeira requisição ainda está sendo processada
+    status_code: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    content_type: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    body: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+
+    # Após essa data a chave pode ser reutilizada (e a linha removida)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
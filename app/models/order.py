@@ -1,13 +1,35 @@
-from sqlalchemy import Integer, ForeignKey, Float, DateTime, Enum
+from sqlalchemy import Integer, ForeignKey, DateTime, Enum, Index, event, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
+from decimal import Decimal
+from typing import Optional
 from app.database import Base
+from app.money import from_cents, to_cents
 from app.models.order_status import OrderStatus
 
 class Order(Base):
 
     __tablename__ = "orders"
 
+    __table_args__ = (
+        # Carrinho/checkout/pagamento (user_id, status) e /orders/me?status=
+        # em ordem de id, sem ordenação extra
+        Index("ix_orders_user_status_id", "user_id", "status", "id"),
+        # /orders/me: pedidos do usuário em ordem de id (paginação por cursor)
+        Index("ix_orders_user_id_id", "user_id", "id"),
+        # Varredura de carrinhos e pedidos pendentes parados (app/sweeper.py):
+        # cada lote é uma busca por faixa em (status, last_activity_at)
+        Index("ix_orders_status_last_activity_at", "status", "last_activity_at"),
+        # Reconstrução dos agregados de vendas, um dia de pagamentos por vez
+        Index("ix_orders_paid_at", "paid_at"),
+        # No máximo um carrinho por usuário: duas primeiras adições simultâneas
+        # não criam dois (app/cart.py trata o conflito)
+        Index(
+            "uq_orders_user_cart", "user_id", unique=True,
+            sqlite_where=text("status = 'CART'"), postgresql_where=text("status = 'CART'"),
+        ),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -17,14 +39,44 @@ class Order(Base):
         default=OrderStatus.CART
     )
 
-    total: Mapped[float] = mapped_column(Float, default=0.0)
+    # Total em centavos (soma inteira dos itens)
+    total_cents: Mapped[int] = mapped_column(Integer, default=0)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
+    # Última escrita no carrinho ou o checkout: a varredura expira por aqui.
+    # Default também no banco: INSERTs fora do ORM (seeds, importações) não a deixam nula
+    last_activity_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, server_default=func.now()
+    )
+
+    # Momento do pagamento (dia dos agregados de vendas); nulo se não foi pago
+    paid_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    # Incrementada a cada alteração do pedido (ETag de GET /orders/{id}).
+    # UPDATEs fora do ORM (carrinho, varredura) incrementam explicitamente
+    version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
     user = relationship("User", back_populates="orders")
     
+    # Ordem de inserção, a mesma do caminho rápido das listagens (app/serialization.py)
     items = relationship(
         "OrderItem",
         back_populates="order",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        order_by="OrderItem.id"
     )
+
+    @property
+    def total(self) -> Decimal:
+        return from_cents(self.total_cents or 0)
+
+    @total.setter
+    def total(self, value):
+        self.total_cents = to_cents(value)
+
+
+@event.listens_for(Order, "before_update")
+def _bump_version(mapper, connection, target):
+    # Expressão SQL: vira "version = version + 1" no próprio UPDATE
+    target.version = Order.version + 1
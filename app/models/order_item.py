@@ -1,11 +1,18 @@
-from sqlalchemy import Integer, ForeignKey, Float
+from decimal import Decimal
+from sqlalchemy import Integer, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.money import from_cents, to_cents
 
 class OrderItem(Base):
 
     __tablename__ = "order_items"
 
+    # Um item por produto em cada pedido (alvo do upsert do carrinho)
+    __table_args__ = (
+        Index("uq_order_items_order_product", "order_id", "product_id", unique=True),
+    )
+
     # Cria o ID, é incrementado automaticamente no DB
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
@@ -16,7 +23,16 @@ class OrderItem(Base):
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
 
     quantity: Mapped[int] = mapped_column(Integer)
-    unit_price: Mapped[float] = mapped_column(Float)
+    # Preço unitário em centavos no momento da compra
+    unit_price_cents: Mapped[int] = mapped_column(Integer)
 
     order = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="items")
+
+    @property
+    def unit_price(self) -> Decimal:
+        return from_cents(self.unit_price_cents)
+
+    @unit_price.setter
+    def unit_price(self, value):
+        self.unit_price_cents = to_cents(value)
@@ -0,0 +1,41 @@
+from sqlalchemy import Integer, String, DateTime, Enum, ForeignKey, Index, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import Optional
+from app.database import Base
+from app.models.order_status import OrderStatus
+
+# Outbox transacional: cada mudança de status de um pedido grava um evento
+# aqui, no mesmo commit da mudança. O despachante (app/outbox.py) entrega os
+# eventos pendentes aos consumidores; nenhum deles precisa consultar orders.
+
+class OutboxEvent(Base):
+
+    __tablename__ = "outbox_events"
+
+    __table_args__ = (
+        # Pendentes em ordem de id (lote do despachante) e limpeza dos entregues
+        Index("ix_outbox_events_dispatched_at_id", "dispatched_at", "id"),
+    )
+
+    # Também é o id do evento para os consumidores (entrega pelo menos uma vez)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    event_type: Mapped[str] = mapped_column(String(50))
+
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"))
+    user_id: Mapped[int] = mapped_column(Integer)
+    status: Mapped[OrderStatus] = mapped_column(Enum(OrderStatus))
+    previous_status: Mapped[OrderStatus] = mapped_column(Enum(OrderStatus))
+    total_cents: Mapped[int] = mapped_column(Integer)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+
+    # Reservado por um despachante até esse momento (vários workers)
+    claimed_until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    # Nulo enquanto não foi entregue a todos os destinos
+    dispatched_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
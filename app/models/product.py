@@ -1,19 +1,36 @@
-from sqlalchemy import Integer, String, Float
+from decimal import Decimal
+from sqlalchemy import Integer, String, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.money import from_cents, to_cents
 
 class Product(Base):
     
     __tablename__ = "products"
 
+    # Índices compostos (chave de ordenação, id) usados pela paginação por cursor
+    __table_args__ = (
+        Index("ix_products_name_id", "name", "id"),
+        Index("ix_products_price_id", "price_cents", "id"),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
-    name: Mapped[str] = mapped_column(String, index=True)
+    name: Mapped[str] = mapped_column(String)
 
     description: Mapped[str] = mapped_column(String)
 
-    price: Mapped[float] = mapped_column(Float)
+    # Preço em centavos; `price` é a visão em Decimal usada pelos schemas
+    price_cents: Mapped[int] = mapped_column(Integer)
 
     stock: Mapped[int] = mapped_column(Integer)
 
     items = relationship("OrderItem", back_populates="product")
+
+    @property
+    def price(self) -> Decimal:
+        return from_cents(self.price_cents)
+
+    @price.setter
+    def price(self, value):
+        self.price_cents = to_cents(value)
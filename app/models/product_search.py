@@ -0,0 +1,62 @@
+from sqlalchemy import DDL, Column, Float, Integer, MetaData, String, Table, event
+from app.models.product import Product
+
+# Índice de busca textual (SQLite FTS5) sobre name e description.
+# É uma tabela de conteúdo externo: o texto fica só em `products` e os
+# triggers mantêm o índice em sincronia em qualquer INSERT/UPDATE/DELETE
+# (inclusive a importação em massa, que não passa pelo ORM).
+
+FTS_TABLE = "products_fts"
+
+# Metadata própria: create_all não deve tentar criar a tabela virtual
+products_fts = Table(
+    FTS_TABLE,
+    MetaData(),
+    Column("rowid", Integer),
+    Column("name", String),
+    Column("description", String),
+    Column("rank", Float),
+    # Coluna oculta com o nome da tabela, usada no operador MATCH
+    Column(FTS_TABLE, String),
+)
+
+FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+for statement in FTS_DDL:
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+# Sem isso a tabela virtual sobreviveria ao drop de `products` com entradas órfãs
+event.listen(
+    Product.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"),
+)
@@ -0,0 +1,36 @@
+from sqlalchemy import Date, ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import date
+from app.database import Base
+
+# Agregados de vendas mantidos de forma incremental (app/analytics.py): cada
+# pagamento soma seus itens às linhas do dia, na mesma transação. Os painéis
+# leem daqui em vez de varrer orders/order_items. Valores em centavos inteiros.
+
+class ProductDailySales(Base):
+
+    __tablename__ = "sales_daily_product"
+
+    __table_args__ = (
+        # Série diária de um produto (GET /analytics/sales/products/{id})
+        Index("ix_sales_daily_product_product_day", "product_id", "day"),
+    )
+
+    # Dia do pagamento (UTC)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), primary_key=True)
+
+    quantity: Mapped[int] = mapped_column(Integer, default=0)
+    revenue_cents: Mapped[int] = mapped_column(Integer, default=0)
+    order_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class DailySales(Base):
+
+    __tablename__ = "sales_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    order_count: Mapped[int] = mapped_column(Integer, default=0)
+    quantity: Mapped[int] = mapped_column(Integer, default=0)
+    revenue_cents: Mapped[int] = mapped_column(Integer, default=0)
@@ -0,0 +1,26 @@
+from sqlalchemy import Integer, ForeignKey, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.database import Base
+
+class StockReservation(Base):
+
+    __tablename__ = "stock_reservations"
+
+    # Busca das reservas vencidas de um produto (liberação no checkout)
+    __table_args__ = (
+        Index("ix_stock_reservations_product_expires", "product_id", "expires_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # Pedido dono da reserva (em PENDING_PAYMENT)
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"), index=True)
+
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
+
+    # Quantidade já descontada de products.stock
+    quantity: Mapped[int] = mapped_column(Integer)
+
+    # Após essa data o estoque pode ser devolvido
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
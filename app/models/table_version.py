@@ -0,0 +1,63 @@
+from sqlalchemy import DDL, Integer, String, event
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+from app.models.product import Product
+
+# Versão por tabela, incrementada pelo próprio banco (triggers) em qualquer
+# INSERT/UPDATE/DELETE, inclusive importação em massa e baixas de estoque que
+# não passam pelo ORM. Alimenta o ETag do catálogo (app/etag.py).
+
+class TableVersion(Base):
+
+    __tablename__ = "table_versions"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+
+    version: Mapped[int] = mapped_column(Integer, default=0)
+
+
+VERSIONED_TABLES = ("products",)
+
+SQLITE_VERSION_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_version_{operation} AFTER {operation.upper()} ON {table} BEGIN
+        UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+    END
+    """
+    for table in VERSIONED_TABLES
+    for operation in ("insert", "update", "delete")
+]
+
+# No PostgreSQL um trigger por comando (não por linha) basta
+POSTGRESQL_VERSION_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+    BEGIN
+        UPDATE table_versions SET version = version + 1 WHERE name = TG_TABLE_NAME;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    *(
+        statement
+        for table in VERSIONED_TABLES
+        for statement in (
+            f"DROP TRIGGER IF EXISTS {table}_version ON {table}",
+            f"CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()",
+        )
+    ),
+]
+
+SEED_VERSIONS_DDL = [
+    f"INSERT INTO table_versions (name, version) VALUES ('{table}', 0)" for table in VERSIONED_TABLES
+]
+
+for statement in SEED_VERSIONS_DDL:
+    event.listen(TableVersion.__table__, "after_create", DDL(statement))
+
+for statement in SQLITE_VERSION_DDL:
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+for statement in POSTGRESQL_VERSION_DDL:
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
@@ -0,0 +1,35 @@
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Annotated, Union
+
+from pydantic import AfterValidator, PlainSerializer
+
+# Dinheiro em ponto fixo: o banco guarda centavos inteiros (colunas *_cents)
+# e a API trabalha com Decimal de duas casas. Somas e totais são sempre
+# feitos em inteiros; nunca em float.
+
+CENT = Decimal("0.01")
+
+
+def to_cents(value: Union[Decimal, float, int, str]) -> int:
+    # float passa por str para 0.1 virar 10 centavos, não 0.1000000000000000055...
+    amount = value if isinstance(value, Decimal) else Decimal(str(value))
+    return int(amount.quantize(CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def from_cents(cents: int) -> Decimal:
+    return (Decimal(cents) / 100).quantize(CENT)
+
+
+def _two_places(value: Decimal) -> Decimal:
+    if value.as_tuple().exponent < -2:
+        raise ValueError("Valores monetários aceitam no máximo duas casas decimais")
+    return value.quantize(CENT)
+
+
+# Tipo dos schemas: Decimal exato na aplicação; no JSON sai como número
+# (o float mais curto que representa o valor, ex.: 0.3 e não "0.30")
+Money = Annotated[
+    Decimal,
+    AfterValidator(_two_places),
+    PlainSerializer(float, return_type=float, when_used="json"),
+]
@@ -0,0 +1,444 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import httpx
+import orjson
+from sqlalchemy import DateTime, case, delete, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_CLAIM_SECONDS,
+    OUTBOX_DISPATCH_INTERVAL_SECONDS,
+    OUTBOX_FILE_PATH,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_QUEUE_SIZE,
+    OUTBOX_RETRY_MAX_SECONDS,
+    OUTBOX_SINKS,
+    OUTBOX_WEBHOOK_TIMEOUT_SECONDS,
+    OUTBOX_WEBHOOK_URL,
+)
+from app.database import SessionLocal
+from app.models.order import Order
+from app.models.order_status import OrderStatus
+from app.models.outbox_event import OutboxEvent
+
+# Outbox transacional dos pedidos. Quem muda o status grava o evento na mesma
+# transação (order_event / record_status_changes), então não existe mudança
+# sem evento nem evento sem mudança. Um despachante em segundo plano reserva
+# lotes de pendentes, entrega a cada destino e só então os marca como
+# entregues: a entrega é "pelo menos uma vez" (os consumidores deduplicam
+# pelo id do evento). Um lote recusado por um destino é dividido até isolar
+# o evento problemático, que volta com espera crescente e, depois de
+# OUTBOX_MAX_ATTEMPTS tentativas, vira dead letter sem segurar os demais.
+# Nenhuma função de escrita aqui faz commit, exceto as do despachante.
+
+outbox_logger = logging.getLogger("app.outbox")
+
+STATUS_CHANGED = "order.status_changed"
+
+
+def order_event(order: Order, previous: OrderStatus) -> OutboxEvent:
+    # Mudança feita pelo ORM: basta db.add() do evento antes do commit
+    return OutboxEvent(
+        event_type=STATUS_CHANGED,
+        order_id=order.id,
+        user_id=order.user_id,
+        status=order.status,
+        previous_status=previous,
+        total_cents=order.total_cents,
+        created_at=datetime.utcnow(),
+    )
+
+
+def record_status_changes(db: Session, order_ids: list[int], previous: OrderStatus):
+    """
+    Eventos de vários pedidos alterados por UPDATE direto (já com o status
+    novo) num único INSERT ... SELECT. Não faz commit.
+    """
+    if not order_ids:
+        return
+    columns = OutboxEvent.__table__.c
+    db.execute(
+        insert(OutboxEvent).from_select(
+            ["event_type", "order_id", "user_id", "status", "previous_status", "total_cents", "created_at"],
+            select(
+                literal(STATUS_CHANGED),
+                Order.id,
+                Order.user_id,
+                Order.status,
+                literal(previous, columns.previous_status.type),
+                Order.total_cents,
+                literal(datetime.utcnow(), DateTime()),
+            )
+            .where(Order.id.in_(order_ids))
+            .order_by(Order.id),
+        )
+    )
+
+
+def event_json(row) -> dict:
+    # Formato entregue aos destinos
+    return {
+        "id": row.id,
+        "type": row.event_type,
+        "order_id": row.order_id,
+        "user_id": row.user_id,
+        "status": row.status.value,
+        "previous_status": row.previous_status.value,
+        "total": row.total_cents / 100,
+        "occurred_at": row.created_at.isoformat(),
+    }
+
+
+def claim_batch(
+    db: Session,
+    limit: int,
+    now: datetime,
+    claim_seconds: int = OUTBOX_CLAIM_SECONDS,
+    max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+) -> list:
+    """
+    Reserva até `limit` eventos pendentes (os mais antigos primeiro) por
+    `claim_seconds`; outro despachante não os pega enquanto a reserva vale.
+    Eventos em espera após uma falha e dead letters ficam de fora.
+    Retorna as linhas em ordem de id. Não faz commit.
+    """
+    pending = (
+        select(OutboxEvent.id)
+        .where(
+            OutboxEvent.dispatched_at.is_(None),
+            OutboxEvent.attempts < max_attempts,
+            or_(OutboxEvent.claimed_until.is_(None), OutboxEvent.claimed_until < now),
+        )
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+        .scalar_subquery()
+    )
+    columns = OutboxEvent.__table__.c
+    rows = db.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_(pending), OutboxEvent.dispatched_at.is_(None))
+        .values(claimed_until=now + timedelta(seconds=claim_seconds))
+        .returning(
+            columns.id, columns.event_type, columns.order_id, columns.user_id,
+            columns.status, columns.previous_status, columns.total_cents, columns.created_at,
+            columns.attempts,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    return sorted(rows, key=lambda row: row.id)
+
+
+def mark_dispatched(db: Session, event_ids: list[int], now: datetime):
+    db.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_(event_ids))
+        .values(dispatched_at=now, claimed_until=None)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def retry_delay(attempts: int, max_seconds: int = OUTBOX_RETRY_MAX_SECONDS) -> int:
+    # Espera antes da próxima tentativa: 2, 4, 8... segundos, até max_seconds
+    return min(2 ** attempts, max_seconds)
+
+
+def mark_failed(db: Session, failed: list[tuple], now: datetime):
+    """
+    Registra a falha de cada (linha, erro): tentativas + 1, último erro e a
+    reserva estendida até a próxima tentativa. Não faz commit.
+    """
+    if not failed:
+        return
+    # UPDATE por chave primária em lote (executemany)
+    db.execute(
+        update(OutboxEvent),
+        [
+            {
+                "id": row.id,
+                "attempts": row.attempts + 1,
+                "last_error": error[:1000],
+                "claimed_until": now + timedelta(seconds=retry_delay(row.attempts + 1)),
+            }
+            for row, error in failed
+        ],
+    )
+
+
+def purge_dispatched(db: Session, older_than: datetime) -> int:
+    # Remove eventos entregues antes de `older_than`. Não faz commit.
+    result = db.execute(
+        delete(OutboxEvent)
+        .where(OutboxEvent.dispatched_at < older_than)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def pending_stats(db: Session, now: datetime, max_attempts: int = OUTBOX_MAX_ATTEMPTS) -> dict:
+    # Atraso do outbox: quantos eventos esperam, há quanto tempo o mais antigo
+    # e quantos desistiram (dead letter)
+    dead = OutboxEvent.attempts >= max_attempts
+    count, oldest, dead_letter = db.execute(
+        select(
+            func.count(case((~dead, 1))),
+            func.min(case((~dead, OutboxEvent.created_at))),
+            func.count(case((dead, 1))),
+        ).where(OutboxEvent.dispatched_at.is_(None))
+    ).one()
+    return {
+        "pending": count,
+        "oldest_pending_age_seconds": (now - oldest).total_seconds() if oldest else 0.0,
+        "dead_letter": dead_letter,
+    }
+
+
+# --- Destinos -------------------------------------------------------------
+# Cada destino recebe o lote inteiro e levanta exceção se não o aceitou:
+# RejectedEvents quando o problema é o conteúdo (repetir igual não adianta),
+# qualquer outra quando o destino está fora do ar.
+
+class RejectedEvents(Exception):
+    pass
+
+
+class QueueSink:
+    """
+    Fila asyncio em processo, para consumidores na própria aplicação
+    (`await outbox_dispatcher.sink("queue").queue.get()`). Cheia, segura o
+    despachante: o atraso aparece nas métricas em vez de crescer a memória.
+    """
+
+    name = "queue"
+
+    def __init__(self, maxsize: int = OUTBOX_QUEUE_SIZE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    async def send(self, events: list[dict]):
+        for event in events:
+            await self.queue.put(event)
+
+    async def close(self):
+        pass
+
+
+class FileSink:
+    # Uma linha NDJSON por evento; fsync antes de o lote contar como entregue
+
+    name = "file"
+
+    def __init__(self, path: str = OUTBOX_FILE_PATH):
+        self.path = path
+
+    def _write(self, events: list[dict]):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(b"".join(orjson.dumps(event) + b"\n" for event in events))
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def send(self, events: list[dict]):
+        await run_in_threadpool(self._write, events)
+
+    async def close(self):
+        pass
+
+
+class WebhookSink:
+    # POST {"events": [...]} por lote; qualquer resposta fora de 2xx é falha,
+    # e 4xx (exceto 408 e 429) é recusa do conteúdo
+
+    name = "webhook"
+
+    def __init__(self, url: str = OUTBOX_WEBHOOK_URL, timeout: float = OUTBOX_WEBHOOK_TIMEOUT_SECONDS):
+        self.url = url
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def send(self, events: list[dict]):
+        # Criado no event loop do despachante, com conexões reaproveitadas
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        response = await self._client.post(
+            self.url,
+            content=orjson.dumps({"events": events}),
+            headers={"Content-Type": "application/json"},
+        )
+        if 400 <= response.status_code < 500 and response.status_code not in (408, 429):
+            raise RejectedEvents(f"HTTP {response.status_code}: {response.text[:200]}")
+        response.raise_for_status()
+
+    async def close(self):
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+
+SINKS = {"queue": QueueSink, "file": FileSink, "webhook": WebhookSink}
+
+
+def build_sinks(names: list[str] = OUTBOX_SINKS) -> list:
+    unknown = sorted(set(names) - set(SINKS))
+    if unknown:
+        raise ValueError(f"Destinos de outbox desconhecidos: {', '.join(unknown)}")
+    return [SINKS[name]() for name in names]
+
+
+class OutboxDispatcher:
+    """
+    Tarefa asyncio iniciada no lifespan: a cada `interval` segundos entrega
+    lotes de eventos pendentes até esvaziar o outbox. O acesso ao banco roda
+    no threadpool; a entrega, no event loop. Com interval <= 0 ou sem
+    destinos não faz nada (os eventos continuam pendentes).
+    """
+
+    def __init__(
+        self,
+        sinks: list,
+        session_factory=SessionLocal,
+        interval: float = OUTBOX_DISPATCH_INTERVAL_SECONDS,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+    ):
+        self.sinks = sinks
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.dispatched = 0
+        # Entregas de evento que falharam (cada tentativa conta)
+        self.failures = 0
+        self.last_duration_seconds = 0.0
+        # Do evento gravado até a entrega, para o evento mais antigo do último lote
+        self.last_lag_seconds = 0.0
+
+    def sink(self, name: str):
+        return next(sink for sink in self.sinks if sink.name == name)
+
+    def _claim(self) -> list:
+        with self.session_factory() as db:
+            rows = claim_batch(db, self.batch_size, datetime.utcnow(), max_attempts=self.max_attempts)
+            db.commit()
+        return rows
+
+    def _finish(self, delivered: list[int], failed: list[tuple]):
+        with self.session_factory() as db:
+            now = datetime.utcnow()
+            if delivered:
+                mark_dispatched(db, delivered, now)
+            mark_failed(db, failed, now)
+            db.commit()
+
+    async def _deliver(self, rows: list) -> tuple[list, list[tuple]]:
+        """
+        Entrega `rows` a todos os destinos. Retorna (entregues, [(linha, erro)]).
+        Se um destino recusa o conteúdo, divide o lote ao meio até isolar os
+        eventos recusados; outra falha (destino fora do ar) falha o lote todo.
+        """
+        try:
+            events = [event_json(row) for row in rows]
+            for sink in self.sinks:
+                await sink.send(events)
+        except RejectedEvents as exc:
+            if len(rows) == 1:
+                return [], [(rows[0], exc)]
+            half = len(rows) // 2
+            left, left_failed = await self._deliver(rows[:half])
+            right, right_failed = await self._deliver(rows[half:])
+            return left + right, left_failed + right_failed
+        except Exception as exc:
+            return [], [(row, exc) for row in rows]
+        return rows, []
+
+    async def run_once(self) -> int:
+        """
+        Reserva, entrega e confirma um lote. Retorna quantos eventos foram
+        entregues; os que falharam voltam mais tarde e o último erro é
+        propagado.
+        """
+        # Sem destinos nada é reservado: marcar como entregue perderia os eventos
+        if not self.sinks:
+            return 0
+        start = time.perf_counter()
+        rows = await run_in_threadpool(self._claim)
+        if not rows:
+            return 0
+
+        delivered, failed = await self._deliver(rows)
+        await run_in_threadpool(
+            self._finish,
+            [row.id for row in delivered],
+            [(row, f"{type(exc).__name__}: {exc}") for row, exc in failed],
+        )
+
+        with self._lock:
+            self.batches += 1
+            self.dispatched += len(delivered)
+            self.failures += len(failed)
+            self.last_duration_seconds = time.perf_counter() - start
+            if delivered:
+                self.last_lag_seconds = (datetime.utcnow() - delivered[0].created_at).total_seconds()
+        if failed:
+            raise failed[-1][1]
+        return len(delivered)
+
+    async def drain(self) -> int:
+        # Lotes seguidos até sobrar menos que um lote cheio
+        total = 0
+        while True:
+            count = await self.run_once()
+            total += count
+            if count < self.batch_size:
+                return total
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.drain()
+            except Exception:
+                # Destino fora do ar: os eventos continuam pendentes e voltam no próximo intervalo
+                outbox_logger.exception("falha ao despachar eventos do outbox")
+
+    def start(self):
+        if self.interval > 0 and self.sinks and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        for sink in self.sinks:
+            await sink.close()
+
+    def stats(self) -> dict:
+        # Contadores em memória e o atraso atual, lido do banco (uma consulta)
+        with self.session_factory() as db:
+            stats = pending_stats(db, datetime.utcnow(), self.max_attempts)
+        stats.update({
+            "batches": self.batches,
+            "dispatched": self.dispatched,
+            "failures": self.failures,
+            "last_duration_seconds": self.last_duration_seconds,
+            "last_lag_seconds": self.last_lag_seconds,
+        })
+        return stats
+
+
+outbox_dispatcher = OutboxDispatcher(build_sinks())
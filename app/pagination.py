@@ -0,0 +1,94 @@
+import base64
+import json
+from typing import Any, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+
+# Paginação por cursor (keyset): em vez de OFFSET, filtramos a partir da
+# última chave vista. Assim a página N custa o mesmo que a primeira página.
+
+
+def encode_cursor(data: dict) -> str:
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key: str = "id") -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        data = None
+
+    if not isinstance(data, dict) or key not in data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido",
+        )
+    return data
+
+
+def keyset_statement(
+    stmt: Select,
+    id_col,
+    limit: int,
+    key_col=None,
+    descending: bool = False,
+    cursor: Optional[dict] = None,
+) -> Select:
+    """
+    Aplica o filtro de keyset, a ordenação (chave, id) e o LIMIT em `stmt`.
+    Busca `limit + 1` linhas para saber se existe uma próxima página.
+    """
+    backwards = bool(cursor) and cursor.get("d") == "prev"
+    # Voltando uma página, percorremos o índice no sentido contrário
+    reverse = descending != backwards
+
+    cols = [id_col] if key_col is None else [key_col, id_col]
+
+    if cursor:
+        values = [cursor["id"]] if key_col is None else [cursor.get("k"), cursor["id"]]
+        left = cols[0] if len(cols) == 1 else tuple_(*cols)
+        right = values[0] if len(values) == 1 else tuple_(*values)
+        stmt = stmt.where(left < right if reverse else left > right)
+
+    order_by = [c.desc() if reverse else c.asc() for c in cols]
+    return stmt.order_by(*order_by).limit(limit + 1)
+
+
+def build_page(
+    rows: list,
+    limit: int,
+    cursor: Optional[dict],
+    key_of,
+    extra: Optional[dict] = None,
+) -> tuple[list, Optional[str], Optional[str]]:
+    """
+    Recebe as linhas retornadas por `keyset_statement` e devolve
+    (itens, next_cursor, prev_cursor). `key_of(row)` retorna (chave, id).
+    """
+    backwards = bool(cursor) and cursor.get("d") == "prev"
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if backwards:
+        rows.reverse()
+
+    def make(row: Any, direction: str) -> str:
+        key, row_id = key_of(row)
+        data = {"k": key, "id": row_id, "d": direction}
+        if extra:
+            data.update(extra)
+        return encode_cursor(data)
+
+    next_cursor = prev_cursor = None
+    if rows:
+        # Avançando: há próxima se sobrou linha; há anterior se viemos de um cursor
+        # Voltando: o inverso
+        if (has_more and not backwards) or backwards:
+            next_cursor = make(rows[-1], "next")
+        if (has_more and backwards) or (cursor and not backwards):
+            prev_cursor = make(rows[0], "prev")
+
+    return rows, next_cursor, prev_cursor
@@ -0,0 +1,261 @@
+import socket
+import sqlite3
+import threading
+import time
+import urllib.parse
+from typing import Optional
+
+from limits.storage import Storage
+from slowapi.util import get_remote_address
+from starlette.requests import Request
+
+from app.auth.dependencies import user_cache
+from app.auth.jwt import decode_access_token
+from app.config import SQLITE_BUSY_TIMEOUT_MS
+
+# Backends de armazenamento do rate limit (slowapi/limits).
+# Basta definir a subclasse de Storage com STORAGE_SCHEME para que
+# RATE_LIMIT_STORAGE_URI aceite o esquema:
+#   memory://                       contadores no processo (padrão)
+#   sqlite:///./data/ratelimit.db   compartilhado entre workers da mesma máquina
+#   resp://host:6379/0              servidor do protocolo Redis (Redis, Valkey...)
+# Os backends sqlite e resp suportam a estratégia fixed-window.
+
+
+def rate_limit_key(request: Request) -> str:
+    """
+    Chave do rate limit: o usuário, quando a requisição traz um token válido,
+    senão o IP. Assim vários usuários atrás do mesmo NAT não dividem o limite.
+    """
+    authorization = request.headers.get("authorization")
+    if authorization and authorization[:7].lower() == "bearer ":
+        token = authorization[7:]
+        # Token já verificado: só uma consulta ao cache, sem decodificar o JWT
+        identity = user_cache.peek(token)
+        if identity is not None:
+            return f"user:{identity.email}"
+        payload = decode_access_token(token)
+        if payload and payload.get("sub"):
+            return f"user:{payload['sub']}"
+    return get_remote_address(request)
+
+
+class SQLiteStorage(Storage):
+    """
+    Contadores numa tabela SQLite (modo WAL). Cada incremento é um único
+    UPSERT atômico, então vários processos podem dividir o mesmo arquivo.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+    # Remove as chaves vencidas a cada N incrementos
+    PURGE_EVERY = 1000
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        self.path = uri[len("sqlite:///"):] or ":memory:"
+        self._local = threading.local()
+        self._writes = 0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self._connection().execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self) -> sqlite3.Connection:
+        # Uma conexão por thread (o sqlite3 não compartilha conexões entre threads)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        now = time.time()
+        conn = self._connection()
+        (count,) = conn.execute(
+            """
+            INSERT INTO rate_limits (key, count, expires_at) VALUES (:key, :amount, :expires_at)
+            ON CONFLICT (key) DO UPDATE SET
+                count = CASE WHEN expires_at <= :now THEN :amount ELSE count + :amount END,
+                expires_at = CASE WHEN expires_at <= :now THEN :expires_at ELSE expires_at END
+            RETURNING count
+            """,
+            {"key": key, "amount": amount, "expires_at": now + expiry, "now": now},
+        ).fetchone()
+
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+        return count
+
+    def get(self, key: str) -> int:
+        row = self._connection().execute(
+            "SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        row = self._connection().execute(
+            "SELECT expires_at FROM rate_limits WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self) -> bool:
+        try:
+            self._connection().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        return self._connection().execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key: str) -> None:
+        self._connection().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+
+class RespError(Exception):
+    pass
+
+
+class RespConnection:
+    """
+    Cliente mínimo do protocolo Redis (RESP2): só o necessário para os
+    contadores, sem depender do pacote `redis`. Comandos enviados juntos
+    (pipeline) custam uma única ida e volta.
+    """
+
+    def __init__(self, host: str, port: int, db: int = 0, timeout: float = 1.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+        if db:
+            self.execute("SELECT", db)
+
+    @staticmethod
+    def encode(*args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def read_reply(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("conexão RESP encerrada")
+        prefix, rest = line[:1], line[1:-2]
+        if prefix == b"+":
+            return rest.decode()
+        if prefix == b"-":
+            # Devolvido (não levantado) para não dessincronizar um pipeline
+            return RespError(rest.decode())
+        if prefix == b":":
+            return int(rest)
+        if prefix == b"$":
+            size = int(rest)
+            return None if size < 0 else self.reader.read(size + 2)[:-2]
+        if prefix == b"*":
+            size = int(rest)
+            return None if size < 0 else [self.read_reply() for _ in range(size)]
+        raise RespError(f"resposta inválida: {line!r}")
+
+    def pipeline(self, *commands: tuple) -> list:
+        self.sock.sendall(b"".join(self.encode(*command) for command in commands))
+        replies = [self.read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def execute(self, *args):
+        return self.pipeline(args)[0]
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+class RespStorage(Storage):
+    """
+    Contadores num servidor do protocolo Redis, compartilhados por todos os
+    workers e réplicas. O incremento roda em MULTI/EXEC: a chave é criada já
+    com validade (SET NX PX) e incrementada na mesma transação.
+    """
+
+    STORAGE_SCHEME = ["resp"]
+    PREFIX = "ratelimit:"
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, timeout: float = 1.0, **options):
+        parsed = urllib.parse.urlparse(uri)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.strip("/") or 0)
+        self.timeout = float(timeout)
+        self._local = threading.local()
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return (OSError, RespError)
+
+    def _pipeline(self, *commands: tuple) -> list:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = RespConnection(self.host, self.port, self.db, self.timeout)
+        try:
+            return conn.pipeline(*commands)
+        except OSError:
+            # Conexão quebrada: descarta, a próxima chamada reconecta
+            self._local.conn = None
+            conn.close()
+            raise
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        key = self.PREFIX + key
+        replies = self._pipeline(
+            ("MULTI",),
+            ("SET", key, 0, "PX", int(expiry * 1000), "NX"),
+            ("INCRBY", key, amount),
+            ("EXEC",),
+        )
+        return replies[-1][1]
+
+    def get(self, key: str) -> int:
+        value = self._pipeline(("GET", self.PREFIX + key))[0]
+        return int(value) if value is not None else 0
+
+    def get_expiry(self, key: str) -> float:
+        ttl_ms = self._pipeline(("PTTL", self.PREFIX + key))[0]
+        return time.time() + max(ttl_ms, 0) / 1000
+
+    def check(self) -> bool:
+        try:
+            return self._pipeline(("PING",))[0] == "PONG"
+        except (OSError, RespError):
+            return False
+
+    def reset(self) -> Optional[int]:
+        # SCAN em páginas em vez de KEYS, que bloqueia o servidor varrendo tudo
+        removed, cursor = 0, b"0"
+        while True:
+            cursor, keys = self._pipeline(("SCAN", cursor, "MATCH", self.PREFIX + "*", "COUNT", 500))[0]
+            if keys:
+                removed += self._pipeline(("DEL", *keys))[0]
+            if cursor == b"0":
+                return removed
+
+    def clear(self, key: str) -> None:
+        self._pipeline(("DEL", self.PREFIX + key))
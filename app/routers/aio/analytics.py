@@ -0,0 +1,50 @@
+# Versão assíncrona de app/routers/analytics.py (ativada com DB_ASYNC=true)
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from app.analytics import (
+    daily_sales_statement,
+    product_sales_statement,
+    sales_row,
+    top_products_statement,
+)
+from app.auth.dependencies import get_current_admin_user_async
+from app.database import get_async_db
+from app.routers.analytics import SalesPeriod, build_daily_report
+from app.schemas.analytics import DailySalesReport, DailySalesRow, ProductSalesRow, TopProductsSort
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+# 1. VENDAS POR DIA (Admin)
+@router.get("/sales/daily", response_model=DailySalesReport)
+async def get_daily_sales(
+    period: SalesPeriod = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    admin = Depends(get_current_admin_user_async)
+):
+    rows = (await db.execute(daily_sales_statement(period.start, period.end))).all()
+    return build_daily_report(rows)
+
+# 2. PRODUTOS MAIS VENDIDOS NO PERÍODO (Admin)
+@router.get("/sales/top-products", response_model=List[ProductSalesRow])
+async def get_top_products(
+    period: SalesPeriod = Depends(),
+    by: TopProductsSort = TopProductsSort.REVENUE,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    admin = Depends(get_current_admin_user_async)
+):
+    stmt = top_products_statement(period.start, period.end, by.value, limit)
+    return [sales_row(row) for row in await db.execute(stmt)]
+
+# 3. VENDAS DIÁRIAS DE UM PRODUTO (Admin)
+@router.get("/sales/products/{product_id}", response_model=List[DailySalesRow])
+async def get_product_sales(
+    product_id: int,
+    period: SalesPeriod = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    admin = Depends(get_current_admin_user_async)
+):
+    stmt = product_sales_statement(product_id, period.start, period.end)
+    return [sales_row(row) for row in await db.execute(stmt)]
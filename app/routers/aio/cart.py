@@ -0,0 +1,48 @@
+# Versão assíncrona de app/routers/cart.py (ativada com DB_ASYNC=true)
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cart import apply_ops, build_cart_view, cart_view_statement
+from app.database import get_async_db
+from app.auth.dependencies import get_current_user_async
+from app.schemas.cart import CartBatch, CartItemCreate, CartOp, CartOpType, CartView
+
+router = APIRouter(prefix="/cart", tags=["Cart"])
+
+# 1. VER O CARRINHO - carrinho, itens e nomes numa única consulta
+@router.get("/", response_model=CartView)
+async def get_cart(
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_async)
+):
+    return build_cart_view((await db.execute(cart_view_statement(current_user.id))).all())
+
+@router.post("/add")
+async def add_to_cart(
+    item_in: CartItemCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_async)
+):
+    # O agregado do carrinho é síncrono; roda na conexão da AsyncSession
+    op = CartOp(op=CartOpType.ADD, product_id=item_in.product_id, quantity=item_in.quantity)
+    try:
+        products = await db.run_sync(apply_ops, current_user.id, [op])
+    except HTTPException:
+        await db.rollback()  # nada do lote é aplicado
+        raise
+    await db.commit()
+    return {"message": f"Produto {products[item_in.product_id].name} adicionado ao carrinho"}
+
+# 2. OPERAÇÕES EM LOTE (add/set/remove) - uma transação, uma requisição
+@router.post("/batch", response_model=CartView)
+async def update_cart(
+    batch: CartBatch,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_async)
+):
+    try:
+        await db.run_sync(apply_ops, current_user.id, batch.ops)
+    except HTTPException:
+        await db.rollback()  # nada do lote é aplicado
+        raise
+    await db.commit()
+    return build_cart_view((await db.execute(cart_view_statement(current_user.id))).all())
@@ -0,0 +1,64 @@
+# Versão assíncrona de app/routers/checkout.py (ativada com DB_ASYNC=true)
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.cache import invalidate_products
+from app.database import get_async_db
+from app.models.order import Order
+from app.models.order_status import OrderStatus
+from app.outbox import order_event
+from app.auth.dependencies import get_current_user_async
+from app.stock import failures_detail, release_expired, reserve_order
+
+router = APIRouter(prefix="/checkout", tags=["Checkout"])
+
+@router.post("/")
+async def checkout(
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_async)
+):
+    # 1. Busca o carrinho ativo (status CART) já com os itens
+    order = await db.scalar(
+        select(Order).options(selectinload(Order.items)).where(
+            Order.user_id == current_user.id,
+            Order.status == OrderStatus.CART
+        )
+    )
+
+    if not order or not order.items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Carrinho vazio ou não encontrado"
+        )
+
+    # 2. Reserva de Estoque (o motor de reservas é síncrono; run_sync o executa
+    # na mesma conexão assíncrona, sem bloquear o event loop)
+    product_ids = [item.product_id for item in order.items]
+    released = await db.run_sync(release_expired, product_ids)
+
+    failures = await db.run_sync(reserve_order, order)
+    if failures:
+        await db.commit()  # persiste apenas a liberação das reservas vencidas
+        invalidate_products(*released)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=failures_detail("Estoque insuficiente", failures)
+        )
+
+    # 3. Finalizar checkout
+    order.status = OrderStatus.PENDING_PAYMENT
+    # O pedido nasce no checkout: o prazo de pagamento (sweeper) conta daqui
+    order.created_at = order.last_activity_at = datetime.utcnow()
+    db.add(order_event(order, OrderStatus.CART))
+
+    await db.commit()
+    invalidate_products(*product_ids)
+
+    return {
+        "message": "Checkout realizado com sucesso! Aguardando pagamento.",
+        "order_id": order.id,
+        "total": order.total,
+        "status": order.status
+    }
@@ -0,0 +1,121 @@
+# Versão assíncrona de app/routers/orders.py (ativada com DB_ASYNC=true)
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import Optional
+
+from app.cache import invalidate_products
+from app.database import get_async_db
+from app.etag import ORDER_CACHE_CONTROL, etag_matches, not_modified, order_etag, set_cache_headers
+from app.models.order import Order
+from app.models.order_status import OrderStatus
+from app.auth.dependencies import get_current_user_async, get_current_admin_user_async
+from app.routers.orders import (
+    OrderFilters,
+    build_orders_page,
+    cancel_statement,
+    export_all_orders_admin,
+    export_my_orders,
+    order_version_statement,
+    orders_page_statement,
+)
+from app.schemas.order import OrderPage, OrderResponse
+from app.serialization import FastJSONResponse, order_items_statement, render_orders_page
+from app.outbox import order_event
+from app.stock import release_order
+
+router = APIRouter(prefix="/orders", tags=["Orders"])
+
+# Em async não há lazy load implícito: os itens vêm sempre via selectinload
+orders_with_items = select(Order).options(selectinload(Order.items))
+
+# 1. LISTAR PEDIDOS DO PRÓPRIO UTILIZADOR (Cliente)
+@router.get("/me", response_model=OrderPage)
+async def get_my_orders(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    filters: OrderFilters = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_async)
+):
+    stmt, cursor_data = orders_page_statement(filters, limit, cursor, user_id=current_user.id)
+    rows, next_cursor, prev_cursor = build_orders_page((await db.execute(stmt)).all(), limit, cursor_data)
+    items = (await db.execute(order_items_statement([row.id for row in rows]))).all() if rows else []
+    return FastJSONResponse(render_orders_page(rows, items, next_cursor, prev_cursor))
+
+# Exportações NDJSON: mesma implementação do modo síncrono
+# (registradas antes de /{order_id} para não colidir com o parâmetro)
+router.add_api_route("/me/export", export_my_orders, methods=["GET"])
+router.add_api_route("/admin/export", export_all_orders_admin, methods=["GET"])
+
+# 2. DETALHAR UM PEDIDO ESPECÍFICO (Cliente)
+@router.get("/{order_id}", response_model=OrderResponse)
+async def get_order_detail(
+    order_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_async)
+):
+    if request.headers.get("if-none-match"):
+        version = await db.scalar(order_version_statement(order_id, current_user.id))
+        if version is None:
+            raise HTTPException(status_code=404, detail="Pedido não encontrado")
+        etag = order_etag(order_id, version)
+        if etag_matches(request, etag):
+            return not_modified(etag, ORDER_CACHE_CONTROL)
+
+    order = await db.scalar(
+        orders_with_items.where(Order.id == order_id, Order.user_id == current_user.id)
+    )
+
+    if not order:
+        raise HTTPException(status_code=404, detail="Pedido não encontrado")
+    set_cache_headers(response, order_etag(order.id, order.version), ORDER_CACHE_CONTROL)
+    return order
+
+# 3. CANCELAR UM PEDIDO (Cliente) - devolve o stock reservado no checkout
+@router.post("/{order_id}/cancel", response_model=OrderResponse)
+async def cancel_order(
+    order_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_async)
+):
+    order = await db.scalar(
+        orders_with_items.where(
+            Order.id == order_id,
+            Order.user_id == current_user.id,
+            Order.status.in_([OrderStatus.CART, OrderStatus.PENDING_PAYMENT])
+        )
+    )
+
+    if not order:
+        raise HTTPException(status_code=404, detail="Pedido cancelável não encontrado")
+
+    # Trava o cancelamento antes de devolver o stock
+    previous = order.status
+    if await db.scalar(cancel_statement(order.id, previous)) is None:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="O status do pedido mudou; tente novamente")
+
+    product_ids = await db.run_sync(release_order, order.id)
+    db.add(order_event(order, previous))
+    await db.commit()
+    invalidate_products(*product_ids)
+    return order
+
+# 4. LISTAR TODOS OS PEDIDOS (Admin Only)
+@router.get("/admin/all", response_model=OrderPage)
+async def get_all_orders_admin(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    user_id: Optional[int] = None,
+    filters: OrderFilters = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    admin = Depends(get_current_admin_user_async)
+):
+    stmt, cursor_data = orders_page_statement(filters, limit, cursor, user_id=user_id)
+    rows, next_cursor, prev_cursor = build_orders_page((await db.execute(stmt)).all(), limit, cursor_data)
+    items = (await db.execute(order_items_statement([row.id for row in rows]))).all() if rows else []
+    return FastJSONResponse(render_orders_page(rows, items, next_cursor, prev_cursor))
@@ -0,0 +1,72 @@
+# Versão assíncrona de app/routers/payments.py (ativada com DB_ASYNC=true)
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+import uuid
+from app.analytics import record_paid
+from app.cache import invalidate_products
+from app.database import get_async_db
+from app.models.order import Order
+from app.models.order_status import OrderStatus
+from app.outbox import order_event
+from app.auth.dependencies import get_current_admin_user_async, get_current_user_async
+from app.schemas.payment import PaymentBatch, SettlementReport
+from app.settlement import claim_pending, revert_claims, settle
+from app.stock import confirm_order, failures_detail
+
+router = APIRouter(prefix="/payments", tags=["Payments"])
+
+# PAGAMENTOS EM LOTE (Admin/serviço) - mesma liquidação do modo síncrono
+@router.post("/batch", response_model=SettlementReport)
+async def settle_payments(
+    batch: PaymentBatch,
+    db: AsyncSession = Depends(get_async_db),
+    admin = Depends(get_current_admin_user_async)
+):
+    return await db.run_sync(settle, batch.order_ids)
+
+@router.post("/{order_id}")
+async def process_payment(
+    order_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_async)
+):
+    # 1. Travar o pedido pendente do utilizador (UPDATE condicional)
+    if not await db.run_sync(claim_pending, [order_id], Order.user_id == current_user.id):
+        await db.rollback()  # o UPDATE sem linhas já abriu a transação de escrita
+        raise HTTPException(
+            status_code=404,
+            detail="Pedido pendente não encontrado."
+        )
+    order = await db.scalar(
+        select(Order).options(selectinload(Order.items)).where(Order.id == order_id)
+        .execution_options(populate_existing=True)
+    )
+
+    # 2. Consome a reserva de stock feita no checkout
+    product_ids = [item.product_id for item in order.items]
+    failures = await db.run_sync(confirm_order, order)
+    if failures:
+        await db.run_sync(revert_claims, [order.id])
+        await db.commit()  # a reserva vencida já foi devolvida ao stock
+        invalidate_products(*product_ids)
+        raise HTTPException(
+            status_code=400,
+            detail=failures_detail("Infelizmente alguns produtos esgotaram durante o processo.", failures)
+        )
+
+    # 3. Registrar o evento e somar a venda aos agregados (no mesmo commit
+    #    que marcou o pedido como pago)
+    db.add(order_event(order, OrderStatus.PENDING_PAYMENT))
+    await db.run_sync(record_paid, [order.id])
+
+    await db.commit()
+    invalidate_products(*product_ids)
+
+    return {
+        "message": "Pagamento confirmado com sucesso!",
+        "order_id": order_id,
+        "payment_reference": str(uuid.uuid4()), # ID fake de transação
+        "new_status": OrderStatus.PAID
+    }
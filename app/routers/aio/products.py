@@ -0,0 +1,142 @@
+# Versão assíncrona de app/routers/products.py (ativada com DB_ASYNC=true)
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from decimal import Decimal
+from typing import Optional
+
+from app.cache import get_product_snapshot_async, invalidate_products, product_page_cache
+from app.database import get_async_db
+from app.etag import (
+    CATALOG_CACHE_CONTROL,
+    catalog_etag,
+    catalog_version_statement,
+    etag_matches,
+    not_modified,
+    set_cache_headers,
+)
+from app.models.product import Product
+from app.auth.dependencies import get_current_admin_user_async
+from app.routers.products import (
+    build_products_page,
+    export_products,
+    import_products,
+    products_page_statement,
+    search_products,
+)
+from app.serialization import FastJSONResponse, render_products_page
+from app.schemas.product import (
+    ImportReport,
+    ProductCreate,
+    ProductPage,
+    ProductResponse,
+    ProductSort,
+    ProductUpdate,
+)
+
+router = APIRouter(prefix="/products", tags=["Products"])
+
+# CRIAR PRODUTO (Apenas Admin)
+@router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
+async def create_product(
+    product_in: ProductCreate,
+    db: AsyncSession = Depends(get_async_db),
+    admin=Depends(get_current_admin_user_async),
+):
+    new_product = Product(**product_in.model_dump())
+    db.add(new_product)
+    await db.commit()
+    invalidate_products(new_product.id)
+    return new_product
+
+# LISTAR PRODUTOS (Público) - paginação por cursor, filtros e ordenação
+@router.get("/", response_model=ProductPage)
+async def list_products(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: ProductSort = ProductSort.ID,
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    name: Optional[str] = Query(None, min_length=1, description="Prefixo do nome"),
+    in_stock: Optional[bool] = None,
+):
+    version = await db.scalar(catalog_version_statement())
+    etag = catalog_etag(version)
+    if etag_matches(request, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
+
+    # O cache guarda a página já serializada (bytes prontos para a resposta)
+    cache_key = (version, sort.value, limit, cursor, min_price, max_price, name, in_stock)
+    body = product_page_cache.get(cache_key)
+    if body is None:
+        generation = product_page_cache.generation
+        stmt, cursor_data = products_page_statement(
+            sort, limit, cursor, min_price, max_price, name, in_stock
+        )
+        body = render_products_page(
+            *build_products_page((await db.execute(stmt)).all(), sort, limit, cursor_data)
+        )
+        product_page_cache.set(cache_key, body, generation=generation)
+
+    response = FastJSONResponse(body)
+    set_cache_headers(response, etag, CATALOG_CACHE_CONTROL)
+    return response
+
+# Busca e importação/exportação em massa: mesma implementação do modo síncrono
+# (registradas antes de /{product_id} para não colidir com o parâmetro)
+router.add_api_route("/search", search_products, methods=["GET"], response_model=ProductPage)
+router.add_api_route("/import", import_products, methods=["POST"], response_model=ImportReport)
+router.add_api_route("/export", export_products, methods=["GET"])
+
+# DETALHAR PRODUTO (Público) - servido pelo cache do catálogo
+@router.get("/{product_id}", response_model=ProductResponse)
+async def get_product(product_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    version = await db.scalar(catalog_version_statement())
+    etag = catalog_etag(version)
+    if etag_matches(request, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
+
+    product = await get_product_snapshot_async(db, product_id, version)
+    if not product:
+        raise HTTPException(status_code=404, detail="Produto não encontrado")
+    set_cache_headers(response, etag, CATALOG_CACHE_CONTROL)
+    return product
+
+# ATUALIZAR PRODUTO (Apenas Admin)
+@router.patch("/{product_id}", response_model=ProductResponse)
+async def update_product(
+    product_id: int,
+    product_in: ProductUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    admin=Depends(get_current_admin_user_async),
+):
+    product = await db.get(Product, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Produto não encontrado")
+
+    # Atualiza apenas os campos enviados
+    update_data = product_in.model_dump(exclude_unset=True)
+    for key, value in update_data.items():
+        setattr(product, key, value)
+
+    await db.commit()
+    await db.refresh(product)
+    invalidate_products(product.id)
+    return product
+
+# DELETAR PRODUTO (Apenas Admin)
+@router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_product(
+    product_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    admin=Depends(get_current_admin_user_async),
+):
+    product = await db.get(Product, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Produto não encontrado")
+
+    await db.delete(product)
+    await db.commit()
+    invalidate_products(product_id)
+    return None
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import List, Optional
+
+from app.analytics import (
+    daily_sales_statement,
+    product_sales_statement,
+    sales_row,
+    top_products_statement,
+)
+from app.auth.dependencies import get_current_admin_user
+from app.database import get_db
+from app.money import from_cents
+from app.schemas.analytics import DailySalesReport, DailySalesRow, ProductSalesRow, TopProductsSort
+
+# Painéis de vendas: leem só as tabelas de agregados (app/analytics.py), nunca
+# orders/order_items, então o custo depende do número de dias, não de pedidos
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+
+class SalesPeriod:
+    # Intervalo de dias (inclusivo) aceito pelas rotas de vendas
+    def __init__(
+        self,
+        start: Optional[date] = Query(None, description="Primeiro dia (AAAA-MM-DD)"),
+        end: Optional[date] = Query(None, description="Último dia (AAAA-MM-DD)"),
+    ):
+        if start is not None and end is not None and start > end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="O início do período é posterior ao fim",
+            )
+        self.start = start
+        self.end = end
+
+
+def build_daily_report(rows: list) -> dict:
+    # Totais do período somados em centavos inteiros
+    return {
+        "days": [sales_row(row) for row in rows],
+        "total": {
+            "orders": sum(row.order_count for row in rows),
+            "quantity": sum(row.quantity for row in rows),
+            "revenue": from_cents(sum(row.revenue_cents for row in rows)),
+        },
+    }
+
+# 1. VENDAS POR DIA (Admin)
+@router.get("/sales/daily", response_model=DailySalesReport)
+def get_daily_sales(
+    period: SalesPeriod = Depends(),
+    db: Session = Depends(get_db),
+    admin = Depends(get_current_admin_user)
+):
+    return build_daily_report(db.execute(daily_sales_statement(period.start, period.end)).all())
+
+# 2. PRODUTOS MAIS VENDIDOS NO PERÍODO (Admin)
+@router.get("/sales/top-products", response_model=List[ProductSalesRow])
+def get_top_products(
+    period: SalesPeriod = Depends(),
+    by: TopProductsSort = TopProductsSort.REVENUE,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    admin = Depends(get_current_admin_user)
+):
+    stmt = top_products_statement(period.start, period.end, by.value, limit)
+    return [sales_row(row) for row in db.execute(stmt)]
+
+# 3. VENDAS DIÁRIAS DE UM PRODUTO (Admin)
+@router.get("/sales/products/{product_id}", response_model=List[DailySalesRow])
+def get_product_sales(
+    product_id: int,
+    period: SalesPeriod = Depends(),
+    db: Session = Depends(get_db),
+    admin = Depends(get_current_admin_user)
+):
+    stmt = product_sales_statement(product_id, period.start, period.end)
+    return [sales_row(row) for row in db.execute(stmt)]
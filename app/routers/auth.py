@@ -1,18 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.database import get_db
 from app.models.user import User
-from app.auth.security import verify_password, get_password_hash
+from app.auth.security import password_hasher
 from app.auth.jwt import create_access_token
 from app.schemas.user import UserCreate, UserResponse 
-from app.utils import limiter 
+from app.config import RATE_LIMIT_LOGIN, RATE_LIMIT_REGISTER
+from app.utils import limiter
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
+# As rotas são async para que o bcrypt rode no pool dedicado (password_hasher)
+# sem ocupar um slot do threadpool; o acesso ao banco continua síncrono.
+
+
+def find_user(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+
+def save_user(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-@limiter.limit("3/hour") # Limite rigoroso para evitar criação de contas em massa
-def register(
+@limiter.limit(RATE_LIMIT_REGISTER) # Limite rigoroso para evitar criação de contas em massa
+async def register(
     request: Request, 
     user_in: UserCreate, 
     db: Session = Depends(get_db)
@@ -21,7 +37,7 @@ def register(
     Cria um novo usuário com senha criptografada.
     """
     # 1. Verifica se o e-mail já está em uso
-    user_exists = db.query(User).filter(User.email == user_in.email).first()
+    user_exists = await run_in_threadpool(find_user, db, user_in.email)
     if user_exists:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -31,17 +47,14 @@ def register(
     # 2. Cria o novo usuário
     new_user = User(
         email=user_in.email,
-        hashed_password=get_password_hash(user_in.password)
+        hashed_password=await password_hasher.hash(user_in.password)
     )
     
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    return await run_in_threadpool(save_user, db, new_user)
 
 @router.post("/login")
-@limiter.limit("5/minute") # Limite para evitar ataques de força bruta
-def login(
+@limiter.limit(RATE_LIMIT_LOGIN) # Limite para evitar ataques de força bruta
+async def login(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
@@ -50,17 +63,25 @@ def login(
     Gera o token de acesso (JWT) para o usuário.
     """
     # Busca o usuário pelo e-mail
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await run_in_threadpool(find_user, db, form_data.username)
 
     # Valida se o usuário existe e se a senha está correta
-    if not user or not verify_password(
-        form_data.password, user.hashed_password
-    ):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update(
+            form_data.password, user.hashed_password
+        )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha inválidos",
         )
 
+    # Hash gerado com outro custo (BCRYPT_ROUNDS mudou): regrava com o atual
+    if new_hash:
+        user.hashed_password = new_hash
+        await run_in_threadpool(save_user, db, user)
+
     # Cria o token JWT
     access_token = create_access_token(
         data={"sub": user.email}
@@ -1,10 +1,13 @@
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
+from app.cache import invalidate_products
 from app.database import get_db
 from app.models.order import Order
-from app.models.product import Product
 from app.models.order_status import OrderStatus
+from app.outbox import order_event
 from app.auth.dependencies import get_current_user
+from app.stock import failures_detail, release_expired, reserve_order
 
 router = APIRouter(prefix="/checkout", tags=["Checkout"])
 
@@ -13,8 +16,8 @@ def checkout(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    # 1. Busca o carrinho ativo (status CART)
-    order = db.query(Order).filter(
+    # 1. Busca o carrinho ativo (status CART) já com os itens (1 query extra, não N)
+    order = db.query(Order).options(selectinload(Order.items)).filter(
         Order.user_id == current_user.id,
         Order.status == OrderStatus.CART
     ).first()
@@ -25,21 +28,31 @@ def checkout(
             detail="Carrinho vazio ou não encontrado"
         )
 
-    # 2. Validação de Estoque (Safety Check)
-    for item in order.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product.stock < item.quantity:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Estoque insuficiente para o produto: {product.name}"
-            )
+    # 2. Reserva de Estoque
+    # Antes, devolve ao estoque as reservas vencidas desses mesmos produtos
+    product_ids = [item.product_id for item in order.items]
+    released = release_expired(db, product_ids)
+
+    # Baixa atômica (UPDATE ... WHERE stock >= :q): tudo ou nada
+    failures = reserve_order(db, order)
+    if failures:
+        db.commit()  # persiste apenas a liberação das reservas vencidas
+        invalidate_products(*released)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=failures_detail("Estoque insuficiente", failures)
+        )
 
     # 3. Finalizar checkout
     # Alteramos o status para aguardar o pagamento (Fase 7)
     order.status = OrderStatus.PENDING_PAYMENT
-    
+    # O pedido nasce no checkout: o prazo de pagamento (sweeper) conta daqui
+    order.created_at = order.last_activity_at = datetime.utcnow()
+    db.add(order_event(order, OrderStatus.CART))
+
     db.commit()
     db.refresh(order)
+    invalidate_products(*product_ids)
 
     return {
         "message": "Checkout realizado com sucesso! Aguardando pagamento.",
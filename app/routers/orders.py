@@ -1,30 +1,145 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, selectinload
+from datetime import datetime
+from typing import Iterator, Optional
 
+from app.cache import invalidate_products
 from app.database import get_db
+from app.etag import ORDER_CACHE_CONTROL, etag_matches, not_modified, order_etag, set_cache_headers
 from app.models.order import Order
+from app.models.order_status import OrderStatus
+from app.pagination import build_page, decode_cursor, keyset_statement
+from app.outbox import order_event
+from app.stock import release_order
 from app.auth.dependencies import get_current_user, get_current_admin_user
-from app.schemas.order import OrderResponse
+from app.schemas.order import OrderPage, OrderResponse
+from app.serialization import ORDER_COLUMNS, FastJSONResponse, order_items_statement, render_orders_page
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
+
+class OrderFilters:
+    # Filtros comuns às listagens e exportações de pedidos
+    def __init__(
+        self,
+        status: Optional[OrderStatus] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ):
+        self.status = status
+        self.created_from = created_from
+        self.created_to = created_to
+
+
+def filter_orders(stmt, filters: OrderFilters, user_id: Optional[int] = None):
+    if user_id is not None:
+        stmt = stmt.where(Order.user_id == user_id)
+    if filters.status is not None:
+        stmt = stmt.where(Order.status == filters.status)
+    if filters.created_from is not None:
+        stmt = stmt.where(Order.created_at >= filters.created_from)
+    if filters.created_to is not None:
+        stmt = stmt.where(Order.created_at < filters.created_to)
+    return stmt
+
+
+def orders_statement(filters: OrderFilters, user_id: Optional[int] = None):
+    # Itens sempre via selectinload: 1 query para a página inteira, não 1 por pedido
+    return filter_orders(select(Order).options(selectinload(Order.items)), filters, user_id)
+
+
+def orders_page_statement(
+    filters: OrderFilters,
+    limit: int,
+    cursor: Optional[str],
+    user_id: Optional[int] = None,
+):
+    """
+    Página de pedidos por cursor, do mais recente para o mais antigo (id desc),
+    só com as colunas da resposta (os itens vêm de order_items_statement).
+    Retorna (statement, cursor decodificado).
+    """
+    cursor_data = decode_cursor(cursor) if cursor else None
+    stmt = keyset_statement(
+        filter_orders(select(*ORDER_COLUMNS), filters, user_id),
+        Order.id,
+        limit,
+        descending=True,
+        cursor=cursor_data,
+    )
+    return stmt, cursor_data
+
+
+def order_version_statement(order_id: int, user_id: int):
+    return select(Order.version).where(Order.id == order_id, Order.user_id == user_id)
+
+
+def build_orders_page(rows: list, limit: int, cursor_data) -> tuple[list, Optional[str], Optional[str]]:
+    # (linhas da página, next_cursor, prev_cursor)
+    return build_page(rows, limit, cursor_data, key_of=lambda row: (None, row.id))
+
+
+def export_orders_ndjson(db: Session, stmt, batch_size: int = 500) -> Iterator[str]:
+    # Lê em lotes por id e libera cada lote da sessão antes do próximo
+    last_id = None
+    while True:
+        batch_stmt = stmt.order_by(Order.id.desc()).limit(batch_size)
+        if last_id is not None:
+            batch_stmt = batch_stmt.where(Order.id < last_id)
+        orders = db.scalars(batch_stmt).all()
+        if not orders:
+            return
+        yield "".join(
+            OrderResponse.model_validate(order).model_dump_json() + "\n" for order in orders
+        )
+        last_id = orders[-1].id
+        db.expunge_all()
+
+
 # 1. LISTAR PEDIDOS DO PRÓPRIO UTILIZADOR (Cliente)
-@router.get("/me", response_model=List[OrderResponse])
+@router.get("/me", response_model=OrderPage)
 def get_my_orders(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    filters: OrderFilters = Depends(),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    stmt, cursor_data = orders_page_statement(filters, limit, cursor, user_id=current_user.id)
+    rows, next_cursor, prev_cursor = build_orders_page(db.execute(stmt).all(), limit, cursor_data)
+    items = db.execute(order_items_statement([row.id for row in rows])).all() if rows else []
+    return FastJSONResponse(render_orders_page(rows, items, next_cursor, prev_cursor))
+
+# 1.1 EXPORTAR PEDIDOS DO PRÓPRIO UTILIZADOR (Cliente) - NDJSON em streaming
+@router.get("/me/export")
+def export_my_orders(
+    filters: OrderFilters = Depends(),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    # Retorna todos os pedidos, exceto o carrinho atual, ou todos se preferires
-    return db.query(Order).filter(Order.user_id == current_user.id).all()
+    stmt = orders_statement(filters, user_id=current_user.id)
+    return StreamingResponse(export_orders_ndjson(db, stmt), media_type="application/x-ndjson")
 
 # 2. DETALHAR UM PEDIDO ESPECÍFICO (Cliente)
 @router.get("/{order_id}", response_model=OrderResponse)
 def get_order_detail(
     order_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
+    # GET condicional: só a versão do pedido (chave primária), sem itens nem serialização
+    if request.headers.get("if-none-match"):
+        version = db.scalar(order_version_statement(order_id, current_user.id))
+        if version is None:
+            raise HTTPException(status_code=404, detail="Pedido não encontrado")
+        etag = order_etag(order_id, version)
+        if etag_matches(request, etag):
+            return not_modified(etag, ORDER_CACHE_CONTROL)
+
     order = db.query(Order).filter(
         Order.id == order_id, 
         Order.user_id == current_user.id
@@ -32,12 +147,72 @@ def get_order_detail(
     
     if not order:
         raise HTTPException(status_code=404, detail="Pedido não encontrado")
+    set_cache_headers(response, order_etag(order.id, order.version), ORDER_CACHE_CONTROL)
     return order
 
-# 3. LISTAR TODOS OS PEDIDOS (Admin Only)
-@router.get("/admin/all", response_model=List[OrderResponse])
+def cancel_statement(order_id: int, previous: OrderStatus):
+    """
+    Cancela só se o pedido ainda estiver no status lido antes (UPDATE
+    condicional): um pagamento que confirmou nesse meio-tempo não é
+    sobrescrito. A sessão atualiza o pedido em memória (synchronize_session).
+    """
+    return (
+        update(Order)
+        .where(Order.id == order_id, Order.status == previous)
+        .values(status=OrderStatus.CANCELLED, version=Order.version + 1)
+        .returning(Order.id)
+    )
+
+# 3. CANCELAR UM PEDIDO (Cliente) - devolve o stock reservado no checkout
+@router.post("/{order_id}/cancel", response_model=OrderResponse)
+def cancel_order(
+    order_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    order = db.query(Order).filter(
+        Order.id == order_id,
+        Order.user_id == current_user.id,
+        Order.status.in_([OrderStatus.CART, OrderStatus.PENDING_PAYMENT])
+    ).first()
+
+    if not order:
+        raise HTTPException(status_code=404, detail="Pedido cancelável não encontrado")
+
+    # Trava o cancelamento antes de devolver o stock
+    previous = order.status
+    if db.scalar(cancel_statement(order.id, previous)) is None:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="O status do pedido mudou; tente novamente")
+
+    product_ids = release_order(db, order.id)
+    db.add(order_event(order, previous))
+    db.commit()
+    invalidate_products(*product_ids)
+    return order
+
+# 4. LISTAR TODOS OS PEDIDOS (Admin Only)
+@router.get("/admin/all", response_model=OrderPage)
 def get_all_orders_admin(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    user_id: Optional[int] = None,
+    filters: OrderFilters = Depends(),
+    db: Session = Depends(get_db),
+    admin = Depends(get_current_admin_user)
+):
+    stmt, cursor_data = orders_page_statement(filters, limit, cursor, user_id=user_id)
+    rows, next_cursor, prev_cursor = build_orders_page(db.execute(stmt).all(), limit, cursor_data)
+    items = db.execute(order_items_statement([row.id for row in rows])).all() if rows else []
+    return FastJSONResponse(render_orders_page(rows, items, next_cursor, prev_cursor))
+
+# 4.1 EXPORTAR TODOS OS PEDIDOS (Admin Only) - NDJSON em streaming
+@router.get("/admin/export")
+def export_all_orders_admin(
+    user_id: Optional[int] = None,
+    filters: OrderFilters = Depends(),
     db: Session = Depends(get_db),
     admin = Depends(get_current_admin_user)
 ):
-    return db.query(Order).all()
\ No newline at end of file
+    stmt = orders_statement(filters, user_id=user_id)
+    return StreamingResponse(export_orders_ndjson(db, stmt), media_type="application/x-ndjson")
@@ -1,58 +1,74 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from datetime import datetime
+from sqlalchemy.orm import Session, selectinload
 import uuid
+from app.analytics import record_paid
+from app.cache import invalidate_products
 from app.database import get_db
 from app.models.order import Order
-from app.models.product import Product
 from app.models.order_status import OrderStatus
-from app.auth.dependencies import get_current_user
+from app.outbox import order_event
+from app.auth.dependencies import get_current_admin_user, get_current_user
+from app.schemas.payment import PaymentBatch, SettlementReport
+from app.settlement import claim_pending, revert_claims, settle
+from app.stock import confirm_order, failures_detail
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
+# PAGAMENTOS EM LOTE (Admin/serviço) - confirmações do provedor, resultado por pedido
+# (registrada antes de /{order_id} para não colidir com o parâmetro)
+@router.post("/batch", response_model=SettlementReport)
+def settle_payments(
+    batch: PaymentBatch,
+    db: Session = Depends(get_db),
+    admin = Depends(get_current_admin_user)
+):
+    return settle(db, batch.order_ids)
+
 @router.post("/{order_id}")
 def process_payment(
     order_id: int,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    # 1. Procurar o pedido pendente do utilizador
-    order = db.query(Order).filter(
-        Order.id == order_id,
-        Order.user_id == current_user.id,
-        Order.status == OrderStatus.PENDING_PAYMENT
-    ).first()
-
-    if not order:
+    # 1. Travar o pedido pendente do utilizador: um UPDATE condicional, então
+    #    dois pagamentos simultâneos do mesmo pedido não passam os dois
+    if not claim_pending(db, [order_id], Order.user_id == current_user.id):
+        db.rollback()  # o UPDATE sem linhas já abriu a transação de escrita
         raise HTTPException(
             status_code=404, 
             detail="Pedido pendente não encontrado."
         )
+    order = db.query(Order).options(selectinload(Order.items)).filter(
+        Order.id == order_id
+    ).populate_existing().one()
 
-    # 2. Simulação de Pagamento e Atualização de Stock
-    # Usamos um loop para baixar o stock de cada item
-    for item in order.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        
-        # Re-validação de segurança antes de baixar o stock
-        if product.stock < item.quantity:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Infelizmente o produto {product.name} esgotou durante o processo."
-            )
-        
-        # Redução efetiva do stock
-        product.stock -= item.quantity
+    # 2. Simulação de Pagamento e Confirmação do Stock
+    # O stock já foi reservado no checkout; aqui consumimos a reserva.
+    # Se ela expirou, a baixa é refeita com UPDATE condicional (nunca com o cache)
+    product_ids = [item.product_id for item in order.items]
+    failures = confirm_order(db, order)
+    if failures:
+        revert_claims(db, [order.id])
+        db.commit()  # a reserva vencida já foi devolvida ao stock
+        invalidate_products(*product_ids)
+        raise HTTPException(
+            status_code=400,
+            detail=failures_detail("Infelizmente alguns produtos esgotaram durante o processo.", failures)
+        )
+
+    # 3. Registrar o evento e somar a venda aos agregados (no mesmo commit
+    #    que marcou o pedido como pago)
+    db.add(order_event(order, OrderStatus.PENDING_PAYMENT))
+    record_paid(db, [order.id])
 
-    # 3. Atualizar status do pedido
-    order.status = OrderStatus.PAID
-    # Nota: Podes adicionar um campo 'payment_id' ou 'paid_at' no teu modelo Order se quiseres mais detalhe
-    
     db.commit()
+
+    # O stock mudou: descarta os snapshots desses produtos no cache do catálogo
+    invalidate_products(*product_ids)
     
     return {
         "message": "Pagamento confirmado com sucesso!",
-        "order_id": order.id,
+        "order_id": order_id,
         "payment_reference": str(uuid.uuid4()), # ID fake de transação
-        "new_status": order.status
+        "new_status": OrderStatus.PAID
     }
\ No newline at end of file
@@ -1,14 +1,119 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from typing import List
+from decimal import Decimal
+from typing import Optional
+import re
+import sys
 
+from app import bulk
+from app.cache import get_product_snapshot, invalidate_products, product_page_cache
 from app.database import get_db
+from app.etag import (
+    CATALOG_CACHE_CONTROL,
+    catalog_etag,
+    catalog_version_statement,
+    etag_matches,
+    not_modified,
+    set_cache_headers,
+)
 from app.models.product import Product
+from app.money import to_cents
+from app.models.product_search import products_fts
 from app.auth.dependencies import get_current_admin_user
-from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate
+from app.config import BULK_IMPORT_CHUNK_SIZE
+from app.pagination import build_page, decode_cursor, encode_cursor, keyset_statement
+from app.serialization import PRODUCT_COLUMNS, FastJSONResponse, render_products_page
+from app.schemas.product import (
+    BulkFormat,
+    ImportReport,
+    ProductCreate,
+    ProductPage,
+    ProductResponse,
+    ProductSort,
+    ProductUpdate,
+)
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+# Coluna de ordenação e sentido de cada ordenação (o desempate é sempre o id)
+SORT_COLUMNS = {
+    ProductSort.ID: (None, False),
+    ProductSort.PRICE_ASC: (Product.price_cents, False),
+    ProductSort.PRICE_DESC: (Product.price_cents, True),
+    ProductSort.NAME_ASC: (Product.name, False),
+    ProductSort.NAME_DESC: (Product.name, True),
+}
+
+
+def prefix_upper_bound(prefix: str) -> Optional[str]:
+    # Menor texto acima de todos os que começam com `prefix`. U+10FFFF no fim
+    # não tem sucessor: sai e incrementa o anterior; só U+10FFFF, sem limite
+    stripped = prefix.rstrip(chr(sys.maxunicode))
+    if not stripped:
+        return None
+    return stripped[:-1] + chr(ord(stripped[-1]) + 1)
+
+
+def products_page_statement(
+    sort: ProductSort = ProductSort.ID,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+    name: Optional[str] = None,
+    in_stock: Optional[bool] = None,
+):
+    """
+    Monta o SELECT paginado da listagem de produtos, só com as colunas da
+    resposta (linhas, não objetos ORM). Retorna (statement, cursor decodificado).
+    """
+    cursor_data = decode_cursor(cursor) if cursor else None
+    if cursor_data and cursor_data.get("s", ProductSort.ID.value) != sort.value:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor não corresponde à ordenação solicitada",
+        )
+
+    stmt = select(*PRODUCT_COLUMNS)
+    if min_price is not None:
+        stmt = stmt.where(Product.price_cents >= to_cents(min_price))
+    if max_price is not None:
+        stmt = stmt.where(Product.price_cents <= to_cents(max_price))
+    if name:
+        # Intervalo [prefixo, prefixo++) aproveita o índice (name, id); LIKE não
+        stmt = stmt.where(Product.name >= name)
+        upper = prefix_upper_bound(name)
+        if upper is not None:
+            stmt = stmt.where(Product.name < upper)
+    if in_stock is not None:
+        stmt = stmt.where(Product.stock > 0 if in_stock else Product.stock <= 0)
+
+    key_col, descending = SORT_COLUMNS[sort]
+    stmt = keyset_statement(
+        stmt,
+        Product.id,
+        limit,
+        key_col=key_col,
+        descending=descending,
+        cursor=cursor_data,
+    )
+    return stmt, cursor_data
+
+
+def build_products_page(rows: list, sort: ProductSort, limit: int, cursor_data):
+    # (linhas da página, next_cursor, prev_cursor)
+    key_col, _ = SORT_COLUMNS[sort]
+    return build_page(
+        rows,
+        limit,
+        cursor_data,
+        key_of=lambda row: (None if key_col is None else getattr(row, key_col.key), row.id),
+        extra={"s": sort.value},
+    )
+
 # CRIAR PRODUTO (Apenas Admin)
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 def create_product(
@@ -20,12 +125,166 @@ def create_product(
     db.add(new_product)
     db.commit()
     db.refresh(new_product)
+    invalidate_products(new_product.id)
     return new_product
 
-# LISTAR PRODUTOS (Público)
-@router.get("/", response_model=List[ProductResponse])
-def list_products(db: Session = Depends(get_db), skip: int = 0, limit: int = 100):
-    return db.query(Product).offset(skip).limit(limit).all()
+# LISTAR PRODUTOS (Público) - paginação por cursor, filtros e ordenação
+@router.get("/", response_model=ProductPage)
+def list_products(
+    request: Request,
+    db: Session = Depends(get_db),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: ProductSort = ProductSort.ID,
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    name: Optional[str] = Query(None, min_length=1, description="Prefixo do nome"),
+    in_stock: Optional[bool] = None,
+):
+    # Versão do catálogo (uma consulta): ETag, 304 e chave do cache de páginas,
+    # que assim nunca serve uma página anterior a escritas de outro worker
+    version = db.scalar(catalog_version_statement())
+    etag = catalog_etag(version)
+    if etag_matches(request, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
+
+    # O cache guarda a página já serializada (bytes prontos para a resposta)
+    cache_key = (version, sort.value, limit, cursor, min_price, max_price, name, in_stock)
+    body = product_page_cache.get(cache_key)
+    if body is None:
+        generation = product_page_cache.generation
+        stmt, cursor_data = products_page_statement(
+            sort, limit, cursor, min_price, max_price, name, in_stock
+        )
+        body = render_products_page(
+            *build_products_page(db.execute(stmt).all(), sort, limit, cursor_data)
+        )
+        product_page_cache.set(cache_key, body, generation=generation)
+
+    response = FastJSONResponse(body)
+    set_cache_headers(response, etag, CATALOG_CACHE_CONTROL)
+    return response
+
+def search_match_expression(q: str) -> Optional[str]:
+    # Cada palavra vira um termo entre aspas (sem sintaxe FTS do usuário)
+    # com * para casar por prefixo: "note" encontra "notebook"
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+def search_statement(match: str, limit: int, offset: int = 0, max_id: Optional[int] = None):
+    # rank do FTS5 é o bm25 (menor = mais relevante), recalculado a cada
+    # escrita no índice: não é estável entre duas páginas e não serve de chave
+    # de cursor. Paginamos pela posição no resultado ordenado por (rank, id),
+    # só entre os produtos que já existiam na primeira página (id <= max_id);
+    # o FTS5 ranqueia todos os casamentos antes do LIMIT de qualquer forma.
+    stmt = (
+        select(Product)
+        .join(products_fts, products_fts.c.rowid == Product.id)
+        .where(products_fts.c.products_fts.op("MATCH")(match))
+    )
+    if max_id is not None:
+        stmt = stmt.where(Product.id <= max_id)
+    return stmt.order_by(products_fts.c.rank, Product.id).offset(offset).limit(limit + 1)
+
+# BUSCAR PRODUTOS (Público) - índice FTS5, ordenado por relevância (bm25)
+@router.get("/search", response_model=ProductPage)
+def search_products(
+    q: str = Query(..., min_length=1, description="Termos de busca"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    match = search_match_expression(q)
+    if match is None:
+        return {"items": [], "next_cursor": None, "prev_cursor": None}
+
+    # Cursor opaco com a posição ("o") da página no resultado e o maior id
+    # ("m") do catálogo na primeira página
+    if cursor:
+        cursor_data = decode_cursor(cursor, key="o")
+    else:
+        cursor_data = {"o": 0, "q": q, "m": db.scalar(select(func.max(Product.id)))}
+    offset, max_id = cursor_data["o"], cursor_data.get("m")
+    if not isinstance(offset, int) or offset < 0 or not isinstance(max_id, (int, type(None))):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido",
+        )
+    if cursor_data.get("q") != q:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor não corresponde à busca solicitada",
+        )
+
+    products = db.scalars(search_statement(match, limit, offset, max_id)).all()
+
+    has_more = len(products) > limit
+    return {
+        "items": products[:limit],
+        "next_cursor": encode_cursor({"o": offset + limit, "q": q, "m": max_id}) if has_more else None,
+        "prev_cursor": encode_cursor({"o": max(offset - limit, 0), "q": q, "m": max_id}) if offset else None,
+    }
+
+# IMPORTAR PRODUTOS EM MASSA (Apenas Admin) - NDJSON ou CSV em streaming
+@router.post("/import", response_model=ImportReport)
+async def import_products(
+    request: Request,
+    format: BulkFormat = BulkFormat.NDJSON,
+    chunk_size: int = Query(BULK_IMPORT_CHUNK_SIZE, ge=1, le=50000),
+    db: Session = Depends(get_db),
+    admin=Depends(get_current_admin_user),
+):
+    """
+    Lê o corpo em pedaços, valida cada linha com ProductCreate e insere em
+    lotes de `chunk_size` (um commit por lote). Linhas inválidas são
+    reportadas com o número da linha e não interrompem a importação.
+    """
+    report = bulk.ImportResult()
+    chunk = []
+    async for row in bulk.parse_rows(request.stream(), format.value, report):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            await run_in_threadpool(bulk.insert_chunk, db, chunk)
+            report.inserted += len(chunk)
+            chunk = []
+
+    if chunk:
+        await run_in_threadpool(bulk.insert_chunk, db, chunk)
+        report.inserted += len(chunk)
+
+    invalidate_products()
+    return report.as_dict()
+
+# EXPORTAR PRODUTOS (Apenas Admin) - streaming, sem carregar o catálogo inteiro
+@router.get("/export")
+def export_products(
+    format: BulkFormat = BulkFormat.NDJSON,
+    db: Session = Depends(get_db),
+    admin=Depends(get_current_admin_user),
+):
+    if format is BulkFormat.CSV:
+        return StreamingResponse(
+            bulk.export_csv(db),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="products.csv"'},
+        )
+    return StreamingResponse(bulk.export_ndjson(db), media_type="application/x-ndjson")
+
+# DETALHAR PRODUTO (Público) - servido pelo cache do catálogo
+@router.get("/{product_id}", response_model=ProductResponse)
+def get_product(product_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    version = db.scalar(catalog_version_statement())
+    etag = catalog_etag(version)
+    if etag_matches(request, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
+
+    product = get_product_snapshot(db, product_id, version)
+    if not product:
+        raise HTTPException(status_code=404, detail="Produto não encontrado")
+    set_cache_headers(response, etag, CATALOG_CACHE_CONTROL)
+    return product
 
 # ATUALIZAR PRODUTO (Apenas Admin)
 @router.patch("/{product_id}", response_model=ProductResponse)
@@ -46,6 +305,7 @@ def update_product(
     
     db.commit()
     db.refresh(product)
+    invalidate_products(product.id)
     return product
 
 # DELETAR PRODUTO (Apenas Admin)
@@ -61,4 +321,5 @@ def delete_product(
     
     db.delete(product)
     db.commit()
+    invalidate_products(product_id)
     return None
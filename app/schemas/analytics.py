@@ -0,0 +1,29 @@
+from datetime import date
+from enum import Enum
+from pydantic import BaseModel
+from typing import List, Optional
+from app.money import Money
+
+class SalesTotals(BaseModel): # soma dos agregados (pedidos, unidades, receita)
+
+    orders: int
+    quantity: int
+    revenue: Money
+
+class DailySalesRow(SalesTotals):
+
+    day: date
+
+class ProductSalesRow(SalesTotals):
+
+    product_id: int
+    name: Optional[str] = None # None se o produto foi removido
+
+class TopProductsSort(str, Enum): # criterio do ranking de produtos
+    REVENUE = "revenue"
+    QUANTITY = "quantity"
+
+class DailySalesReport(BaseModel):
+
+    days: List[DailySalesRow]
+    total: SalesTotals
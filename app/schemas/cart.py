@@ -1,6 +1,47 @@
-from pydantic import BaseModel, Field
+from enum import Enum
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
+from decimal import Decimal
+from app.money import Money
 
 class CartItemCreate(BaseModel): # converte JSON em objeto da classe
 
     product_id: int
-    quantity: int = Field(gt=0, description="A quantidade deve ser maior que zero")
\ No newline at end of file
+    quantity: int = Field(gt=0, description="A quantidade deve ser maior que zero")
+
+class CartOpType(str, Enum): # operacoes aceitas no lote do carrinho
+    ADD = "add"        # soma a quantidade
+    SET = "set"        # define a quantidade (0 remove)
+    REMOVE = "remove"  # remove o item
+
+class CartOp(BaseModel):
+
+    op: CartOpType
+    product_id: int
+    quantity: int = 0
+
+    @model_validator(mode="after")
+    def check_quantity(self):
+        if self.op == CartOpType.ADD and self.quantity <= 0:
+            raise ValueError("A quantidade deve ser maior que zero")
+        if self.op == CartOpType.SET and self.quantity < 0:
+            raise ValueError("A quantidade não pode ser negativa")
+        return self
+
+class CartBatch(BaseModel): # lote aplicado em uma única transação, na ordem enviada
+
+    ops: List[CartOp] = Field(min_length=1, max_length=500)
+
+class CartItemView(BaseModel):
+
+    product_id: int
+    name: str
+    quantity: int
+    unit_price: Money
+    subtotal: Money
+
+class CartView(BaseModel):
+
+    id: Optional[int] = None
+    total: Money = Decimal("0.00")
+    items: List[CartItemView] = []
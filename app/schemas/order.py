@@ -1,14 +1,15 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from app.models.order_status import OrderStatus
+from app.money import Money
 
 # define como cada produto deve aparecer como pedido
 class OrderItemResponse(BaseModel):
 
     product_id : int
     quantity: int
-    unit_price: float
+    unit_price: Money
 
     class Config:
 
@@ -18,10 +19,16 @@ class OrderResponse(BaseModel):
 
     id: int
     status: OrderStatus
-    total: float
+    total: Money
     created_at : datetime
     items: List[OrderItemResponse]
 
     class Config:
 
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class OrderPage(BaseModel): # pagina da listagem de pedidos (mais recentes primeiro)
+
+    items: List[OrderResponse]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
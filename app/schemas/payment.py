@@ -0,0 +1,33 @@
+from enum import Enum
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class PaymentBatch(BaseModel): # confirmacoes do provedor de pagamento, em lote
+
+    order_ids: List[int] = Field(min_length=1, max_length=5000)
+
+class SettlementStatus(str, Enum): # resultado de cada pedido do lote
+    PAID = "paid"                  # pago agora
+    ALREADY_PAID = "already_paid"  # já estava pago (reenvio do lote)
+    NOT_FOUND = "not_found"
+    NOT_PENDING = "not_pending"    # carrinho ou cancelado
+    OUT_OF_STOCK = "out_of_stock"  # continua pendente, sem estoque para a reserva vencida
+
+class StockFailureResponse(BaseModel):
+
+    product_id: int
+    requested: int
+    available: Optional[int] = None
+
+class SettlementResult(BaseModel):
+
+    order_id: int
+    status: SettlementStatus
+    items: List[StockFailureResponse] = []
+
+class SettlementReport(BaseModel):
+
+    paid: int
+    already_paid: int
+    failed: int
+    results: List[SettlementResult]
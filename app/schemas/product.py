@@ -1,11 +1,13 @@
+from enum import Enum
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from app.money import Money
 
 class ProductBase(BaseModel): # classe PAI, defini como os produtos serao no sistema
 
     name: str
     description: str
-    price: float
+    price: Money # Decimal exato (guardado em centavos)
     stock: int
 
 class ProductCreate(ProductBase):
@@ -15,11 +17,40 @@ class ProductUpdate(BaseModel): # permitir atualizacao sobre o produto
 
     name: Optional[str] = None
     description: Optional[str] = None
-    price: Optional[float] = None
+    price: Optional[Money] = None
     stock: Optional[int] = None
 
 class ProductResponse(ProductBase):
     id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ProductSort(str, Enum): # ordenacoes suportadas pela listagem (cada uma tem indice)
+    ID = "id"
+    PRICE_ASC = "price"
+    PRICE_DESC = "-price"
+    NAME_ASC = "name"
+    NAME_DESC = "-name"
+
+class ProductPage(BaseModel): # pagina da listagem com cursores opacos
+
+    items: List[ProductResponse]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class BulkFormat(str, Enum): # formatos aceitos na importacao/exportacao em massa
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+class ImportRowError(BaseModel):
+
+    line: int
+    errors: List[str]
+
+class ImportReport(BaseModel): # resultado da importacao em massa
+
+    inserted: int
+    failed: int
+    errors: List[ImportRowError]
@@ -0,0 +1,80 @@
+from typing import Iterable, Optional
+
+import orjson
+from fastapi.responses import Response
+from sqlalchemy import select
+
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+
+# Caminho rápido das listagens grandes: as rotas selecionam só as colunas
+# necessárias (tuplas, sem objetos ORM) e o JSON é montado direto com orjson,
+# sem validar cada item pelo Pydantic. O formato é o mesmo, byte a byte, que
+# FastAPI geraria com o response_model (ProductPage, OrderPage): mesma ordem
+# de campos, dinheiro como número (centavos / 100) e datas em isoformat.
+# (Só difere para valores acima de 1e16, que o json do Python escreve 1e+16.)
+
+PRODUCT_COLUMNS = (Product.id, Product.name, Product.description, Product.price_cents, Product.stock)
+
+ORDER_COLUMNS = (Order.id, Order.status, Order.total_cents, Order.created_at)
+
+ORDER_ITEM_COLUMNS = (OrderItem.order_id, OrderItem.product_id, OrderItem.quantity, OrderItem.unit_price_cents)
+
+
+class FastJSONResponse(Response):
+    # Conteúdo já em bytes (ou estruturas simples, serializadas com orjson)
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content)
+
+
+def product_json(row) -> dict:
+    # Ordem de ProductResponse: campos de ProductBase e depois o id
+    return {
+        "name": row.name,
+        "description": row.description,
+        "price": row.price_cents / 100,
+        "stock": row.stock,
+        "id": row.id,
+    }
+
+
+def order_json(row, items: list) -> dict:
+    return {
+        "id": row.id,
+        "status": row.status.value,
+        "total": row.total_cents / 100,
+        "created_at": row.created_at.isoformat(),
+        "items": [
+            {"product_id": item.product_id, "quantity": item.quantity, "unit_price": item.unit_price_cents / 100}
+            for item in items
+        ],
+    }
+
+
+def render_page(items: list, next_cursor: Optional[str], prev_cursor: Optional[str]) -> bytes:
+    return orjson.dumps({"items": items, "next_cursor": next_cursor, "prev_cursor": prev_cursor})
+
+
+def render_products_page(rows: Iterable, next_cursor: Optional[str], prev_cursor: Optional[str]) -> bytes:
+    return render_page([product_json(row) for row in rows], next_cursor, prev_cursor)
+
+
+def order_items_statement(order_ids: list[int]):
+    # Itens de uma página de pedidos numa consulta, na ordem de inserção
+    return (
+        select(*ORDER_ITEM_COLUMNS)
+        .where(OrderItem.order_id.in_(order_ids))
+        .order_by(OrderItem.id)
+    )
+
+
+def render_orders_page(rows: list, item_rows: Iterable, next_cursor: Optional[str], prev_cursor: Optional[str]) -> bytes:
+    items_by_order: dict[int, list] = {row.id: [] for row in rows}
+    for item in item_rows:
+        items_by_order[item.order_id].append(item)
+    return render_page([order_json(row, items_by_order[row.id]) for row in rows], next_cursor, prev_cursor)
@@ -0,0 +1,135 @@
+from collections import Counter
+from dataclasses import asdict
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.analytics import record_paid
+from app.cache import invalidate_products
+from app.config import SETTLEMENT_BATCH_SIZE
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.order_status import OrderStatus
+from app.outbox import record_status_changes
+from app.schemas.payment import SettlementStatus
+from app.stock import confirm_orders
+
+# Liquidação de pagamentos em lote (confirmações do provedor chegam às
+# centenas). Cada fatia de pedidos é uma transação com um número fixo de
+# comandos, seja qual for o tamanho: trava os pedidos com um UPDATE
+# condicional, consome as reservas e refaz a baixa das vencidas com UPDATEs
+# agrupados. Reenviar o mesmo lote é seguro: o que já foi pago volta como
+# already_paid, sem tocar no estoque de novo.
+
+
+def claim_pending(db: Session, order_ids: list[int], *criteria) -> set[int]:
+    """
+    Trava os pedidos: só quem ainda está PENDING_PAYMENT vira PAID, então
+    dois pagamentos concorrentes do mesmo pedido nunca o pagam duas vezes.
+    Retorna os ids travados. Não faz commit.
+    """
+    return set(db.scalars(
+        update(Order)
+        .where(Order.id.in_(order_ids), Order.status == OrderStatus.PENDING_PAYMENT, *criteria)
+        .values(status=OrderStatus.PAID, paid_at=datetime.utcnow(), version=Order.version + 1)
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    ))
+
+
+def revert_claims(db: Session, order_ids: list[int]):
+    # Sem estoque: o pedido volta a aguardar pagamento. Não faz commit.
+    db.execute(
+        update(Order)
+        .where(Order.id.in_(order_ids))
+        .values(status=OrderStatus.PENDING_PAYMENT, paid_at=None, version=Order.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def settle_orders(db: Session, order_ids: list[int]) -> tuple[list[dict], list[int]]:
+    """
+    Liquida uma fatia do lote. Retorna (resultado de cada pedido, na ordem
+    recebida; ids dos produtos afetados). Não faz commit.
+    """
+    # 1. Trava os pedidos ainda pendentes
+    claimed = claim_pending(db, order_ids)
+
+    # 2. Quantidades por pedido e produto numa consulta, e baixa do estoque
+    needed: dict[int, dict[int, int]] = {order_id: {} for order_id in claimed}
+    if claimed:
+        rows = db.execute(
+            select(OrderItem.order_id, OrderItem.product_id, func.sum(OrderItem.quantity))
+            .where(OrderItem.order_id.in_(claimed))
+            .group_by(OrderItem.order_id, OrderItem.product_id)
+        )
+        for order_id, product_id, quantity in rows:
+            needed[order_id][product_id] = quantity
+    failures = confirm_orders(db, needed)
+
+    # 3. Sem estoque: o pedido volta a aguardar pagamento (a reserva vencida
+    #    já foi devolvida), como no pagamento individual
+    if failures:
+        revert_claims(db, list(failures))
+
+    # 4. Vendas confirmadas geram seus eventos e entram nos agregados, na
+    #    mesma transação
+    paid = [order_id for order_id in claimed if order_id not in failures]
+    record_status_changes(db, paid, OrderStatus.PENDING_PAYMENT)
+    record_paid(db, paid)
+
+    others = [order_id for order_id in order_ids if order_id not in claimed]
+    statuses = dict(
+        db.execute(select(Order.id, Order.status).where(Order.id.in_(others))).all()
+    ) if others else {}
+
+    results = []
+    for order_id in order_ids:
+        if order_id in failures:
+            results.append({
+                "order_id": order_id,
+                "status": SettlementStatus.OUT_OF_STOCK,
+                "items": [asdict(failure) for failure in failures[order_id]],
+            })
+            continue
+        if order_id in claimed:
+            outcome = SettlementStatus.PAID
+        elif order_id not in statuses:
+            outcome = SettlementStatus.NOT_FOUND
+        elif statuses[order_id] == OrderStatus.PAID:
+            outcome = SettlementStatus.ALREADY_PAID
+        else:
+            outcome = SettlementStatus.NOT_PENDING
+        results.append({"order_id": order_id, "status": outcome, "items": []})
+
+    product_ids = sorted({product_id for quantities in needed.values() for product_id in quantities})
+    return results, product_ids
+
+
+def settle(db: Session, order_ids: list[int], batch_size: int = SETTLEMENT_BATCH_SIZE) -> dict:
+    """
+    Liquida o lote inteiro em fatias de `batch_size`, cada uma com seu commit
+    (a escrita do SQLite não fica presa pelo lote todo). Ids repetidos contam
+    uma vez. Retorna o relatório com o resultado de cada pedido.
+    """
+    order_ids = list(dict.fromkeys(order_ids))
+    results: list[dict] = []
+    product_ids: set[int] = set()
+    for start in range(0, len(order_ids), batch_size):
+        chunk_results, touched = settle_orders(db, order_ids[start:start + batch_size])
+        db.commit()
+        results += chunk_results
+        product_ids.update(touched)
+
+    # O estoque mudou: descarta os snapshots desses produtos no cache do catálogo
+    invalidate_products(*product_ids)
+
+    counts = Counter(result["status"] for result in results)
+    paid, already_paid = counts[SettlementStatus.PAID], counts[SettlementStatus.ALREADY_PAID]
+    return {
+        "paid": paid,
+        "already_paid": already_paid,
+        "failed": len(results) - paid - already_paid,
+        "results": results,
+    }
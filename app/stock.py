@@ -0,0 +1,226 @@
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.config import RESERVATION_TTL_MINUTES
+from app.models.order import Order
+from app.models.product import Product
+from app.models.stock_reservation import StockReservation
+
+# Motor de reserva de estoque.
+# Toda baixa é um UPDATE condicional (stock >= :q) executado pelo banco, então
+# duas requisições concorrentes nunca conseguem vender a mesma unidade.
+# Os UPDATEs são agrupados (CASE por id) para o custo não crescer com o pedido.
+# Nenhuma função aqui faz commit: quem chama decide a transação.
+
+
+@dataclass
+class StockFailure:
+    product_id: int
+    requested: int
+    # None quando o produto não existe mais
+    available: Optional[int]
+
+
+def order_quantities(order: Order) -> dict[int, int]:
+    # Agrupa por produto (o mesmo produto pode aparecer em mais de um item)
+    quantities: dict[int, int] = {}
+    for item in order.items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
+
+
+def try_decrement(db: Session, quantities: dict[int, int]) -> list[StockFailure]:
+    """
+    Baixa o estoque de todos os produtos ou de nenhum, num único UPDATE
+    agrupado. Retorna a lista de falhas por item (vazia em caso de sucesso).
+    """
+    if not quantities:
+        return []
+
+    wanted = case(quantities, value=Product.id)
+    applied = db.scalars(
+        update(Product)
+        .where(Product.id.in_(list(quantities)), Product.stock >= wanted)
+        .values(stock=Product.stock - wanted)
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    if len(applied) == len(quantities):
+        return []
+
+    # Compensa o que já foi descontado: tudo ou nada
+    increment(db, {product_id: quantities[product_id] for product_id in applied})
+
+    applied_ids = set(applied)
+    failed = [product_id for product_id in sorted(quantities) if product_id not in applied_ids]
+    stocks = dict(
+        db.execute(select(Product.id, Product.stock).where(Product.id.in_(failed))).all()
+    )
+    return [
+        StockFailure(product_id=product_id, requested=quantities[product_id], available=stocks.get(product_id))
+        for product_id in failed
+    ]
+
+
+def increment(db: Session, quantities: dict[int, int]):
+    if not quantities:
+        return
+    db.execute(
+        update(Product)
+        .where(Product.id.in_(list(quantities)))
+        .values(stock=Product.stock + case(quantities, value=Product.id))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reserve_order(db: Session, order: Order, ttl_minutes: int = RESERVATION_TTL_MINUTES) -> list[StockFailure]:
+    """
+    Checkout: desconta o estoque e registra reservas com validade.
+    """
+    quantities = order_quantities(order)
+    failures = try_decrement(db, quantities)
+    if failures:
+        return failures
+
+    # INSERT em lote (executemany), uma única ida ao banco
+    expires_at = datetime.utcnow() + timedelta(minutes=ttl_minutes)
+    db.execute(
+        insert(StockReservation),
+        [
+            {
+                "order_id": order.id,
+                "product_id": product_id,
+                "quantity": quantity,
+                "expires_at": expires_at,
+            }
+            for product_id, quantity in quantities.items()
+        ],
+    )
+    return []
+
+
+def _release(db: Session, *criteria) -> list[int]:
+    """
+    Apaga as reservas que atendem `criteria` e devolve ao estoque só o que o
+    DELETE ... RETURNING trouxe: com duas liberações concorrentes, cada
+    reserva é apagada (e devolvida) por uma delas apenas.
+    """
+    rows = db.execute(
+        delete(StockReservation)
+        .where(*criteria)
+        .returning(StockReservation.product_id, StockReservation.quantity)
+        .execution_options(synchronize_session=False)
+    ).all()
+    quantities: dict[int, int] = {}
+    for product_id, quantity in rows:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    increment(db, quantities)
+    return list(quantities)
+
+
+def _take_reservations(db: Session, order_ids: list[int]) -> list:
+    # Apaga e retorna as reservas dos pedidos; quem não recebeu a linha não a devolve
+    return db.execute(
+        delete(StockReservation)
+        .where(StockReservation.order_id.in_(order_ids))
+        .returning(
+            StockReservation.order_id,
+            StockReservation.product_id,
+            StockReservation.quantity,
+            StockReservation.expires_at,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+
+
+def release_order(db: Session, order_id: int) -> list[int]:
+    """
+    Cancelamento: devolve ao estoque tudo o que o pedido tinha reservado.
+    Retorna os ids dos produtos afetados.
+    """
+    return release_orders(db, [order_id])
+
+
+def release_orders(db: Session, order_ids: list[int]) -> list[int]:
+    # Mesmo que release_order, para vários pedidos com uma consulta só
+    if not order_ids:
+        return []
+    return _release(db, StockReservation.order_id.in_(order_ids))
+
+
+def failures_detail(message: str, failures: list[StockFailure]) -> dict:
+    # Corpo do erro HTTP com a falha de cada item
+    return {"message": message, "items": [asdict(failure) for failure in failures]}
+
+
+def release_expired(
+    db: Session,
+    product_ids: Optional[Iterable[int]] = None,
+    limit: int = 500,
+) -> list[int]:
+    """
+    Devolve ao estoque as reservas vencidas (no máximo `limit` por chamada).
+    O pedido continua PENDING_PAYMENT: se ainda for pago, reserva de novo.
+    """
+    stmt = select(StockReservation.id).where(StockReservation.expires_at <= datetime.utcnow())
+    if product_ids is not None:
+        stmt = stmt.where(StockReservation.product_id.in_(list(product_ids)))
+    return _release(db, StockReservation.id.in_(stmt.limit(limit).scalar_subquery()))
+
+
+def confirm_order(db: Session, order: Order) -> list[StockFailure]:
+    """
+    Pagamento: consome as reservas do pedido. Se alguma venceu (e o estoque
+    pode ter sido devolvido), tenta reservar de novo de forma atômica.
+    """
+    return confirm_orders(db, {order.id: order_quantities(order)}).get(order.id, [])
+
+
+def confirm_orders(db: Session, needed: dict[int, dict[int, int]]) -> dict[int, list[StockFailure]]:
+    """
+    Mesmo que confirm_order, para vários pedidos ({pedido: {produto: quantidade}})
+    com um número fixo de comandos. Retorna as falhas só dos pedidos que falharam.
+    """
+    if not needed:
+        return {}
+
+    # Um DELETE ... RETURNING para todos os pedidos: reservas ainda válidas
+    # são simplesmente consumidas
+    now = datetime.utcnow()
+    reserved: dict[int, dict[int, int]] = {order_id: {} for order_id in needed}
+    returned: dict[int, dict[int, int]] = {order_id: {} for order_id in needed}
+    for order_id, product_id, quantity, expires_at in _take_reservations(db, list(needed)):
+        returned[order_id][product_id] = returned[order_id].get(product_id, 0) + quantity
+        if expires_at > now:
+            reserved[order_id][product_id] = quantity
+
+    redo = [order_id for order_id in needed if reserved[order_id] != needed[order_id]]
+    if not redo:
+        return {}
+
+    # Devolve o que sobrou dessas reservas e refaz a baixa inteira
+    leftover: dict[int, int] = {}
+    for order_id in redo:
+        for product_id, quantity in returned[order_id].items():
+            leftover[product_id] = leftover.get(product_id, 0) + quantity
+    increment(db, leftover)
+
+    # Uma baixa agrupada para todos; só se faltar estoque cai para pedido a pedido
+    total: dict[int, int] = {}
+    for order_id in redo:
+        for product_id, quantity in needed[order_id].items():
+            total[product_id] = total.get(product_id, 0) + quantity
+    if not try_decrement(db, total):
+        return {}
+
+    failures = {}
+    for order_id in redo:
+        failed = try_decrement(db, needed[order_id])
+        if failed:
+            failures[order_id] = failed
+    return failures
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.cache import invalidate_products
+from app.config import (
+    CART_TTL_HOURS,
+    OUTBOX_RETENTION_HOURS,
+    PENDING_ORDER_TTL_HOURS,
+    SWEEP_BATCH_SIZE,
+    SWEEP_INTERVAL_SECONDS,
+    SWEEP_MAX_BATCHES,
+)
+from app.database import SessionLocal
+from app.idempotency import purge_expired
+from app.models.order import Order
+from app.models.order_status import OrderStatus
+from app.outbox import purge_dispatched, record_status_changes
+from app.stock import release_expired, release_orders
+
+# Limpeza em segundo plano: carrinhos (CART) e pedidos aguardando pagamento
+# (PENDING_PAYMENT) parados viram CANCELLED e devolvem o estoque reservado.
+# A idade conta da última atividade (escrita no carrinho ou checkout).
+# Cada lote é um UPDATE sobre uma faixa de ix_orders_status_last_activity_at e tem
+# seu próprio commit, para não segurar a escrita do SQLite por muito tempo.
+
+sweeper_logger = logging.getLogger("app.sweeper")
+
+
+def cancel_stale(db: Session, order_status: OrderStatus, older_than: datetime, limit: int) -> tuple[list[int], list[int]]:
+    """
+    Cancela até `limit` pedidos com o status dado sem atividade desde
+    `older_than` (os mais parados primeiro), registra os eventos no outbox e devolve as
+    reservas deles ao estoque.
+    Retorna (ids dos pedidos, ids dos produtos afetados). Não faz commit.
+    """
+    stale = (
+        select(Order.id)
+        .where(Order.status == order_status, Order.last_activity_at < older_than)
+        .order_by(Order.last_activity_at)
+        .limit(limit)
+        .scalar_subquery()
+    )
+    # As condições se repetem no UPDATE: um pedido pago ou um carrinho
+    # alterado entre o SELECT e o UPDATE não é cancelado
+    order_ids = list(db.scalars(
+        update(Order)
+        .where(Order.id.in_(stale), Order.status == order_status, Order.last_activity_at < older_than)
+        .values(status=OrderStatus.CANCELLED, version=Order.version + 1)
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    ))
+    record_status_changes(db, order_ids, order_status)
+    return order_ids, release_orders(db, order_ids)
+
+
+def sweep(
+    db: Session,
+    now: Optional[datetime] = None,
+    batch_size: int = SWEEP_BATCH_SIZE,
+    max_batches: int = SWEEP_MAX_BATCHES,
+) -> dict[str, int]:
+    """
+    Uma rodada completa (cada lote com commit). Retorna quanto foi varrido:
+    carrinhos e pedidos cancelados, reservas vencidas devolvidas, chaves de
+    idempotência e eventos do outbox já entregues removidos.
+    """
+    now = now or datetime.utcnow()
+    swept = {"carts": 0, "pending_orders": 0, "reservations": 0, "idempotency_keys": 0, "outbox_events": 0}
+    product_ids: set[int] = set()
+
+    for key, order_status, ttl_hours in (
+        ("carts", OrderStatus.CART, CART_TTL_HOURS),
+        ("pending_orders", OrderStatus.PENDING_PAYMENT, PENDING_ORDER_TTL_HOURS),
+    ):
+        older_than = now - timedelta(hours=ttl_hours)
+        for _ in range(max_batches):
+            order_ids, released = cancel_stale(db, order_status, older_than, batch_size)
+            db.commit()
+            swept[key] += len(order_ids)
+            product_ids.update(released)
+            if len(order_ids) < batch_size:
+                break
+
+    # Reservas vencidas de pedidos que continuam pendentes
+    for _ in range(max_batches):
+        released = release_expired(db, limit=batch_size)
+        db.commit()
+        swept["reservations"] += len(released)
+        product_ids.update(released)
+        if len(released) < batch_size:
+            break
+
+    swept["idempotency_keys"] = purge_expired(db, now)
+    swept["outbox_events"] = purge_dispatched(db, now - timedelta(hours=OUTBOX_RETENTION_HOURS))
+    db.commit()
+
+    # O estoque mudou: descarta os snapshots desses produtos no cache do catálogo
+    invalidate_products(*product_ids)
+    return swept
+
+
+class Sweeper:
+    """
+    Tarefa asyncio iniciada no lifespan: a cada `interval` segundos roda
+    sweep() no threadpool. Com interval <= 0 não faz nada.
+    """
+
+    def __init__(self, session_factory=SessionLocal, interval: float = SWEEP_INTERVAL_SECONDS):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.failures = 0
+        self.last_duration_seconds = 0.0
+        self.swept: dict[str, int] = {}
+
+    def run_once(self) -> dict[str, int]:
+        start = time.perf_counter()
+        with self.session_factory() as db:
+            swept = sweep(db)
+        with self._lock:
+            self.runs += 1
+            self.last_duration_seconds = time.perf_counter() - start
+            for key, count in swept.items():
+                self.swept[key] = self.swept.get(key, 0) + count
+        if any(swept.values()):
+            sweeper_logger.info("varredura: %s em %.1f ms", swept, self.last_duration_seconds * 1000)
+        return swept
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await run_in_threadpool(self.run_once)
+            except Exception:
+                # Uma rodada com erro não derruba a tarefa: tenta de novo no próximo intervalo
+                self.failures += 1
+                sweeper_logger.exception("falha na varredura")
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> dict:
+        stats = {
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_duration_seconds": self.last_duration_seconds,
+        }
+        stats.update({f"swept_{key}": count for key, count in self.swept.items()})
+        return stats
+
+
+sweeper = Sweeper()
@@ -1,10 +1,35 @@
+import os
 import pytest
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
+# O JWT precisa de uma chave; em testes não dependemos do .env
+os.environ.setdefault("SECRET_KEY", "chave-de-teste")
+# Custo mínimo do bcrypt: os testes não medem a segurança do hash
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Sem varredura nem despacho do outbox em segundo plano: os testes chamam
+# sweep() e OutboxDispatcher.run_once() diretamente
+os.environ.setdefault("SWEEP_INTERVAL_SECONDS", "0")
+os.environ.setdefault("OUTBOX_DISPATCH_INTERVAL_SECONDS", "0")
+
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_async_db, get_db
+from app.utils import limiter
+from app.cache import product_cache, product_page_cache
+from app.auth.dependencies import user_cache
+from app.idempotency import idempotency_store
+from app.outbox import outbox_dispatcher
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.order_status import OrderStatus
+from app.models.product import Product
+from app.models.user import User
+from app.stock import reserve_order
 
 # Banco SQLite em memória para testes
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_db.db"
@@ -33,5 +58,101 @@ def client(db):
             pass
     # Injeta o banco de teste no lugar do banco real
     app.dependency_overrides[get_db] = override_get_db
+    # As chaves de idempotência e o outbox usam o mesmo banco de teste
+    idempotency_store.session_factory = TestingSessionLocal
+    outbox_dispatcher.session_factory = TestingSessionLocal
+    # Cada teste começa com os contadores de rate limit zerados
+    limiter.reset()
+    # ... e com os caches vazios (os ids se repetem entre testes)
+    product_cache.clear()
+    product_page_cache.clear()
+    user_cache.clear()
     with TestClient(app) as c:
-        yield c
\ No newline at end of file
+        yield c
+
+@pytest.fixture
+def async_client(db):
+    # App com as rotas assíncronas (modo DB_ASYNC=true) sobre o mesmo banco de teste
+    from app.routers import auth
+    from app.routers.aio import products, cart, checkout, payments, orders, analytics
+
+    # NullPool: as conexões aiosqlite não são reaproveitadas entre event loops
+    async_engine = create_async_engine("sqlite+aiosqlite:///./test_db.db", poolclass=NullPool)
+    TestingAsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+
+    def override_get_db():
+        yield db
+
+    aio_app = FastAPI()
+    for module in (auth, products, cart, checkout, payments, orders, analytics):
+        aio_app.include_router(module.router)
+    aio_app.state.limiter = limiter
+    aio_app.dependency_overrides[get_async_db] = override_get_async_db
+    aio_app.dependency_overrides[get_db] = override_get_db
+    limiter.reset()
+    product_cache.clear()
+    product_page_cache.clear()
+    user_cache.clear()
+    with TestClient(aio_app) as c:
+        yield c
+
+@pytest.fixture
+def auth_headers(client):
+    # Registra e autentica um usuário (por padrão, admin)
+    client.post(
+        "/auth/register",
+        json={"email": "admin@example.com", "password": "password123"}
+    )
+    response = client.post(
+        "/auth/login",
+        data={"username": "admin@example.com", "password": "password123"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def query_counter():
+    """
+    Conta as queries SQL emitidas dentro do bloco:
+
+        with query_counter() as queries:
+            client.post(...)
+        assert len(queries) == 3
+    """
+    @contextmanager
+    def counter():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return counter
+
+def seed_pending_orders(db, count, stock=100):
+    # Pedidos já em PENDING_PAYMENT, com a reserva feita como no checkout
+    user = db.query(User).filter(User.email == "admin@example.com").first()
+    product = Product(name="Teclado", description="desc", price=5.0, stock=stock)
+    db.add(product)
+    db.flush()
+
+    order_ids = []
+    for _ in range(count):
+        order = Order(user_id=user.id, status=OrderStatus.PENDING_PAYMENT, total=10.0)
+        order.items = [OrderItem(product_id=product.id, quantity=2, unit_price=5.0)]
+        db.add(order)
+        db.flush()
+        assert reserve_order(db, order) == []
+        order_ids.append(order.id)
+    db.commit()
+    return product, order_ids
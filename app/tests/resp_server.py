@@ -0,0 +1,162 @@
+"""
+Servidor mínimo do protocolo Redis (RESP2), em memória, para desenvolvimento,
+testes e benchmarks do rate limit com RATE_LIMIT_STORAGE_URI=resp://...
+Implementa só os comandos usados por app.ratelimit.RespStorage.
+
+Uso:
+    python -m app.tests.resp_server --port 6379
+"""
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class RespStandIn:
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._data: dict[bytes, tuple[bytes, float | None]] = {}
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+
+    @property
+    def uri(self) -> str:
+        return f"resp://{self.host}:{self.port}/0"
+
+    def start(self) -> "RespStandIn":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # --- comandos (executados sob o lock, como o Redis single-thread) ---
+
+    def _live(self, key: bytes):
+        entry = self._data.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.time():
+            del self._data[key]
+            return None
+        return entry
+
+    def run(self, args: list[bytes]):
+        name = args[0].upper()
+        if name == b"PING":
+            return "+PONG"
+        if name in (b"SELECT", b"FLUSHDB"):
+            if name == b"FLUSHDB":
+                self._data.clear()
+            return "+OK"
+        if name == b"GET":
+            entry = self._live(args[1])
+            return entry[0] if entry else None
+        if name == b"SET":
+            key, value, options = args[1], args[2], [a.upper() for a in args[3:]]
+            if b"NX" in options and self._live(key):
+                return None
+            expires_at = None
+            if b"PX" in options:
+                expires_at = time.time() + int(options[options.index(b"PX") + 1]) / 1000
+            self._data[key] = (value, expires_at)
+            return "+OK"
+        if name == b"INCRBY":
+            entry = self._live(args[1])
+            value = int(entry[0] if entry else 0) + int(args[2])
+            self._data[args[1]] = (str(value).encode(), entry[1] if entry else None)
+            return value
+        if name == b"PTTL":
+            entry = self._live(args[1])
+            if entry is None:
+                return -2
+            return -1 if entry[1] is None else int((entry[1] - time.time()) * 1000)
+        if name == b"DEL":
+            return sum(self._data.pop(key, None) is not None for key in args[1:])
+        if name == b"SCAN":
+            # Cursor = última chave devolvida (em hex), para resistir a DEL
+            # entre as páginas como o do Redis; MATCH filtra depois do corte
+            # de COUNT
+            options = [a.upper() for a in args[2:]]
+            pattern = args[options.index(b"MATCH") + 3].decode() if b"MATCH" in options else "*"
+            count = int(args[options.index(b"COUNT") + 3]) if b"COUNT" in options else 10
+            after = b"" if args[1] == b"0" else bytes.fromhex(args[1].decode())
+            page = sorted(key for key in self._data if key > after)[:count]
+            cursor = page[-1].hex().encode() if len(page) == count else b"0"
+            matched = [key for key in page if self._live(key) and fnmatch.fnmatchcase(key.decode(), pattern)]
+            return [cursor, matched]
+        return Exception(f"ERR unknown command '{name.decode()}'")
+
+    def _handler(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            # Respostas pequenas e em sequência: sem Nagle cada uma sai na hora
+            disable_nagle_algorithm = True
+
+            def handle(self):
+                queued = None
+                while True:
+                    args = read_command(self.rfile)
+                    if args is None:
+                        return
+                    name = args[0].upper()
+                    if name == b"MULTI":
+                        queued = []
+                        reply = "+OK"
+                    elif name == b"EXEC":
+                        with server._lock:
+                            reply = [server.run(command) for command in queued or []]
+                        queued = None
+                    elif queued is not None:
+                        queued.append(args)
+                        reply = "+QUEUED"
+                    else:
+                        with server._lock:
+                            reply = server.run(args)
+                    self.wfile.write(encode_reply(reply))
+
+        return Handler
+
+
+def read_command(rfile) -> list[bytes] | None:
+    line = rfile.readline()
+    if not line:
+        return None
+    count = int(line[1:-2])
+    args = []
+    for _ in range(count):
+        size = int(rfile.readline()[1:-2])
+        args.append(rfile.read(size + 2)[:-2])
+    return args
+
+
+def encode_reply(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, str):
+        return reply.encode() + b"\r\n"
+    if isinstance(reply, Exception):
+        return b"-" + str(reply).encode() + b"\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    return b"*%d\r\n" % len(reply) + b"".join(encode_reply(item) for item in reply)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    server = RespStandIn(args.host, args.port)
+    print(f"servidor RESP em {server.uri}")
+    server._server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
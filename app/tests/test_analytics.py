@@ -0,0 +1,99 @@
+from datetime import date, datetime, timedelta
+
+from app.analytics import backfill
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.order_status import OrderStatus
+from app.models.product import Product
+from app.models.sales_rollup import DailySales, ProductDailySales
+from app.models.user import User
+from app.tests.conftest import seed_pending_orders
+
+
+def seed_paid_history(db, days=3):
+    # Pedidos pagos antes dos agregados existirem (só o backfill os conhece)
+    user = db.query(User).filter(User.email == "admin@example.com").first()
+    a = Product(name="Caneca", description="desc", price=0.1, stock=100)
+    b = Product(name="Camiseta", description="desc", price=19.99, stock=100)
+    db.add_all([a, b])
+    db.flush()
+    for offset in range(days):
+        paid_at = datetime(2024, 3, 1, 23, 59, 59) + timedelta(days=offset)
+        order = Order(user_id=user.id, status=OrderStatus.PAID, total=0, paid_at=paid_at)
+        order.items = [
+            OrderItem(product_id=a.id, quantity=offset + 1, unit_price=0.1),
+            OrderItem(product_id=b.id, quantity=1, unit_price=19.99),
+        ]
+        db.add(order)
+    db.commit()
+    return a, b
+
+
+def rollup_rows(db):
+    return (
+        sorted((r.day, r.product_id, r.quantity, r.revenue_cents, r.order_count) for r in db.query(ProductDailySales)),
+        sorted((r.day, r.order_count, r.quantity, r.revenue_cents) for r in db.query(DailySales)),
+    )
+
+
+def test_payments_update_rollups_incrementally(client, db, auth_headers):
+    product, order_ids = seed_pending_orders(db, 4)
+
+    assert client.post(f"/payments/{order_ids[0]}", headers=auth_headers).status_code == 200
+    client.post("/payments/batch", json={"order_ids": order_ids[1:]}, headers=auth_headers)
+    # Reenvio não soma de novo
+    client.post("/payments/batch", json={"order_ids": order_ids}, headers=auth_headers)
+
+    today = datetime.utcnow().date()
+    report = client.get("/analytics/sales/daily", headers=auth_headers).json()
+    assert report["days"] == [{"day": today.isoformat(), "orders": 4, "quantity": 8, "revenue": 40.0}]
+    assert report["total"] == {"orders": 4, "quantity": 8, "revenue": 40.0}
+
+    series = client.get(f"/analytics/sales/products/{product.id}", headers=auth_headers).json()
+    assert series == [{"day": today.isoformat(), "orders": 4, "quantity": 8, "revenue": 40.0}]
+
+    # O backfill do dia chega exatamente ao mesmo resultado
+    incremental = rollup_rows(db)
+    db.query(ProductDailySales).delete()
+    db.query(DailySales).delete()
+    db.commit()
+    assert backfill(db) == 1
+    assert rollup_rows(db) == incremental
+
+
+def test_backfill_and_dashboards(client, db, auth_headers, query_counter):
+    a, b = seed_paid_history(db)
+    assert backfill(db, start=date(2024, 3, 2)) == 2
+    assert backfill(db) == 3
+    assert backfill(db) == 3  # idempotente: recalcula, não soma
+
+    client.get("/analytics/sales/daily", headers=auth_headers)
+    with query_counter() as queries:
+        report = client.get(
+            "/analytics/sales/daily", params={"start": "2024-03-02", "end": "2024-03-03"}, headers=auth_headers
+        ).json()
+    # Só os agregados são lidos, nunca os pedidos
+    assert not any("orders" in statement or "order_items" in statement for statement in queries)
+    assert [day["day"] for day in report["days"]] == ["2024-03-02", "2024-03-03"]
+    assert report["total"] == {"orders": 2, "quantity": 7, "revenue": 40.48}
+
+    top = client.get("/analytics/sales/top-products", headers=auth_headers).json()
+    assert [(p["product_id"], p["name"], p["revenue"]) for p in top] == [(b.id, "Camiseta", 59.97), (a.id, "Caneca", 0.6)]
+    top = client.get("/analytics/sales/top-products", params={"by": "quantity", "limit": 1}, headers=auth_headers).json()
+    assert [(p["product_id"], p["quantity"]) for p in top] == [(a.id, 6)]
+
+    bad = client.get("/analytics/sales/daily", params={"start": "2024-03-03", "end": "2024-03-01"}, headers=auth_headers)
+    assert bad.status_code == 400
+
+
+def test_async_dashboards(async_client, db):
+    async_client.post("/auth/register", json={"email": "admin@example.com", "password": "password123"})
+    token = async_client.post(
+        "/auth/login", data={"username": "admin@example.com", "password": "password123"}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    _, order_ids = seed_pending_orders(db, 2)
+
+    assert async_client.post(f"/payments/{order_ids[0]}", headers=headers).status_code == 200
+    report = async_client.get("/analytics/sales/daily", headers=headers).json()
+    assert report["total"] == {"orders": 1, "quantity": 2, "revenue": 10.0}
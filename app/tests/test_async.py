@@ -0,0 +1,49 @@
+def login(client):
+    client.post("/auth/register", json={"email": "async@example.com", "password": "password123"})
+    response = client.post(
+        "/auth/login", data={"username": "async@example.com", "password": "password123"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_async_purchase_flow(async_client):
+    headers = login(async_client)
+
+    product = async_client.post(
+        "/products/",
+        json={"name": "Headset", "description": "7.1", "price": 300.0, "stock": 4},
+        headers=headers,
+    ).json()
+    assert async_client.get("/products/").json()["items"][0]["id"] == product["id"]
+    assert async_client.get(f"/products/{product['id']}").json()["stock"] == 4
+
+    response = async_client.post(
+        "/cart/add", json={"product_id": product["id"], "quantity": 3}, headers=headers
+    )
+    assert response.status_code == 200
+
+    checkout = async_client.post("/checkout/", headers=headers).json()
+    assert checkout["total"] == 900.0
+    assert async_client.get(f"/products/{product['id']}").json()["stock"] == 1
+
+    response = async_client.post(f"/payments/{checkout['order_id']}", headers=headers)
+    assert response.json()["new_status"] == "paid"
+
+    orders = async_client.get("/orders/me", headers=headers).json()["items"]
+    assert [o["status"] for o in orders] == ["paid"]
+    assert orders[0]["items"][0]["quantity"] == 3
+
+
+def test_async_cancel_releases_stock(async_client):
+    headers = login(async_client)
+    product = async_client.post(
+        "/products/",
+        json={"name": "Webcam", "description": "HD", "price": 80.0, "stock": 2},
+        headers=headers,
+    ).json()
+    async_client.post("/cart/add", json={"product_id": product["id"], "quantity": 2}, headers=headers)
+    order_id = async_client.post("/checkout/", headers=headers).json()["order_id"]
+
+    response = async_client.post(f"/orders/{order_id}/cancel", headers=headers)
+    assert response.json()["status"] == "cancelled"
+    assert async_client.get(f"/products/{product['id']}").json()["stock"] == 2
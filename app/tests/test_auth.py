@@ -18,4 +18,71 @@ def test_login_user(client):
         data={"username": "login@example.com", "password": "password123"}
     )
     assert response.status_code == 200
-    assert "access_token" in response.json()
\ No newline at end of file
+    assert "access_token" in response.json()
+
+def test_authenticated_user_is_cached(client, db, auth_headers):
+    from app.auth.dependencies import user_cache
+    from app.models.user import User
+
+    # A primeira requisição autenticada popula o cache...
+    client.get("/orders/me", headers=auth_headers)
+    hits = user_cache.hits
+    client.get("/orders/me", headers=auth_headers)
+    assert user_cache.hits == hits + 1
+
+    # ... e uma alteração no usuário o invalida
+    user = db.query(User).filter(User.email == "admin@example.com").first()
+    user.is_admin = False
+    db.commit()
+    assert len(user_cache) == 0
+    response = client.get("/orders/admin/all", headers=auth_headers)
+    assert response.status_code == 403
+
+def test_admin_demotion_outside_the_orm_expires_quickly(client, db, auth_headers, monkeypatch):
+    from sqlalchemy import update
+    from app.models.user import User
+
+    # Sem invalidação (UPDATE direto, como outro worker): só o prazo curto dos admins protege
+    monkeypatch.setattr("app.auth.dependencies.AUTH_ADMIN_CACHE_TTL_SECONDS", 0)
+    assert client.get("/orders/admin/all", headers=auth_headers).status_code == 200
+    db.execute(update(User).where(User.email == "admin@example.com").values(is_admin=False))
+    db.commit()
+    assert client.get("/orders/admin/all", headers=auth_headers).status_code == 403
+
+def test_login_rehashes_password_with_new_cost(client, db):
+    from app.auth.security import pwd_context
+    from app.config import BCRYPT_ROUNDS
+    from app.models.user import User
+
+    # Hash gerado quando o custo configurado era outro
+    old_hash = pwd_context.copy(bcrypt__default_rounds=BCRYPT_ROUNDS + 1, bcrypt__max_rounds=BCRYPT_ROUNDS + 1).hash("password123")
+    db.add(User(email="old@example.com", hashed_password=old_hash))
+    db.commit()
+
+    response = client.post(
+        "/auth/login",
+        data={"username": "old@example.com", "password": "password123"}
+    )
+    assert response.status_code == 200
+
+    user = db.query(User).filter(User.email == "old@example.com").first()
+    db.refresh(user)
+    assert user.hashed_password != old_hash
+    assert pwd_context.identify(user.hashed_password) == "bcrypt"
+    assert not pwd_context.needs_update(user.hashed_password)
+
+def test_login_returns_503_when_hash_pool_is_saturated(client, monkeypatch):
+    from app.auth.security import password_hasher
+
+    client.post(
+        "/auth/register",
+        json={"email": "busy@example.com", "password": "password123"}
+    )
+    monkeypatch.setattr(password_hasher, "workers", 1)
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    response = client.post(
+        "/auth/login",
+        data={"username": "busy@example.com", "password": "password123"}
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
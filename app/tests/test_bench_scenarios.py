@@ -0,0 +1,21 @@
+from sqlalchemy import create_engine, text
+
+from benchmarks.bench_scenarios import seed
+
+
+def test_seed_runs_on_the_migrated_schema(tmp_path):
+    # Fumaça do harness: uma coluna nova NOT NULL não pode quebrar a carga
+    database = str(tmp_path / "bench.db")
+    seed(database, users=2, products=3, orders=4)
+
+    engine = create_engine(f"sqlite:///{database}")
+    with engine.connect() as conn:
+        counts = [
+            conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+            for table in ("users", "products", "orders", "order_items")
+        ]
+        assert counts == [2, 3, 4, 8]
+        assert conn.execute(text(
+            "SELECT COUNT(*) FROM orders WHERE status = 'PAID' AND last_activity_at IS NOT NULL"
+        )).scalar() == 4
+    engine.dispose()
@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+
+from app.models.product import Product
+
+
+def test_ndjson_import_reports_row_errors(client, db, auth_headers):
+    lines = [
+        json.dumps({"name": "A", "description": "a", "price": 1.5, "stock": 1}),
+        json.dumps({"name": "B", "description": "b", "price": "caro", "stock": 2}),
+        "",
+        "{quebrado",
+        json.dumps({"name": "C", "description": "c", "price": 3.0, "stock": 3}),
+        json.dumps({"name": "D", "description": "d", "price": 4.0, "stock": 4}),
+    ]
+    response = client.post(
+        "/products/import",
+        params={"chunk_size": 2},
+        content="\n".join(lines).encode(),
+        headers=auth_headers,
+    )
+    report = response.json()
+    assert report["inserted"] == 3
+    assert report["failed"] == 2
+    assert [e["line"] for e in report["errors"]] == [2, 4]
+    assert report["errors"][0]["errors"][0].startswith("price")
+    assert [p.name for p in db.query(Product).order_by(Product.id)] == ["A", "C", "D"]
+
+
+def test_import_reports_invalid_utf8_per_line(client, db, auth_headers):
+    ndjson = b"\n".join([
+        json.dumps({"name": "A", "description": "a", "price": 1.0, "stock": 1}).encode(),
+        b'{"name": "\xff", "description": "b", "price": 2.0, "stock": 2}',
+        json.dumps({"name": "C", "description": "c", "price": 3.0, "stock": 3}).encode(),
+    ])
+    csv_body = "name,description,price,stock\nD,d,4.0,4\n".encode() + b"E\xe9,e,5.0,5\nF,f,6.0,6\n"
+
+    reports = [
+        client.post("/products/import", content=ndjson, headers=auth_headers).json(),
+        client.post("/products/import", params={"format": "csv"}, content=csv_body, headers=auth_headers).json(),
+    ]
+    assert [(r["inserted"], r["failed"], r["errors"]) for r in reports] == [
+        (2, 1, [{"line": 2, "errors": ["UTF-8 inválido"]}]),
+        (2, 1, [{"line": 3, "errors": ["UTF-8 inválido"]}]),
+    ]
+    assert [p.name for p in db.query(Product).order_by(Product.id)] == ["A", "C", "D", "F"]
+
+
+def test_csv_import_and_export_round_trip(client, db, auth_headers):
+    body = 'name,description,price,stock\nCaneta,"Azul, ponta\nfina",2.5,10\nLápis,HB,1.0,20\n'
+    report = client.post(
+        "/products/import", params={"format": "csv"}, content=body.encode(), headers=auth_headers
+    ).json()
+    assert report == {"inserted": 2, "failed": 0, "errors": []}
+
+    response = client.get("/products/export", params={"format": "csv"}, headers=auth_headers)
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(r["name"], r["description"]) for r in rows] == [("Caneta", "Azul, ponta\nfina"), ("Lápis", "HB")]
+
+    response = client.get("/products/export", headers=auth_headers)
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert [p["stock"] for p in exported] == [10, 20]
@@ -0,0 +1,71 @@
+from app.cache import TTLCache, product_cache, product_page_cache
+from app.models.product import Product
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_lru_and_expiry():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" passa a ser o mais recente
+    cache.set("c", 3)  # despeja "b"
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_ttl_cache_ignores_write_from_before_invalidation():
+    cache = TTLCache(maxsize=10, ttl=10)
+    generation = cache.generation
+    cache.pop("a")  # invalidação concorrente
+    cache.set("a", "velho", generation=generation)
+    assert cache.get("a") is None
+
+
+def test_product_writes_invalidate_cache(client, auth_headers):
+    product_id = client.post(
+        "/products/",
+        json={"name": "Teclado", "description": "ABNT2", "price": 100.0, "stock": 3},
+        headers=auth_headers,
+    ).json()["id"]
+
+    assert client.get(f"/products/{product_id}").json()["price"] == 100.0
+    client.get("/products/")
+    hits = product_cache.hits + product_page_cache.hits
+    client.get(f"/products/{product_id}")
+    client.get("/products/")
+    assert product_cache.hits + product_page_cache.hits == hits + 2
+
+    client.patch(f"/products/{product_id}", json={"price": 90.0}, headers=auth_headers)
+    assert client.get(f"/products/{product_id}").json()["price"] == 90.0
+    assert client.get("/products/").json()["items"][0]["price"] == 90.0
+
+    client.delete(f"/products/{product_id}", headers=auth_headers)
+    assert client.get(f"/products/{product_id}").status_code == 404
+
+
+def test_payment_invalidates_cached_stock(client, db, auth_headers):
+    product = Product(name="Cabo", description="USB-C", price=10.0, stock=2)
+    db.add(product)
+    db.commit()
+
+    assert client.get(f"/products/{product.id}").json()["stock"] == 2
+    client.post("/cart/add", json={"product_id": product.id, "quantity": 2}, headers=auth_headers)
+    order_id = client.post("/checkout/", headers=auth_headers).json()["order_id"]
+    assert client.post(f"/payments/{order_id}", headers=auth_headers).status_code == 200
+
+    assert client.get(f"/products/{product.id}").json()["stock"] == 0
+    response = client.post("/cart/add", json={"product_id": product.id, "quantity": 1}, headers=auth_headers)
+    assert response.status_code == 400
@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app import cart as cart_module
+from app.cart import apply_ops, get_or_create_cart_id
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.order_status import OrderStatus
+from app.models.product import Product
+from app.models.user import User
+from app.schemas.cart import CartOp, CartOpType
+from app.sweeper import sweep
+
+
+def seed_products(db, count, price=0.1, stock=100):
+    products = [
+        Product(name=f"Produto {i}", description="desc", price=price, stock=stock)
+        for i in range(count)
+    ]
+    db.add_all(products)
+    db.commit()
+    return [p.id for p in products]
+
+
+def test_add_twice_upserts_single_item(client, db, auth_headers):
+    (product_id,) = seed_products(db, 1)
+    for _ in range(3):
+        response = client.post("/cart/add", json={"product_id": product_id, "quantity": 1}, headers=auth_headers)
+        assert response.status_code == 200
+
+    cart = client.get("/cart/", headers=auth_headers).json()
+    assert [(i["product_id"], i["quantity"]) for i in cart["items"]] == [(product_id, 3)]
+    # 3 x 0.10 em centavos inteiros: exatamente 0.30 (em float acumulado daria 0.30000000000000004)
+    assert cart["total"] == 0.3
+    assert db.query(OrderItem).count() == 1
+
+
+def test_batch_applies_ops_in_order(client, db, auth_headers):
+    a, b, c = seed_products(db, 3)
+    client.post("/cart/add", json={"product_id": c, "quantity": 1}, headers=auth_headers)
+
+    response = client.post("/cart/batch", json={"ops": [
+        {"op": "add", "product_id": a, "quantity": 2},
+        {"op": "add", "product_id": a, "quantity": 1},
+        {"op": "set", "product_id": b, "quantity": 5},
+        {"op": "add", "product_id": b, "quantity": 1},
+        {"op": "remove", "product_id": c},
+    ]}, headers=auth_headers)
+    assert response.status_code == 200
+
+    cart = response.json()
+    assert {i["product_id"]: i["quantity"] for i in cart["items"]} == {a: 3, b: 6}
+    assert cart["total"] == 0.9
+
+
+def test_batch_over_stock_applies_nothing(client, db, auth_headers):
+    a, b = seed_products(db, 2, stock=2)
+    response = client.post("/cart/batch", json={"ops": [
+        {"op": "add", "product_id": a, "quantity": 1},
+        {"op": "add", "product_id": b, "quantity": 3},
+    ]}, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"]["items"] == [{"product_id": b, "requested": 3, "available": 2}]
+    assert client.get("/cart/", headers=auth_headers).json()["items"] == []
+
+
+def test_apply_ops_leaves_the_transaction_to_the_caller(db):
+    user = User(email="u@example.com", hashed_password="x")
+    db.add(user)
+    (product_id,) = seed_products(db, 1, stock=1)
+
+    # Escrita anterior do chamador, na mesma unidade de trabalho
+    db.add(Product(name="Pendente", description="desc", price=1.0, stock=1))
+    db.flush()
+    with pytest.raises(HTTPException):
+        apply_ops(db, user.id, [CartOp(op=CartOpType.ADD, product_id=product_id, quantity=5)])
+    assert db.query(Product).filter(Product.name == "Pendente").count() == 1
+
+
+def test_batch_and_view_query_count_is_constant(client, db, query_counter, auth_headers):
+    ids = seed_products(db, 40)
+    # Carrinho já existente e token já em cache
+    client.post("/cart/add", json={"product_id": ids[0], "quantity": 1}, headers=auth_headers)
+
+    def batch(product_ids):
+        ops = [{"op": "add", "product_id": i, "quantity": 1} for i in product_ids]
+        with query_counter() as queries:
+            assert client.post("/cart/batch", json={"ops": ops}, headers=auth_headers).status_code == 200
+        return len(queries)
+
+    assert batch(ids[1:2]) == batch(ids[2:40])
+
+    with query_counter() as queries:
+        client.get("/cart/", headers=auth_headers)
+    assert len(queries) == 1
+
+
+def test_cart_expires_by_last_activity(client, db, auth_headers):
+    a, b = seed_products(db, 2)
+    client.post("/cart/add", json={"product_id": a, "quantity": 1}, headers=auth_headers)
+    cart = db.query(Order).filter(Order.status == OrderStatus.CART).one()
+    long_ago = datetime.utcnow() - timedelta(days=30)
+    cart.created_at = cart.last_activity_at = long_ago
+    db.commit()
+
+    # Carrinho antigo mas ainda em uso não é cancelado
+    client.post("/cart/add", json={"product_id": b, "quantity": 1}, headers=auth_headers)
+    assert sweep(db)["carts"] == 0
+
+    cart.last_activity_at = long_ago
+    db.commit()
+    assert sweep(db)["carts"] == 1
+
+    # Depois do cancelamento a escrita vai para um carrinho novo, nunca para o cancelado
+    client.post("/cart/add", json={"product_id": a, "quantity": 1}, headers=auth_headers)
+    db.expire_all()
+    assert db.query(OrderItem).filter(OrderItem.order_id == cart.id).count() == 2
+    new_cart = db.query(Order).filter(Order.status == OrderStatus.CART).one()
+    assert new_cart.id != cart.id
+
+
+def test_concurrent_first_add_reuses_the_other_cart(db, monkeypatch):
+    user = User(email="u@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    # Carrinho criado por outra requisição depois da nossa busca
+    other = Order(user_id=user.id, status=OrderStatus.CART, total=0)
+    db.add(other)
+    db.commit()
+
+    touch = cart_module.touch_cart
+    lookups = []
+
+    def missed_first_lookup(session, user_id):
+        lookups.append(user_id)
+        return None if len(lookups) == 1 else touch(session, user_id)
+
+    monkeypatch.setattr(cart_module, "touch_cart", missed_first_lookup)
+    assert get_or_create_cart_id(db, user.id) == other.id
+    db.commit()
+    assert db.query(Order).filter(Order.user_id == user.id, Order.status == OrderStatus.CART).count() == 1
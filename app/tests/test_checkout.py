@@ -0,0 +1,52 @@
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.order_status import OrderStatus
+from app.models.product import Product
+from app.models.user import User
+
+
+def seed_cart(db, size):
+    user = db.query(User).filter(User.email == "admin@example.com").first()
+    products = [
+        Product(name=f"Produto {i}", description="desc", price=10.0, stock=100)
+        for i in range(size)
+    ]
+    db.add_all(products)
+    db.flush()
+
+    cart = Order(user_id=user.id, status=OrderStatus.CART, total=10.0 * size)
+    cart.items = [
+        OrderItem(product_id=p.id, quantity=1, unit_price=p.price) for p in products
+    ]
+    db.add(cart)
+    db.commit()
+    return cart.id
+
+
+def checkout_and_pay_query_counts(client, db, query_counter, auth_headers, size):
+    seed_cart(db, size)
+    with query_counter() as checkout_queries:
+        response = client.post("/checkout/", headers=auth_headers)
+    assert response.status_code == 200
+
+    with query_counter() as payment_queries:
+        response = client.post(f"/payments/{response.json()['order_id']}", headers=auth_headers)
+    assert response.status_code == 200
+    return len(checkout_queries), len(payment_queries)
+
+
+def test_checkout_and_payment_query_count_is_constant(client, db, query_counter, auth_headers):
+    # O token já está no cache de autenticação após a primeira chamada
+    client.get("/orders/me", headers=auth_headers)
+
+    small = checkout_and_pay_query_counts(client, db, query_counter, auth_headers, 1)
+    large = checkout_and_pay_query_counts(client, db, query_counter, auth_headers, 25)
+    assert small == large
+
+
+def test_payment_decrements_stock(client, db, auth_headers):
+    client.get("/orders/me", headers=auth_headers)
+    seed_cart(db, 3)
+    order_id = client.post("/checkout/", headers=auth_headers).json()["order_id"]
+    assert client.post(f"/payments/{order_id}", headers=auth_headers).status_code == 200
+    assert [p.stock for p in db.query(Product).all()] == [99, 99, 99]
@@ -0,0 +1,51 @@
+import sys
+import threading
+
+from sqlalchemy import text
+
+from app.database import PoolMetrics, create_db_engine
+
+
+def test_sqlite_engine_applies_pragmas_and_counts_checkouts(tmp_path):
+    metrics = PoolMetrics()
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'sub' / 'app.db'}", metrics)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+    with engine.connect():
+        pass
+
+    stats = metrics.snapshot(engine.pool)
+    assert stats["connects"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["checkins"] == 2
+    assert stats["checkedout"] == 0
+    engine.dispose()
+
+
+def test_pool_counters_are_not_lost_across_threads():
+    # Troca de thread a cada poucas instruções para expor um `+=` sem lock
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    metrics = PoolMetrics()
+    try:
+        threads = [
+            threading.Thread(target=lambda: [metrics.increment("checkouts") for _ in range(20000)])
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert metrics.snapshot(None)["checkouts"] == 80000
+
+
+def test_pool_health_endpoint(client):
+    response = client.get("/health/db")
+    assert response.status_code == 200
+    assert "checkouts" in response.json()["sync"]
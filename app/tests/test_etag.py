@@ -0,0 +1,86 @@
+from sqlalchemy import update
+
+from app.models.product import Product
+from app.tests.conftest import TestingSessionLocal
+from app.tests.test_checkout import seed_cart
+from app.tests.test_products import seed_products
+
+
+def test_catalog_conditional_get(client, db, query_counter):
+    seed_products(db, 5)
+
+    first = client.get("/products/", params={"limit": 3})
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"].startswith("public, max-age=")
+
+    with query_counter() as queries:
+        cached = client.get("/products/", params={"limit": 3}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+    assert len(queries) == 1
+
+    # Escrita fora do ORM (como a baixa de estoque) também muda a versão
+    db.execute(update(Product).where(Product.id == 1).values(stock=Product.stock + 1))
+    db.commit()
+    changed = client.get("/products/", params={"limit": 3}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert client.get("/products/1", headers={"If-None-Match": changed.headers["etag"]}).status_code == 304
+
+
+def test_product_body_matches_etag_after_write_elsewhere(client, db):
+    seed_products(db, 2)
+    first = client.get("/products/1")
+
+    # Escrita de outro worker: o cache deste processo não é invalidado
+    with TestingSessionLocal() as other:
+        other.execute(update(Product).where(Product.id == 1).values(name="Renomeado"))
+        other.commit()
+
+    changed = client.get("/products/1", headers={"If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != first.headers["etag"]
+    assert changed.json()["name"] == "Renomeado"
+
+
+def test_order_conditional_get(client, db, query_counter, auth_headers):
+    client.get("/orders/me", headers=auth_headers)
+    order_id = seed_cart(db, 2)
+
+    first = client.get(f"/orders/{order_id}", headers=auth_headers)
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    with query_counter() as queries:
+        cached = client.get(f"/orders/{order_id}", headers=dict(auth_headers, **{"If-None-Match": etag}))
+    assert cached.status_code == 304
+    assert len(queries) == 1
+
+    # Alteração pelo carrinho (UPDATE direto) e pelo ORM (cancelamento)
+    client.post("/cart/add", json={"product_id": 1, "quantity": 1}, headers=auth_headers)
+    after_cart = client.get(f"/orders/{order_id}", headers=dict(auth_headers, **{"If-None-Match": etag}))
+    assert after_cart.status_code == 200
+
+    client.post(f"/orders/{order_id}/cancel", headers=auth_headers)
+    after_cancel = client.get(
+        f"/orders/{order_id}", headers=dict(auth_headers, **{"If-None-Match": after_cart.headers["etag"]})
+    )
+    assert after_cancel.status_code == 200
+    assert after_cancel.json()["status"] == "cancelled"
+
+
+def test_async_order_conditional_get(async_client, db):
+    async_client.post("/auth/register", json={"email": "async@example.com", "password": "password123"})
+    token = async_client.post(
+        "/auth/login", data={"username": "async@example.com", "password": "password123"}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    seed_products(db, 2)
+    async_client.post("/cart/add", json={"product_id": 2, "quantity": 1}, headers=headers)
+    order_id = async_client.get("/cart/", headers=headers).json()["id"]
+
+    etag = async_client.get(f"/orders/{order_id}", headers=headers).headers["etag"]
+    cached = async_client.get(f"/orders/{order_id}", headers=dict(headers, **{"If-None-Match": etag}))
+    assert cached.status_code == 304
+    assert async_client.get("/products/", headers={"If-None-Match": '"products-0"'}).status_code == 200
@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+
+from app.idempotency import IN_PROGRESS, MISMATCH, NEW, REPLAY, IdempotencyStore, StoredResponse
+from app.main import app
+from app.models.idempotency_key import IdempotencyKey
+from app.models.order import Order
+from app.models.order_status import OrderStatus
+from app.models.product import Product
+from app.tests.conftest import TestingSessionLocal
+from app.tests.test_checkout import seed_cart
+
+
+def test_duplicate_checkout_replays_response_with_one_lookup(client, db, query_counter, auth_headers):
+    client.get("/orders/me", headers=auth_headers)
+    seed_cart(db, 2)
+    headers = dict(auth_headers, **{"Idempotency-Key": "checkout-1"})
+
+    first = client.post("/checkout/", headers=headers)
+    assert first.status_code == 200
+    assert "idempotent-replayed" not in first.headers
+
+    with query_counter() as queries:
+        second = client.post("/checkout/", headers=headers)
+    assert second.status_code == 200
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.content == first.content
+    assert len(queries) == 1
+
+    assert db.query(Order).filter(Order.status == OrderStatus.PENDING_PAYMENT).count() == 1
+
+
+def test_duplicate_payment_is_not_charged_twice(client, db, auth_headers):
+    client.get("/orders/me", headers=auth_headers)
+    seed_cart(db, 1)
+    order_id = client.post("/checkout/", headers=auth_headers).json()["order_id"]
+    headers = dict(auth_headers, **{"Idempotency-Key": "pay-1"})
+
+    responses = [client.post(f"/payments/{order_id}", headers=headers) for _ in range(3)]
+    assert {r.status_code for r in responses} == {200}
+    assert len({r.json()["payment_reference"] for r in responses}) == 1
+    assert db.query(Product).one().stock == 99
+
+    # Sem o header, a segunda tentativa chega à rota (pedido já pago)
+    assert client.post(f"/payments/{order_id}", headers=auth_headers).status_code == 404
+
+
+def test_key_reused_for_another_request_is_rejected(client, db, auth_headers):
+    headers = dict(auth_headers, **{"Idempotency-Key": "k"})
+    client.post("/payments/1", headers=headers)
+
+    response = client.post("/payments/2", headers=headers)
+    assert response.status_code == 422
+
+
+def test_store_serializes_and_expires_keys(db):
+    store = IdempotencyStore(TestingSessionLocal)
+
+    assert store.begin("user:a", "k", "f1") == (NEW, None)
+    assert store.begin("user:a", "k", "f1") == (IN_PROGRESS, None)
+    assert store.begin("user:a", "k", "f2") == (MISMATCH, None)
+    # Mesma chave de outro dono é independente
+    assert store.begin("user:b", "k", "f1") == (NEW, None)
+
+    store.complete("user:a", "k", StoredResponse(200, "application/json", b"{}"))
+    assert store.begin("user:a", "k", "f1") == (REPLAY, StoredResponse(200, "application/json", b"{}"))
+
+    # Trava de um processo que morreu: vencida, a chave volta a ficar livre
+    db.query(IdempotencyKey).filter(IdempotencyKey.owner == "user:b").update(
+        {"expires_at": datetime.utcnow() - timedelta(seconds=1)}
+    )
+    db.commit()
+    assert store.begin("user:b", "k", "f1") == (NEW, None)
+
+
+def test_concurrent_duplicates_are_serialized(client, db, auth_headers):
+    client.get("/orders/me", headers=auth_headers)
+    seed_cart(db, 1)
+    headers = dict(auth_headers, **{"Idempotency-Key": "concurrent"})
+
+    async def send_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*(http.post("/checkout/", headers=headers) for _ in range(5)))
+
+    responses = asyncio.run(send_all())
+    assert {r.status_code for r in responses} == {200}
+    assert sum("idempotent-replayed" in r.headers for r in responses) == 4
+    assert len({r.content for r in responses}) == 1
@@ -0,0 +1,45 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.metrics import REQUEST_LATENCY, REQUEST_QUERIES, MetricsMiddleware
+from app.models.product import Product
+
+
+def test_metrics_endpoint_reports_route_latency_and_queries(client, db):
+    db.add(Product(name="Teclado", description="ABNT2", price=120.0, stock=3))
+    db.commit()
+    labels = ("GET", "/products/{product_id}")
+    before = REQUEST_LATENCY.count(labels)
+
+    assert client.get("/products/1").status_code == 200
+    assert REQUEST_LATENCY.count(labels) == before + 1
+
+    body = client.get("/metrics").text
+    # Template da rota, não o caminho com o id
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/products/{product_id}",le="+Inf"}' in body
+    assert 'http_requests_total{method="GET",route="/products/{product_id}",status="200"}' in body
+    assert 'db_pool{mode="sync",stat="checkouts"}' in body
+    assert 'cache{cache="product",stat="hits"}' in body
+    assert 'outbox{stat="oldest_pending_age_seconds"}' in body
+
+
+def test_slow_request_log_includes_sql(db, caplog):
+    app = FastAPI()
+
+    @app.get("/lento")
+    def slow():
+        db.execute(text("SELECT 42"))
+        return {}
+
+    app.add_middleware(MetricsMiddleware, slow_request_ms=0.000001)
+    before = REQUEST_QUERIES.count(("GET", "/lento"))
+
+    with caplog.at_level(logging.WARNING, logger="app.slow_requests"):
+        TestClient(app).get("/lento")
+
+    assert REQUEST_QUERIES.count(("GET", "/lento")) == before + 1
+    assert "SELECT 42" in caplog.text
+    assert "1 queries" in caplog.text
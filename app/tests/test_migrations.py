@@ -0,0 +1,108 @@
+from sqlalchemy import create_engine, event, inspect, text
+
+from app.migrations import LATEST_VERSION, backfill, check_schema, current_version, upgrade
+
+
+def legacy_engine(tmp_path):
+    # Banco criado antes das migrações: sem schema_version, índices novos nem restrição única
+    engine = create_engine(f"sqlite:///{tmp_path / 'legado.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER, status VARCHAR(15), "
+            "total_cents INTEGER, created_at DATETIME)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE order_items (id INTEGER PRIMARY KEY, order_id INTEGER, product_id INTEGER, "
+            "quantity INTEGER, unit_price_cents INTEGER)"
+        ))
+        conn.execute(text("INSERT INTO orders VALUES (1, 1, 'CART', 300, '2024-01-01')"))
+        conn.execute(text("INSERT INTO order_items VALUES (1, 1, 7, 1, 100), (2, 1, 7, 2, 100)"))
+    return engine
+
+
+def test_fresh_database_is_created_at_latest_version(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'novo.db'}")
+    assert current_version(engine) == 0
+
+    assert upgrade(engine) == list(range(1, LATEST_VERSION + 1))
+    assert current_version(engine) == LATEST_VERSION
+    assert upgrade(engine) == []
+    assert {"products_fts", "idempotency_keys"} <= set(inspect(engine).get_table_names())
+
+
+def test_legacy_database_is_migrated(tmp_path):
+    engine = legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        # Segundo carrinho do mesmo usuário (adições simultâneas antes do índice único)
+        conn.execute(text("INSERT INTO orders VALUES (2, 1, 'CART', 0, '2024-02-01')"))
+    upgrade(engine)
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("orders")}
+    assert {
+        "ix_orders_user_status_id", "ix_orders_user_id_id", "ix_orders_status_last_activity_at", "uq_orders_user_cart",
+    } <= indexes
+    assert "ix_orders_status_created_at" not in indexes
+    assert {"version", "last_activity_at"} <= {column["name"] for column in inspect(engine).get_columns("orders")}
+    with engine.connect() as conn:
+        # Itens duplicados (pedido, produto) foram somados antes da restrição única
+        assert conn.execute(text("SELECT product_id, quantity FROM order_items")).all() == [(7, 3)]
+        # A última atividade do carrinho antigo parte da criação
+        assert conn.execute(text("SELECT last_activity_at FROM orders")).scalar() == "2024-01-01"
+        # Fica só o carrinho mais recente
+        assert conn.execute(text("SELECT id, status FROM orders ORDER BY id")).all() == [(1, "CANCELLED"), (2, "CART")]
+
+
+def test_migrated_activity_column_matches_a_fresh_database(tmp_path):
+    migrated = legacy_engine(tmp_path)
+    upgrade(migrated)
+    fresh = create_engine(f"sqlite:///{tmp_path / 'novo.db'}")
+    upgrade(fresh)
+
+    def activity_column(engine):
+        column = next(c for c in inspect(engine).get_columns("orders") if c["name"] == "last_activity_at")
+        return column["nullable"], column["default"]
+
+    assert activity_column(migrated) == activity_column(fresh) == (False, "CURRENT_TIMESTAMP")
+    # INSERT fora do ORM (seeds dos benchmarks) recebe o default do banco
+    for engine in (migrated, fresh):
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO orders (user_id, status, total_cents, created_at) VALUES (9, 'PAID', 0, '2024-01-01')"))
+            assert conn.execute(text("SELECT last_activity_at FROM orders WHERE user_id = 9")).scalar()
+
+
+def test_startup_check_is_one_query(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'novo.db'}")
+    upgrade(engine)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    check_schema(engine, migrate=False)
+    assert len(statements) == 1
+
+
+def test_startup_refuses_outdated_schema_without_migrating(tmp_path):
+    engine = legacy_engine(tmp_path)
+    try:
+        check_schema(engine, migrate=False)
+    except RuntimeError as exc:
+        assert "python -m app.migrations" in str(exc)
+    else:
+        raise AssertionError("check_schema deveria recusar um banco desatualizado")
+    assert current_version(engine) == 0
+
+    check_schema(engine, migrate=True)
+    assert current_version(engine) == LATEST_VERSION
+
+
+def test_backfill_commits_in_batches(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'lotes.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, old INTEGER, new INTEGER)"))
+        conn.execute(text("INSERT INTO t (old) VALUES " + ", ".join(f"({i})" for i in range(25))))
+
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+    assert backfill(engine, "t", "new = old * 2", "new IS NULL", batch_size=10) == 25
+    assert len(commits) == 3
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM t WHERE new = old * 2")).scalar() == 25
@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from sqlalchemy import create_engine, func, inspect, select, text
+
+from app.migrations import money_cents, upgrade
+from app.models.order import Order
+from app.models.product import Product
+from app.money import from_cents, to_cents
+
+
+def test_cents_conversion_is_exact():
+    assert to_cents(0.1) == 10
+    assert to_cents(Decimal("19.99")) == 1999
+    assert to_cents("0.005") == 1
+    assert from_cents(30) == Decimal("0.30")
+    assert sum(to_cents(0.1) for _ in range(3)) == to_cents(0.3)
+
+
+def test_price_round_trips_as_json_number(client, db, auth_headers):
+    response = client.post(
+        "/products/",
+        json={"name": "Cabo", "description": "USB-C", "price": 19.99, "stock": 5},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    assert response.json()["price"] == 19.99
+    assert db.query(Product).one().price_cents == 1999
+
+    response = client.post(
+        "/products/",
+        json={"name": "Cabo", "description": "USB-C", "price": 1.999, "stock": 5},
+        headers=auth_headers,
+    )
+    assert response.status_code == 422
+
+
+def test_migrates_float_columns_to_cents(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legado.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE products (id INTEGER PRIMARY KEY, name VARCHAR, description VARCHAR, price FLOAT, stock INTEGER)"
+        ))
+        conn.execute(text("CREATE INDEX ix_products_price_id ON products (price, id)"))
+        conn.execute(text(
+            "CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER, status VARCHAR(15), total FLOAT, created_at DATETIME)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE order_items (id INTEGER PRIMARY KEY, order_id INTEGER, product_id INTEGER, quantity INTEGER, unit_price FLOAT)"
+        ))
+        conn.execute(text("INSERT INTO products VALUES (1, 'Caneta', 'Azul', 0.1, 10), (2, 'Lápis', 'HB', 2.675, 5)"))
+        conn.execute(text("INSERT INTO orders VALUES (1, 1, 'PAID', 0.30000000000000004, '2024-01-01')"))
+
+    upgrade(engine)
+    money_cents(engine)  # idempotente
+
+    columns = {c["name"] for c in inspect(engine).get_columns("products")}
+    assert "price_cents" in columns and "price" not in columns
+    with engine.connect() as conn:
+        assert conn.execute(select(Product.id, Product.price_cents).order_by(Product.id)).all() == [(1, 10), (2, 268)]
+        # Agregados passam a ser SUMs inteiros
+        assert conn.execute(select(func.sum(Order.total_cents))).scalar() == 30
+        plan = conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM products ORDER BY price_cents, id"
+        )).all()
+    assert "ix_products_price_id" in str(plan)
@@ -0,0 +1,109 @@
+import json
+
+from app.routers import orders
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.order_status import OrderStatus
+from app.models.product import Product
+from app.models.user import User
+from app.settlement import settle
+from app.tests.conftest import TestingSessionLocal, seed_pending_orders
+
+
+def seed_orders(db, count, items_per_order=2):
+    user = db.query(User).filter(User.email == "admin@example.com").first()
+    products = [
+        Product(name=f"Produto {i}", description="desc", price=10.0, stock=100)
+        for i in range(items_per_order)
+    ]
+    db.add_all(products)
+    db.flush()
+
+    statuses = [OrderStatus.PAID, OrderStatus.CANCELLED]
+    for i in range(count):
+        order = Order(user_id=user.id, status=statuses[i % 2], total=10.0 * items_per_order)
+        order.items = [
+            OrderItem(product_id=product.id, quantity=1, unit_price=10.0)
+            for product in products
+        ]
+        db.add(order)
+    db.commit()
+    return user
+
+
+def collect_pages(client, url, headers, **params):
+    ids, cursor = [], None
+    while True:
+        query = dict(params, limit=4)
+        if cursor:
+            query["cursor"] = cursor
+        page = client.get(url, params=query, headers=headers).json()
+        ids += [o["id"] for o in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return ids
+
+
+def test_my_orders_are_paginated_newest_first(client, db, auth_headers):
+    seed_orders(db, 10)
+    expected = [o.id for o in db.query(Order).order_by(Order.id.desc())]
+
+    assert collect_pages(client, "/orders/me", auth_headers) == expected
+
+    paid = collect_pages(client, "/orders/me", auth_headers, status="paid")
+    assert paid == [o.id for o in db.query(Order).filter(Order.status == OrderStatus.PAID).order_by(Order.id.desc())]
+
+
+def test_admin_orders_filter_by_user(client, db, auth_headers):
+    user = seed_orders(db, 5)
+
+    page = client.get("/orders/admin/all", params={"user_id": user.id}, headers=auth_headers).json()
+    assert len(page["items"]) == 5
+    assert all(len(o["items"]) == 2 for o in page["items"])
+
+    page = client.get("/orders/admin/all", params={"user_id": user.id + 1}, headers=auth_headers).json()
+    assert page["items"] == []
+
+
+def test_order_listing_query_count_is_constant(client, db, query_counter, auth_headers):
+    seed_orders(db, 60, items_per_order=3)
+    # O token já está no cache de autenticação após a primeira chamada
+    client.get("/orders/me", params={"limit": 1}, headers=auth_headers)
+
+    with query_counter() as small:
+        client.get("/orders/me", params={"limit": 1}, headers=auth_headers)
+    with query_counter() as large:
+        client.get("/orders/me", params={"limit": 50}, headers=auth_headers)
+    assert len(small) == len(large)
+
+
+def test_export_streams_all_orders_as_ndjson(client, db, auth_headers):
+    seed_orders(db, 7)
+
+    response = client.get("/orders/admin/export", params={"status": "cancelled"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 3
+    assert {row["status"] for row in rows} == {"cancelled"}
+    assert [row["id"] for row in rows] == sorted((row["id"] for row in rows), reverse=True)
+
+
+def test_cancel_does_not_overwrite_a_concurrent_payment(client, db, auth_headers, monkeypatch):
+    product, (order_id,) = seed_pending_orders(db, 1, stock=10)
+    claim = orders.cancel_statement
+
+    def pay_midway(order_id, previous):
+        # O lote de pagamentos confirma o pedido depois da leitura do cancelamento
+        with TestingSessionLocal() as session:
+            assert settle(session, [order_id])["paid"] == 1
+        return claim(order_id, previous)
+
+    monkeypatch.setattr(orders, "cancel_statement", pay_midway)
+    response = client.post(f"/orders/{order_id}/cancel", headers=auth_headers)
+    assert response.status_code == 409
+
+    db.expire_all()
+    assert db.get(Order, order_id).status == OrderStatus.PAID
+    assert db.get(Product, product.id).stock == 8
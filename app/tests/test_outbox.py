@@ -0,0 +1,196 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.order import Order
+from app.models.order_status import OrderStatus
+from app.models.outbox_event import OutboxEvent
+from app.outbox import FileSink, OutboxDispatcher, QueueSink, WebhookSink, claim_batch
+from app.sweeper import sweep
+from app.tests.conftest import TestingSessionLocal, seed_pending_orders
+from app.tests.test_checkout import seed_cart
+
+
+def transitions(db):
+    return [
+        (event.order_id, event.previous_status.value, event.status.value)
+        for event in db.query(OutboxEvent).order_by(OutboxEvent.id)
+    ]
+
+
+def test_every_status_change_writes_an_event(client, db, auth_headers):
+    cart_id = seed_cart(db, 2)
+    client.post("/checkout/", headers=auth_headers)
+    client.post(f"/payments/{cart_id}", headers=auth_headers)
+    _, (batch_id, cancel_id) = seed_pending_orders(db, 2)
+    client.post("/payments/batch", json={"order_ids": [batch_id, cart_id]}, headers=auth_headers)
+    client.post(f"/orders/{cancel_id}/cancel", headers=auth_headers)
+
+    # Checkout recusado (carrinho vazio) não muda nada nem gera evento
+    assert client.post("/checkout/", headers=auth_headers).status_code == 400
+
+    # Varredura: UPDATE em lote, um INSERT ... SELECT de eventos
+    stale = Order(user_id=db.get(Order, cart_id).user_id, status=OrderStatus.CART, total=0,
+                  last_activity_at=datetime.utcnow() - timedelta(days=30))
+    db.add(stale)
+    db.commit()
+    sweep(db)
+
+    assert transitions(db) == [
+        (cart_id, "cart", "pending_payment"),
+        (cart_id, "pending_payment", "paid"),
+        (batch_id, "pending_payment", "paid"),
+        (cancel_id, "pending_payment", "cancelled"),
+        (stale.id, "cart", "cancelled"),
+    ]
+
+
+def test_dispatch_to_queue_and_file_marks_delivered(client, db, auth_headers, tmp_path):
+    _, order_ids = seed_pending_orders(db, 5)
+    client.post("/payments/batch", json={"order_ids": order_ids}, headers=auth_headers)
+
+    path = tmp_path / "eventos" / "outbox.ndjson"
+    queue_sink, file_sink = QueueSink(), FileSink(str(path))
+    dispatcher = OutboxDispatcher([queue_sink, file_sink], TestingSessionLocal, batch_size=2)
+
+    async def run():
+        delivered = await dispatcher.drain()
+        return delivered, [queue_sink.queue.get_nowait() for _ in range(queue_sink.queue.qsize())]
+
+    delivered, queued = asyncio.run(run())
+    assert delivered == 5
+    assert [event["order_id"] for event in queued] == order_ids
+    assert queued[0]["status"] == "paid" and queued[0]["total"] == 10.0
+    assert [json.loads(line) for line in path.read_text().splitlines()] == queued
+
+    stats = dispatcher.stats()
+    assert (stats["pending"], stats["dispatched"], stats["batches"]) == (0, 5, 3)
+    assert asyncio.run(dispatcher.run_once()) == 0
+
+    # Eventos entregues saem na varredura depois do prazo de retenção
+    assert sweep(db, now=datetime.utcnow() + timedelta(days=30))["outbox_events"] == 5
+
+
+def test_without_sinks_events_stay_pending(client, db, auth_headers):
+    _, order_ids = seed_pending_orders(db, 2)
+    client.post("/payments/batch", json={"order_ids": order_ids}, headers=auth_headers)
+
+    dispatcher = OutboxDispatcher([], TestingSessionLocal)
+    assert asyncio.run(dispatcher.run_once()) == 0
+    assert dispatcher.stats()["pending"] == 2
+    assert db.query(OutboxEvent).filter(OutboxEvent.claimed_until.isnot(None)).count() == 0
+
+
+@pytest.fixture
+def webhook_server():
+    # `respond(ids)` escolhe o status de cada POST pelos ids dos eventos do lote
+    server = SimpleNamespace(received=[], statuses=[])
+    server.respond = lambda ids: server.statuses.pop(0) if server.statuses else 200
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            ids = [event["id"] for event in body["events"]]
+            server.received.append(ids)
+            self.send_response(server.respond(ids))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    http = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=http.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{http.server_port}/eventos"
+    yield server
+    http.shutdown()
+    http.server_close()
+
+
+def dispatch(dispatcher, rounds=1):
+    # Rodadas seguidas num mesmo event loop; retorna o total entregue ou o erro de cada uma
+    async def run():
+        results = []
+        try:
+            for _ in range(rounds):
+                try:
+                    results.append(await dispatcher.run_once())
+                except Exception as exc:
+                    results.append(type(exc).__name__)
+        finally:
+            await dispatcher.stop()
+        return results
+
+    return asyncio.run(run())
+
+
+def retry_now(db):
+    # Simula o fim da espera entre tentativas
+    db.query(OutboxEvent).filter(OutboxEvent.dispatched_at.is_(None)).update({"claimed_until": None})
+    db.commit()
+
+
+def test_webhook_failure_is_retried(client, db, auth_headers, webhook_server):
+    _, order_ids = seed_pending_orders(db, 2)
+    client.post("/payments/batch", json={"order_ids": order_ids}, headers=auth_headers)
+
+    webhook_server.statuses.append(503)
+    dispatcher = OutboxDispatcher([WebhookSink(webhook_server.url, timeout=5)], TestingSessionLocal)
+    # Destino fora do ar: o lote inteiro espera antes de voltar
+    assert dispatch(dispatcher, rounds=2) == ["HTTPStatusError", 0]
+    db.expire_all()
+    assert all(event.claimed_until > datetime.utcnow() for event in db.query(OutboxEvent))
+
+    retry_now(db)
+    assert dispatch(dispatcher) == [2]
+    # Pelo menos uma vez: o mesmo lote chegou duas vezes, com os mesmos ids
+    assert webhook_server.received == [[1, 2], [1, 2]]
+
+    db.expire_all()
+    events = db.query(OutboxEvent).order_by(OutboxEvent.id).all()
+    assert all(event.dispatched_at is not None and event.attempts == 1 for event in events)
+    assert "503" in events[0].last_error
+    assert dispatcher.stats()["failures"] == 2
+
+
+def test_rejected_event_does_not_block_the_rest(client, db, auth_headers, webhook_server):
+    _, order_ids = seed_pending_orders(db, 4)
+    client.post("/payments/batch", json={"order_ids": order_ids}, headers=auth_headers)
+    # O consumidor recusa para sempre qualquer lote com o evento 2
+    webhook_server.respond = lambda ids: 422 if 2 in ids else 200
+    dispatcher = OutboxDispatcher(
+        [WebhookSink(webhook_server.url, timeout=5)], TestingSessionLocal, max_attempts=2
+    )
+
+    # O lote é dividido até isolar o evento recusado; os outros são entregues
+    assert dispatch(dispatcher) == ["RejectedEvents"]
+    assert webhook_server.received == [[1, 2, 3, 4], [1, 2], [1], [2], [3, 4]]
+    db.expire_all()
+    assert [event.id for event in db.query(OutboxEvent).filter(OutboxEvent.dispatched_at.is_(None))] == [2]
+
+    # Esgotadas as tentativas vira dead letter: fica na tabela, fora dos lotes
+    # e fora do atraso
+    retry_now(db)
+    assert dispatch(dispatcher, rounds=2) == ["RejectedEvents", 0]
+    stats = dispatcher.stats()
+    assert (stats["pending"], stats["dead_letter"], stats["oldest_pending_age_seconds"]) == (0, 1, 0.0)
+    db.expire_all()
+    assert db.get(OutboxEvent, 2).attempts == 2
+
+
+def test_claimed_batch_is_not_handed_out_twice(client, db, auth_headers):
+    _, order_ids = seed_pending_orders(db, 3)
+    client.post("/payments/batch", json={"order_ids": order_ids}, headers=auth_headers)
+    now = datetime.utcnow()
+
+    assert [row.order_id for row in claim_batch(db, 10, now)] == order_ids
+    db.commit()
+    assert claim_batch(db, 10, now) == []
+    # Despachante que morreu: a reserva vence e outro reenvia o lote
+    assert len(claim_batch(db, 10, now + timedelta(minutes=5))) == 3
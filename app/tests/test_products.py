@@ -0,0 +1,91 @@
+from app.models.product import Product
+
+
+def seed_products(db, count=25):
+    db.add_all([
+        Product(name=f"Produto {i:02d}", description="desc", price=float(i % 7), stock=i % 3)
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def collect_pages(client, **params):
+    ids, cursor = [], None
+    while True:
+        query = dict(params, limit=10)
+        if cursor:
+            query["cursor"] = cursor
+        page = client.get("/products/", params=query).json()
+        ids += [p["id"] for p in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return ids
+
+
+def test_create_and_list_product(client, auth_headers):
+    response = client.post(
+        "/products/",
+        json={"name": "Mouse", "description": "RGB", "price": 250.0, "stock": 5},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+
+    page = client.get("/products/").json()
+    assert [p["name"] for p in page["items"]] == ["Mouse"]
+    assert page["next_cursor"] is None and page["prev_cursor"] is None
+
+
+def test_keyset_pages_match_full_ordering(client, db):
+    seed_products(db)
+    all_products = db.query(Product).all()
+
+    expected = [p.id for p in sorted(all_products, key=lambda p: (-p.price, -p.id))]
+    assert collect_pages(client, sort="-price") == expected
+
+    expected = [p.id for p in sorted(all_products, key=lambda p: (p.name, p.id))]
+    assert collect_pages(client, sort="name") == expected
+
+
+def test_prev_cursor_returns_previous_page(client, db):
+    seed_products(db)
+    first = client.get("/products/", params={"limit": 10, "sort": "price"}).json()
+    second = client.get(
+        "/products/", params={"limit": 10, "sort": "price", "cursor": first["next_cursor"]}
+    ).json()
+    back = client.get(
+        "/products/", params={"limit": 10, "sort": "price", "cursor": second["prev_cursor"]}
+    ).json()
+    assert back["items"] == first["items"]
+
+
+def test_filters(client, db):
+    seed_products(db)
+    page = client.get(
+        "/products/",
+        params={"min_price": 2, "max_price": 3, "in_stock": True, "name": "Produto 1"},
+    ).json()
+    assert page["items"]
+    for p in page["items"]:
+        assert 2 <= p["price"] <= 3 and p["stock"] > 0 and p["name"].startswith("Produto 1")
+
+
+def test_name_prefix_ending_in_last_code_point(client, db):
+    # U+10FFFF não tem sucessor: o limite superior sai do caractere anterior
+    db.add_all([
+        Product(name="Cabo \U0010ffff", description="desc", price=1.0, stock=1),
+        Product(name="Cabo \U0010ffffA", description="desc", price=1.0, stock=1),
+        Product(name="Cabo X", description="desc", price=1.0, stock=1),
+        Product(name="Cabp", description="desc", price=1.0, stock=1),
+    ])
+    db.commit()
+    for prefix, expected in [
+        ("Cabo \U0010ffff", ["Cabo \U0010ffff", "Cabo \U0010ffffA"]),
+        ("\U0010ffff", []),
+    ]:
+        response = client.get("/products/", params={"name": prefix})
+        assert response.status_code == 200
+        assert [p["name"] for p in response.json()["items"]] == expected
+
+
+def test_invalid_cursor(client):
+    assert client.get("/products/", params={"cursor": "lixo"}).status_code == 400
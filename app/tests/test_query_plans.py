@@ -0,0 +1,115 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert, text
+
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.order_status import OrderStatus
+from app.models.product import Product
+from app.models.user import User
+
+# Regressão de índices: cada query das rotas quentes passa por
+# EXPLAIN QUERY PLAN sobre uma base grande (com ANALYZE) e nenhuma pode
+# varrer uma tabela ou índice inteiro ("SCAN"); só buscas ("SEARCH").
+
+USERS = 50
+ORDERS_PER_USER = 40
+PRODUCTS = 500
+
+STATUSES = [OrderStatus.PAID, OrderStatus.CANCELLED, OrderStatus.PENDING_PAYMENT]
+
+
+@pytest.fixture
+def large_dataset(db, auth_headers):
+    db.execute(insert(User), [
+        {"email": f"user{i}@example.com", "hashed_password": "x", "is_admin": False}
+        for i in range(USERS)
+    ])
+    db.execute(insert(Product), [
+        {"name": f"Produto {i}", "description": "desc", "price_cents": 1000, "stock": 1000}
+        for i in range(PRODUCTS)
+    ])
+    user_ids = [user_id for (user_id,) in db.query(User.id)]
+    created_at = datetime.utcnow() - timedelta(days=10)
+    db.execute(insert(Order), [
+        {"user_id": user_id, "status": STATUSES[n % len(STATUSES)], "total_cents": 2000, "created_at": created_at}
+        for user_id in user_ids
+        for n in range(ORDERS_PER_USER)
+    ])
+    order_ids = [order_id for (order_id,) in db.query(Order.id)]
+    db.execute(insert(OrderItem), [
+        {"order_id": order_id, "product_id": order_id % PRODUCTS + k + 1, "quantity": 1, "unit_price_cents": 1000}
+        for order_id in order_ids
+        for k in range(2)
+    ])
+    db.commit()
+    db.execute(text("ANALYZE"))
+    db.commit()
+    return auth_headers
+
+
+@contextmanager
+def captured_statements(engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def full_scans(engine, statements) -> list[tuple[str, str]]:
+    scans = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            scans += [
+                (row[-1], statement)
+                for row in plan
+                if row[-1].startswith("SCAN ") and row[-1] != "SCAN CONSTANT ROW"
+            ]
+    return scans
+
+
+def assert_no_full_scans(engine, statements):
+    assert statements
+    scans = full_scans(engine, statements)
+    assert not scans, "\n\n".join(f"{detail}\n{statement}" for detail, statement in scans)
+
+
+def test_cart_routes_use_indexes(client, db, large_dataset):
+    headers = large_dataset
+    with captured_statements(db.get_bind()) as statements:
+        client.post("/cart/batch", json={"ops": [{"op": "add", "product_id": 1, "quantity": 2}]}, headers=headers)
+        client.post("/cart/add", json={"product_id": 2, "quantity": 1}, headers=headers)
+        client.get("/cart/", headers=headers)
+    assert_no_full_scans(db.get_bind(), statements)
+
+
+def test_checkout_and_payment_use_indexes(client, db, large_dataset):
+    headers = large_dataset
+    client.post("/cart/add", json={"product_id": 1, "quantity": 1}, headers=headers)
+    with captured_statements(db.get_bind()) as statements:
+        order_id = client.post("/checkout/", headers=headers).json()["order_id"]
+        assert client.post(f"/payments/{order_id}", headers=headers).status_code == 200
+    assert_no_full_scans(db.get_bind(), statements)
+
+
+def test_order_routes_use_indexes(client, db, large_dataset):
+    headers = large_dataset
+    client.post("/cart/add", json={"product_id": 1, "quantity": 1}, headers=headers)
+    order_id = client.post("/checkout/", headers=headers).json()["order_id"]
+    with captured_statements(db.get_bind()) as statements:
+        page = client.get("/orders/me", params={"limit": 5}, headers=headers).json()
+        assert page["items"]
+        client.get("/orders/me", params={"limit": 5, "status": "pending_payment"}, headers=headers)
+        client.get(f"/orders/{order_id}", headers=headers)
+        assert client.post(f"/orders/{order_id}/cancel", headers=headers).status_code == 200
+    assert_no_full_scans(db.get_bind(), statements)
@@ -0,0 +1,65 @@
+import pytest
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from starlette.requests import Request
+
+from app.ratelimit import rate_limit_key
+from app.tests.resp_server import RespStandIn
+
+
+@pytest.fixture
+def resp_server():
+    server = RespStandIn().start()
+    yield server
+    server.stop()
+
+
+def make_request(headers=None):
+    return Request({
+        "type": "http",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("10.0.0.1", 1234),
+    })
+
+
+def assert_enforces_limit(first, second):
+    # Duas instâncias da mesma storage (ex.: dois workers) dividem os contadores
+    item = parse("3/minute")
+    first.reset()
+    a, b = FixedWindowRateLimiter(first), FixedWindowRateLimiter(second)
+    assert [a.hit(item, "k"), b.hit(item, "k"), a.hit(item, "k")] == [True, True, True]
+    assert not b.hit(item, "k")
+    assert a.hit(item, "outra")
+    # O hit recusado também conta (semântica do limits)
+    assert first.get(item.key_for("k")) == 4
+
+    first.clear(item.key_for("k"))
+    assert b.hit(item, "k")
+
+
+def test_sqlite_storage_is_shared(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'ratelimit.db'}"
+    assert_enforces_limit(storage_from_string(uri), storage_from_string(uri))
+
+
+def test_resp_storage_is_shared(resp_server):
+    first = storage_from_string(resp_server.uri)
+    assert first.check()
+    assert_enforces_limit(first, storage_from_string(resp_server.uri))
+    assert first.reset() == 2
+
+
+def test_resp_reset_scans_in_pages(resp_server):
+    # Mais chaves que uma página do SCAN; as de fora do prefixo ficam
+    resp_server._data.update({f"ratelimit:k{i}".encode(): (b"1", None) for i in range(1200)})
+    resp_server._data[b"outra:k"] = (b"1", None)
+    assert storage_from_string(resp_server.uri).reset() == 1200
+    assert list(resp_server._data) == [b"outra:k"]
+
+
+def test_key_is_user_when_authenticated(client, auth_headers):
+    assert rate_limit_key(make_request()) == "10.0.0.1"
+    assert rate_limit_key(make_request(auth_headers)) == "user:admin@example.com"
+    # Token inválido volta para o IP
+    assert rate_limit_key(make_request({"Authorization": "Bearer xyz"})) == "10.0.0.1"
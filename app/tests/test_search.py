@@ -0,0 +1,73 @@
+from app.models.product import Product
+
+
+def seed(db):
+    db.add_all([
+        Product(name="Notebook Gamer", description="RTX, 32GB", price=9000.0, stock=1),
+        Product(name="Mochila", description="Para notebook até 15 polegadas", price=200.0, stock=5),
+        Product(name="Mouse", description="Sem fio", price=80.0, stock=9),
+        Product(name="Notebook Básico", description="Notebook para escritório", price=2500.0, stock=2),
+    ])
+    db.commit()
+
+
+def test_search_ranks_and_matches_prefix(client, db):
+    seed(db)
+    names = [p["name"] for p in client.get("/products/search", params={"q": "note"}).json()["items"]]
+    # "notebook" no nome e na descrição pesa mais que só na descrição
+    assert names[0] == "Notebook Básico"
+    assert set(names) == {"Notebook Gamer", "Mochila", "Notebook Básico"}
+
+    # remove_diacritics: "basico" encontra "Básico"
+    items = client.get("/products/search", params={"q": "notebook basico"}).json()["items"]
+    assert [p["name"] for p in items] == ["Notebook Básico"]
+
+
+def test_search_index_follows_writes_and_paginates(client, db, auth_headers):
+    seed(db)
+    mouse = db.query(Product).filter(Product.name == "Mouse").first()
+    client.patch(f"/products/{mouse.id}", json={"name": "Mouse Notebook"}, headers=auth_headers)
+    notebook = db.query(Product).filter(Product.name == "Notebook Gamer").first()
+    client.delete(f"/products/{notebook.id}", headers=auth_headers)
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "notebook", "limit": 1}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/products/search", params=params).json()
+        seen += [p["name"] for p in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert sorted(seen) == ["Mochila", "Mouse Notebook", "Notebook Básico"]
+
+
+def test_search_pages_by_position(client, db):
+    seed(db)
+    original = [p["id"] for p in client.get("/products/search", params={"q": "notebook"}).json()["items"]]
+    first = client.get("/products/search", params={"q": "notebook", "limit": 2}).json()
+    assert first["prev_cursor"] is None
+
+    # Produto novo e mais relevante entre as páginas: sem o limite de id ele
+    # empurraria o resultado e a segunda página repetiria um item da primeira
+    db.add(Product(name="Cabo", description="Carregador de notebook notebook", price=50.0, stock=3))
+    db.commit()
+    second = client.get(
+        "/products/search", params={"q": "notebook", "limit": 2, "cursor": first["next_cursor"]}
+    ).json()
+    first_ids = [p["id"] for p in first["items"]]
+    second_ids = [p["id"] for p in second["items"]]
+    assert not set(first_ids) & set(second_ids)
+    assert first_ids + second_ids == original
+    assert second["next_cursor"] is None
+
+    back = client.get(
+        "/products/search", params={"q": "notebook", "limit": 2, "cursor": second["prev_cursor"]}
+    ).json()
+    assert [p["id"] for p in back["items"]] == first_ids
+    # Uma busca nova já encontra o produto criado
+    assert len(client.get("/products/search", params={"q": "notebook"}).json()["items"]) == 4
+
+    other = client.get("/products/search", params={"q": "mouse", "cursor": first["next_cursor"]})
+    assert other.status_code == 400
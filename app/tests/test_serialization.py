@@ -0,0 +1,72 @@
+from datetime import datetime
+
+from fastapi.responses import JSONResponse
+
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.order_status import OrderStatus
+from app.models.product import Product
+from app.models.user import User
+from app.schemas.order import OrderPage
+from app.schemas.product import ProductPage
+
+# Preços que costumam denunciar diferenças de arredondamento na serialização
+PRICES = [0.1, 0.3, 2.675, 19.99, 1234567.89, 0.0]
+
+
+def pydantic_body(schema, items, page: dict) -> bytes:
+    # O que o FastAPI escreveria com response_model=schema
+    payload = {"items": items, "next_cursor": page["next_cursor"], "prev_cursor": page["prev_cursor"]}
+    return JSONResponse(schema.model_validate(payload, from_attributes=True).model_dump(mode="json")).body
+
+
+def test_product_page_bytes_match_pydantic(client, db):
+    db.add_all(
+        Product(name=f"Café ☕ {i} \"aspas\"", description="" if i % 2 else "linha\nnova\t\\ fim", price=price, stock=i)
+        for i, price in enumerate(PRICES)
+    )
+    db.commit()
+
+    response = client.get("/products/", params={"limit": 4})
+    assert response.headers["content-type"] == "application/json"
+    products = db.query(Product).order_by(Product.id).limit(4).all()
+    assert response.content == pydantic_body(ProductPage, products, response.json())
+
+    # Página seguinte e ordenação por preço, já pelo cache de bytes
+    cursor = response.json()["next_cursor"]
+    response = client.get("/products/", params={"limit": 4, "cursor": cursor})
+    products = db.query(Product).order_by(Product.id).offset(4).all()
+    assert response.content == pydantic_body(ProductPage, products, response.json())
+
+    response = client.get("/products/", params={"sort": "-price"})
+    products = db.query(Product).order_by(Product.price_cents.desc(), Product.id.desc()).all()
+    assert response.content == pydantic_body(ProductPage, products, response.json())
+
+
+def test_order_page_bytes_match_pydantic(client, db, auth_headers):
+    user = db.query(User).filter(User.email == "admin@example.com").first()
+    products = [Product(name=f"Produto {i}", description="desc", price=price, stock=10) for i, price in enumerate(PRICES)]
+    db.add_all(products)
+    db.flush()
+
+    created = [datetime(2024, 1, 2, 3, 4, 5, 678901), datetime(2024, 1, 2, 3, 4, 5), datetime(2024, 12, 31, 23, 59, 59, 1)]
+    # Todos os status, com um só carrinho (uq_orders_user_cart)
+    statuses = list(OrderStatus) + [OrderStatus.PAID, OrderStatus.CANCELLED]
+    for i, created_at in enumerate(created * 2):
+        order = Order(user_id=user.id, status=statuses[i], total=0.1 * (i + 1), created_at=created_at)
+        order.items = [
+            OrderItem(product_id=product.id, quantity=i + 1, unit_price=product.price)
+            for product in reversed(products[: i + 1])
+        ]
+        db.add(order)
+    db.commit()
+
+    for url in ("/orders/me", "/orders/admin/all"):
+        response = client.get(url, params={"limit": 4}, headers=auth_headers)
+        orders = db.query(Order).order_by(Order.id.desc()).limit(4).all()
+        assert response.content == pydantic_body(OrderPage, orders, response.json())
+
+        cursor = response.json()["next_cursor"]
+        response = client.get(url, params={"limit": 4, "cursor": cursor}, headers=auth_headers)
+        orders = db.query(Order).order_by(Order.id.desc()).offset(4).all()
+        assert response.content == pydantic_body(OrderPage, orders, response.json())
@@ -0,0 +1,125 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.models.order import Order
+from app.models.order_status import OrderStatus
+from app.models.product import Product
+from app.models.sales_rollup import DailySales
+from app.models.stock_reservation import StockReservation
+from app.models.user import User
+from app.routers import payments
+from app.settlement import settle as settle_batch
+from app.stock import confirm_order
+from app.tests.conftest import TestingSessionLocal, seed_pending_orders
+
+
+def settle(client, headers, order_ids):
+    response = client.post("/payments/batch", json={"order_ids": order_ids}, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_batch_reports_each_order_and_is_safe_to_retry(client, db, auth_headers):
+    product, (ok, expired, short) = seed_pending_orders(db, 3, stock=6)
+    cart = Order(user_id=db.get(Order, ok).user_id, status=OrderStatus.CART, total=0)
+    db.add(cart)
+    # Reserva vencida (estoque ainda livre) e reserva já devolvida pela
+    # varredura, com o estoque vendido a outra pessoa
+    db.query(StockReservation).filter(StockReservation.order_id == expired).update(
+        {"expires_at": datetime.utcnow() - timedelta(minutes=1)}
+    )
+    db.query(StockReservation).filter(StockReservation.order_id == short).delete()
+    db.commit()
+
+    report = settle(client, auth_headers, [ok, expired, short, cart.id, 9999, ok])
+    assert [(r["order_id"], r["status"]) for r in report["results"]] == [
+        (ok, "paid"),
+        (expired, "paid"),
+        (short, "out_of_stock"),
+        (cart.id, "not_pending"),
+        (9999, "not_found"),
+    ]
+    assert report["results"][2]["items"] == [{"product_id": product.id, "requested": 2, "available": 0}]
+    assert (report["paid"], report["already_paid"], report["failed"]) == (2, 0, 3)
+
+    db.expire_all()
+    assert db.get(Order, short).status == OrderStatus.PENDING_PAYMENT
+    assert db.get(Product, product.id).stock == 0
+    assert db.query(StockReservation).count() == 0
+
+    # Reenvio do mesmo lote (retry do webhook): nada é cobrado de novo
+    db.get(Product, product.id).stock = 2
+    db.commit()
+    retry = settle(client, auth_headers, [ok, expired, short])
+    assert [r["status"] for r in retry["results"]] == ["already_paid", "already_paid", "paid"]
+    db.expire_all()
+    assert db.get(Product, product.id).stock == 0
+
+
+def test_interleaved_payments_pay_once(client, db, auth_headers, monkeypatch):
+    product, (order_id,) = seed_pending_orders(db, 1, stock=10)
+    user = db.get(User, db.get(Order, order_id).user_id)
+    second = []
+
+    def pay_again():
+        with TestingSessionLocal() as session:
+            try:
+                second.append(payments.process_payment(order_id, session, user))
+            except HTTPException as exc:
+                second.append(exc.status_code)
+
+    thread = threading.Thread(target=pay_again)
+
+    def pay_again_midway(session, order):
+        # Outro pagamento do mesmo pedido chega entre a trava e a baixa do estoque
+        if not thread.is_alive():
+            thread.start()
+            time.sleep(0.2)
+        return confirm_order(session, order)
+
+    monkeypatch.setattr(payments, "confirm_order", pay_again_midway)
+    assert client.post(f"/payments/{order_id}", headers=auth_headers).status_code == 200
+    thread.join()
+
+    assert second == [404]
+    db.expire_all()
+    assert db.get(Product, product.id).stock == 8
+    assert [(day.order_count, day.revenue_cents) for day in db.query(DailySales)] == [(1, 1000)]
+
+
+def test_batch_query_count_is_constant(client, db, query_counter, auth_headers):
+    _, order_ids = seed_pending_orders(db, 40)
+    settle(client, auth_headers, [9999])
+
+    with query_counter() as small:
+        settle(client, auth_headers, order_ids[:2])
+    with query_counter() as large:
+        settle(client, auth_headers, order_ids[2:])
+    assert len(small) == len(large)
+
+
+def test_batch_commits_each_slice(db, auth_headers):
+    _, order_ids = seed_pending_orders(db, 7)
+    commits = []
+    event.listen(db, "after_commit", commits.append)
+
+    report = settle_batch(db, order_ids, batch_size=3)
+    assert report["paid"] == 7
+    assert len(commits) == 3
+
+
+def test_async_batch_settlement(async_client, db):
+    async_client.post("/auth/register", json={"email": "admin@example.com", "password": "password123"})
+    token = async_client.post(
+        "/auth/login", data={"username": "admin@example.com", "password": "password123"}
+    ).json()["access_token"]
+    _, order_ids = seed_pending_orders(db, 3)
+
+    report = settle(async_client, {"Authorization": f"Bearer {token}"}, order_ids)
+    assert report["paid"] == 3
+    db.expire_all()
+    assert {db.get(Order, order_id).status for order_id in order_ids} == {OrderStatus.PAID}
@@ -0,0 +1,148 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.product import Product
+from app.models.stock_reservation import StockReservation
+from app.stock import release_expired, try_decrement
+from app.tests.conftest import TestingSessionLocal
+
+
+def test_concurrent_decrements_never_oversell(tmp_path):
+    # Banco em arquivo próprio: cada thread usa sua conexão, como no threadpool
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'stress.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        hot = Product(name="Hot SKU", description="desc", price=1.0, stock=50)
+        db.add(hot)
+        db.commit()
+        product_id = hot.id
+
+    successes, errors = [], []
+
+    def buyer():
+        for _ in range(40):
+            try:
+                with Session() as db:
+                    if not try_decrement(db, {product_id: 1}):
+                        successes.append(1)
+                    db.commit()
+            except Exception as exc:  # pragma: no cover - falha do teste
+                errors.append(exc)
+
+    threads = [threading.Thread(target=buyer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(successes) == 50
+    with Session() as db:
+        assert db.get(Product, product_id).stock == 0
+    engine.dispose()
+
+
+def test_failed_reservation_is_all_or_nothing(db):
+    a = Product(name="A", description="desc", price=1.0, stock=5)
+    b = Product(name="B", description="desc", price=1.0, stock=1)
+    db.add_all([a, b])
+    db.commit()
+
+    failures = try_decrement(db, {a.id: 2, b.id: 3, 999: 1})
+    db.commit()
+
+    assert [(f.product_id, f.requested, f.available) for f in failures] == [
+        (b.id, 3, 1),
+        (999, 1, None),
+    ]
+    assert (a.stock, b.stock) == (5, 1)
+
+
+def test_concurrent_releases_restore_stock_once(db):
+    # 10 unidades, 3 numa reserva vencida: checkout e varredura a liberam juntos
+    product = Product(name="Hot SKU", description="desc", price=1.0, stock=7)
+    db.add(product)
+    db.flush()
+    db.add(StockReservation(order_id=1, product_id=product.id, quantity=3,
+                            expires_at=datetime.utcnow() - timedelta(minutes=1)))
+    db.commit()
+
+    first, second = TestingSessionLocal(), TestingSessionLocal()
+    assert release_expired(first) == [product.id]
+
+    released = []
+
+    def release_again():
+        # Espera a escrita da primeira sessão e já não encontra a reserva
+        released.append(release_expired(second))
+        second.commit()
+
+    thread = threading.Thread(target=release_again)
+    thread.start()
+    time.sleep(0.2)
+    first.commit()
+    thread.join()
+    first.close()
+    second.close()
+
+    assert released == [[]]
+    db.refresh(product)
+    assert product.stock == 10
+
+
+def add_product_to_cart(client, db, headers, stock=3, quantity=2):
+    product = Product(name="Monitor", description="27", price=100.0, stock=stock)
+    db.add(product)
+    db.commit()
+    client.post("/cart/add", json={"product_id": product.id, "quantity": quantity}, headers=headers)
+    return product
+
+
+def test_checkout_reserves_and_cancel_releases(client, db, auth_headers):
+    product = add_product_to_cart(client, db, auth_headers)
+
+    order_id = client.post("/checkout/", headers=auth_headers).json()["order_id"]
+    db.refresh(product)
+    assert product.stock == 1
+    assert db.query(StockReservation).count() == 1
+
+    response = client.post(f"/orders/{order_id}/cancel", headers=auth_headers)
+    assert response.json()["status"] == "cancelled"
+    db.refresh(product)
+    assert product.stock == 3
+    assert db.query(StockReservation).count() == 0
+
+
+def test_checkout_reports_per_item_failures(client, db, auth_headers):
+    product = add_product_to_cart(client, db, auth_headers)
+    product.stock = 1
+    db.commit()
+
+    response = client.post("/checkout/", headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"]["items"] == [
+        {"product_id": product.id, "requested": 2, "available": 1}
+    ]
+
+
+def test_payment_after_expired_reservation_reserves_again(client, db, auth_headers):
+    product = add_product_to_cart(client, db, auth_headers)
+    order_id = client.post("/checkout/", headers=auth_headers).json()["order_id"]
+
+    db.query(StockReservation).update({"expires_at": datetime.utcnow() - timedelta(minutes=1)})
+    db.commit()
+
+    assert client.post(f"/payments/{order_id}", headers=auth_headers).status_code == 200
+    db.refresh(product)
+    assert product.stock == 1
+    assert db.query(StockReservation).count() == 0
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.order_status import OrderStatus
+from app.models.product import Product
+from app.models.stock_reservation import StockReservation
+from app.models.user import User
+from app.sweeper import Sweeper, sweep
+from app.tests.conftest import TestingSessionLocal
+
+
+def seed_order(db, user, product, order_status, age_hours, reserved=0):
+    order = Order(
+        user_id=user.id,
+        status=order_status,
+        total=product.price,
+        last_activity_at=datetime.utcnow() - timedelta(hours=age_hours),
+    )
+    order.items = [OrderItem(product_id=product.id, quantity=1, unit_price=product.price)]
+    db.add(order)
+    db.flush()
+    if reserved:
+        product.stock -= reserved
+        db.add(StockReservation(
+            order_id=order.id, product_id=product.id, quantity=reserved,
+            expires_at=datetime.utcnow() + timedelta(hours=1),
+        ))
+    return order
+
+
+def cart_owners(db, count):
+    # Um carrinho por usuário (uq_orders_user_cart)
+    users = [User(email=f"cart{i}@example.com", hashed_password="x") for i in range(count)]
+    db.add_all(users)
+    db.flush()
+    return users
+
+
+def test_sweep_cancels_stale_orders_and_releases_stock(db):
+    user = User(email="u@example.com", hashed_password="x")
+    product = Product(name="Produto", description="desc", price=10.0, stock=10)
+    db.add_all([user, product])
+    db.flush()
+
+    old_carts = [seed_order(db, owner, product, OrderStatus.CART, 100) for owner in cart_owners(db, 5)]
+    fresh_cart = seed_order(db, user, product, OrderStatus.CART, 1)
+    old_pending = seed_order(db, user, product, OrderStatus.PENDING_PAYMENT, 30, reserved=3)
+    fresh_pending = seed_order(db, user, product, OrderStatus.PENDING_PAYMENT, 1, reserved=2)
+    paid = seed_order(db, user, product, OrderStatus.PAID, 500)
+    db.commit()
+    assert product.stock == 5
+
+    swept = sweep(db, batch_size=2)
+    assert swept == {"carts": 5, "pending_orders": 1, "reservations": 0, "idempotency_keys": 0, "outbox_events": 0}
+
+    statuses = {order.id: order.status for order in db.query(Order)}
+    assert {statuses[o.id] for o in old_carts + [old_pending]} == {OrderStatus.CANCELLED}
+    assert statuses[fresh_cart.id] == OrderStatus.CART
+    assert statuses[fresh_pending.id] == OrderStatus.PENDING_PAYMENT
+    assert statuses[paid.id] == OrderStatus.PAID
+
+    db.refresh(product)
+    assert product.stock == 8
+    assert db.query(StockReservation).count() == 1
+
+
+def test_sweep_respects_batch_limit(db):
+    user = User(email="u@example.com", hashed_password="x")
+    product = Product(name="Produto", description="desc", price=10.0, stock=10)
+    db.add_all([user, product])
+    db.flush()
+    for owner in cart_owners(db, 7):
+        seed_order(db, owner, product, OrderStatus.CART, 100)
+    db.commit()
+
+    assert sweep(db, batch_size=2, max_batches=3)["carts"] == 6
+    assert sweep(db, batch_size=2, max_batches=3)["carts"] == 1
+
+
+def test_sweep_uses_status_last_activity_index(db):
+    plan = db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM orders "
+        "WHERE status = 'CART' AND last_activity_at < '2024-01-01' ORDER BY last_activity_at LIMIT 10"
+    )).all()
+    assert any("ix_orders_status_last_activity_at" in row[-1] for row in plan)
+
+
+def test_sweeper_records_stats(db):
+    sweeper = Sweeper(TestingSessionLocal, interval=0)
+    sweeper.run_once()
+    stats = sweeper.stats()
+    assert stats["runs"] == 1
+    assert stats["swept_carts"] == 0
@@ -1,4 +1,17 @@
 from slowapi import Limiter
-from slowapi.util import get_remote_address
+from app.config import (
+    RATE_LIMIT_DEFAULT,
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_STORAGE_URI,
+    RATE_LIMIT_STRATEGY,
+)
+# Registra os esquemas sqlite:// e resp:// antes de criar o limiter
+from app.ratelimit import rate_limit_key
 
-limiter = Limiter(key_func=get_remote_address, default_limits=["200/day", "50/hour"])
\ No newline at end of file
+limiter = Limiter(
+    key_func=rate_limit_key,
+    default_limits=[RATE_LIMIT_DEFAULT],
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy=RATE_LIMIT_STRATEGY,
+    enabled=RATE_LIMIT_ENABLED,
+)
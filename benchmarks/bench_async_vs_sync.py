@@ -0,0 +1,155 @@
+"""
+Teste de carga: rotas síncronas (threadpool) vs assíncronas (DB_ASYNC=true).
+
+Para cada modo sobe um uvicorn real com um banco SQLite temporário, popula
+produtos e um usuário, e dispara clientes concorrentes (100 a 1000) contra uma
+mistura de leituras públicas e autenticadas. O cache do catálogo é desligado
+para que o banco seja de fato exercitado.
+
+Uso:
+    python -m benchmarks.bench_async_vs_sync --concurrency 100 250 500 1000 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir: str, port: int, async_mode: bool) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        PYTHONPATH=ROOT,
+        SECRET_KEY="chave-de-benchmark",
+        DB_ASYNC="true" if async_mode else "false",
+        RATE_LIMIT_ENABLED="false",
+        PRODUCT_CACHE_SIZE="0",
+        PRODUCT_PAGE_CACHE_SIZE="0",
+    )
+    os.makedirs(os.path.join(workdir, "data"), exist_ok=True)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir,
+        env=env,
+    )
+
+
+def wait_ready(base_url: str, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(base_url + "/").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("servidor não subiu")
+
+
+def seed(workdir: str, base_url: str, products: int) -> dict:
+    conn = sqlite3.connect(os.path.join(workdir, "data", "ecommerce.db"))
+    conn.executemany(
+        "INSERT INTO products (name, description, price_cents, stock) VALUES (?, ?, ?, ?)",
+        ((f"Produto {i:05d}", "descricao", (i % 500 + 1) * 100, 1000) for i in range(products)),
+    )
+    conn.commit()
+    conn.close()
+
+    credentials = {"email": "load@example.com", "password": "password123"}
+    httpx.post(base_url + "/auth/register", json=credentials)
+    token = httpx.post(
+        base_url + "/auth/login",
+        data={"username": credentials["email"], "password": credentials["password"]},
+    ).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def run_load(base_url: str, headers: dict, concurrency: int, duration: float, products: int):
+    latencies: list[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            rnd = random.Random()
+            while time.perf_counter() < deadline:
+                roll = rnd.random()
+                if roll < 0.5:
+                    request = client.get("/products/", params={"limit": 20, "sort": "price", "min_price": rnd.randrange(400)})
+                elif roll < 0.8:
+                    request = client.get(f"/products/{rnd.randrange(1, products + 1)}")
+                else:
+                    request = client.get("/orders/me", headers=headers)
+                start = time.perf_counter()
+                try:
+                    response = await request
+                    if response.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[100, 250, 500, 1000])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--products", type=int, default=10_000)
+    args = parser.parse_args()
+
+    results = {}
+    for async_mode in (False, True):
+        label = "async" if async_mode else "sync"
+        workdir = tempfile.mkdtemp()
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(workdir, port, async_mode)
+        try:
+            wait_ready(base_url)
+            headers = seed(workdir, base_url, args.products)
+            for concurrency in args.concurrency:
+                results[(label, concurrency)] = asyncio.run(
+                    run_load(base_url, headers, concurrency, args.duration, args.products)
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{'modo':>6} {'clientes':>9} {'req/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'erros':>6}")
+    for (label, concurrency), r in results.items():
+        print(f"{label:>6} {concurrency:>9} {r['rps']:>9.0f} {r['p50']:>9.1f} {r['p99']:>9.1f} {r['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
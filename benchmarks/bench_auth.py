@@ -0,0 +1,70 @@
+"""
+Micro-benchmark do custo de autenticação por requisição (get_current_user).
+
+Compara o caminho frio (decodifica o JWT e consulta o usuário no banco)
+com o caminho quente (token já verificado, servido pelo cache).
+
+Uso:
+    python -m benchmarks.bench_auth --iterations 20000
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("SECRET_KEY", "chave-de-benchmark")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+import app.models  # noqa: F401 - registra os modelos no metadata
+from app.models.user import User
+from app.auth.jwt import create_access_token
+from app.auth.dependencies import get_current_user, user_cache
+
+
+def per_call_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+
+    with SessionLocal() as db:
+        db.add(User(email="bench@example.com", hashed_password="x"))
+        db.commit()
+
+    token = create_access_token({"sub": "bench@example.com"})
+
+    def cold():
+        user_cache.clear()
+        with SessionLocal() as db:
+            get_current_user(token, db)
+
+    def warm():
+        with SessionLocal() as db:
+            get_current_user(token, db)
+
+    cold_us = per_call_us(cold, args.iterations)
+    warm()  # popula o cache
+    warm_us = per_call_us(warm, args.iterations)
+
+    print(f"sem cache (jwt + SELECT): {cold_us:8.1f} µs/req")
+    print(f"com cache:                {warm_us:8.1f} µs/req")
+    print(f"ganho:                    {cold_us / warm_us:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Teste de carga do login sob tráfego misto: bcrypt no threadpool das rotas
+(PASSWORD_HASH_WORKERS=0) vs pool dedicado e limitado.
+
+Para cada modo sobe um uvicorn real com um banco SQLite temporário e dispara
+clientes concorrentes: uma parte faz login em loop, o resto lê o catálogo.
+Mostra p50/p99 do login e das leituras e quantos logins receberam 503.
+
+Uso:
+    python -m benchmarks.bench_login --concurrency 200 --login-share 0.2 --duration 15
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_async_vs_sync import ROOT, free_port, wait_ready
+
+
+def start_server(workdir: str, port: int, workers: int, rounds: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        PYTHONPATH=ROOT,
+        SECRET_KEY="chave-de-benchmark",
+        RATE_LIMIT_ENABLED="false",
+        BCRYPT_ROUNDS=str(rounds),
+        PASSWORD_HASH_WORKERS=str(workers),
+    )
+    os.makedirs(os.path.join(workdir, "data"), exist_ok=True)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir,
+        env=env,
+    )
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(int(len(values) * fraction) - 1, 0)] * 1000
+
+
+async def run_load(base_url: str, concurrency: int, login_share: float, duration: float):
+    logins: list[float] = []
+    reads: list[float] = []
+    rejected = 0
+    errors = 0
+    credentials = {"username": "load@example.com", "password": "password123"}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(is_login: bool):
+            nonlocal rejected, errors
+            rnd = random.Random()
+            while time.perf_counter() < deadline:
+                if is_login:
+                    request = client.post("/auth/login", data=credentials)
+                else:
+                    request = client.get(f"/products/{rnd.randrange(1, 101)}")
+                start = time.perf_counter()
+                try:
+                    response = await request
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                elapsed = time.perf_counter() - start
+                if response.status_code == 503:
+                    rejected += 1
+                    await asyncio.sleep(float(response.headers.get("retry-after", 1)))
+                    continue
+                if response.status_code >= 400:
+                    errors += 1
+                (logins if is_login else reads).append(elapsed)
+
+        login_workers = max(1, int(concurrency * login_share))
+        await asyncio.gather(
+            *(worker(i < login_workers) for i in range(concurrency))
+        )
+
+    return {
+        "logins": len(logins),
+        "login_p50": percentile(logins, 0.5),
+        "login_p99": percentile(logins, 0.99),
+        "read_p99": percentile(reads, 0.99),
+        "rejected": rejected,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--login-share", type=float, default=0.2)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    results = {}
+    for label, workers in (("threadpool", 0), ("pool", args.workers)):
+        workdir = tempfile.mkdtemp()
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(workdir, port, workers, args.rounds)
+        try:
+            wait_ready(base_url)
+            httpx.post(base_url + "/auth/register", json={"email": "load@example.com", "password": "password123"})
+            # Catálogo pequeno: as leituras devem ser baratas
+            conn = sqlite3.connect(os.path.join(workdir, "data", "ecommerce.db"))
+            conn.executemany(
+                "INSERT INTO products (name, description, price_cents, stock) VALUES (?, ?, ?, ?)",
+                ((f"Produto {i}", "descricao", 1000, 100) for i in range(100)),
+            )
+            conn.commit()
+            conn.close()
+            results[label] = asyncio.run(
+                run_load(base_url, args.concurrency, args.login_share, args.duration)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{'modo':>10} {'logins':>7} {'login p50':>10} {'login p99':>10} {'leitura p99':>12} {'503':>5} {'erros':>6}")
+    for label, r in results.items():
+        print(
+            f"{label:>10} {r['logins']:>7} {r['login_p50']:>10.1f} {r['login_p99']:>10.1f}"
+            f" {r['read_p99']:>12.1f} {r['rejected']:>5} {r['errors']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
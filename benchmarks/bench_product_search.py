@@ -0,0 +1,110 @@
+"""
+Benchmark da busca de produtos: índice FTS5 vs LIKE '%termo%'.
+
+Popula um SQLite temporário com N produtos (nomes e descrições sorteados de
+um vocabulário sintético) e compara a latência de cada termo nas duas abordagens.
+Obs.: o LIKE devolve os N primeiros sem ranking e para cedo em termos muito
+comuns; o FTS5 ordena todos os resultados por relevância.
+
+Uso:
+    python -m benchmarks.bench_product_search --rows 500000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, or_, select
+from sqlalchemy.orm import Session
+
+from app.database import Base
+import app.models  # noqa: F401 - registra os modelos (e o índice FTS) no metadata
+from app.models.product import Product
+from app.routers.products import search_match_expression, search_statement
+
+CATEGORIES = (
+    "notebook mouse teclado monitor cadeira mesa cabo carregador fone headset "
+    "webcam microfone impressora roteador tablet celular capa pelicula ssd"
+).split()
+
+SYLLABLES = "ba be bi bo bu ca ce ci co cu da de di do du fa fe fi fo fu la le li lo lu ma me mi mo mu ra re ri ro ru ta te ti to tu".split()
+
+
+def make_vocabulary(size: int, rnd: random.Random) -> list[str]:
+    # Palavras sintéticas: catálogos reais têm vocabulário grande e termos seletivos
+    return ["".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4))) for _ in range(size)]
+
+
+def seed(path: str, rows: int, vocabulary: list[str], rnd: random.Random):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        batch = 20_000
+        for start in range(0, rows, batch):
+            conn.execute(
+                Product.__table__.insert(),
+                [
+                    {
+                        "name": " ".join([rnd.choice(CATEGORIES), *rnd.sample(vocabulary, 2)]),
+                        "description": " ".join(rnd.sample(vocabulary, 8)),
+                        "price_cents": 1000,
+                        "stock": 1,
+                    }
+                    for _ in range(start, min(start + batch, rows))
+                ],
+            )
+    return engine
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rnd = random.Random(7)
+    vocabulary = make_vocabulary(args.vocabulary, rnd)
+    path = os.path.join(tempfile.mkdtemp(), "search.db")
+    print(f"Populando {args.rows} produtos em {path} ...")
+    engine = seed(path, args.rows, vocabulary, rnd)
+    db = Session(engine)
+
+    terms = [
+        "webcam",                                   # categoria: ~5% do catálogo
+        vocabulary[0],                               # palavra comum do vocabulário
+        f"{rnd.choice(CATEGORIES)} {vocabulary[1]}",  # dois termos
+        vocabulary[2][:3],                           # prefixo
+        "inexistente",                               # nenhum resultado: LIKE varre tudo
+    ]
+
+    print(f"{'termo':>22} {'LIKE (ms)':>10} {'FTS5 (ms)':>10}")
+    for term in terms:
+        like = select(Product).where(
+            *[
+                or_(Product.name.like(f"%{word}%"), Product.description.like(f"%{word}%"))
+                for word in term.split()
+            ]
+        ).limit(args.limit)
+        fts = search_statement(search_match_expression(term), args.limit)
+        like_ms = timed(lambda: db.scalars(like).all(), args.repeat)
+        fts_ms = timed(lambda: db.execute(fts).all(), args.repeat)
+        print(f"{term:>22} {like_ms:>10.2f} {fts_ms:>10.2f}")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
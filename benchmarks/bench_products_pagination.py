@@ -0,0 +1,102 @@
+"""
+Benchmark da listagem de produtos: OFFSET vs cursor (keyset).
+
+Popula um SQLite temporário com N produtos e mede a latência de páginas
+em profundidades crescentes. Com OFFSET o custo cresce com a profundidade;
+com cursor ele deve ficar praticamente constante.
+
+Uso:
+    python -m benchmarks.bench_products_pagination --rows 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.database import Base
+import app.models  # noqa: F401 - registra os modelos no metadata
+from app.models.product import Product
+from app.routers.products import build_products_page, products_page_statement
+from app.schemas.product import ProductSort
+
+
+def seed(path: str, rows: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    rnd = random.Random(42)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    batch = 50_000
+    for start in range(0, rows, batch):
+        conn.executemany(
+            "INSERT INTO products (name, description, price_cents, stock) VALUES (?, ?, ?, ?)",
+            (
+                (f"Produto {rnd.randrange(rows):07d}", "descricao", rnd.randrange(100, 500_000), rnd.randrange(100))
+                for _ in range(start, min(start + batch, rows))
+            ),
+        )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sort", default=ProductSort.PRICE_ASC.value, choices=[s.value for s in ProductSort])
+    args = parser.parse_args()
+
+    sort = ProductSort(args.sort)
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    print(f"Populando {args.rows} produtos em {path} ...")
+    seed(path, args.rows)
+
+    engine = create_engine(f"sqlite:///{path}")
+    db = Session(engine)
+
+    # Coleta os cursores de cada profundidade caminhando pelas páginas uma vez
+    depths = [d for d in (1, 10, 100, 1_000, 10_000) if d * args.page_size < args.rows]
+    cursors, cursor, page_no = {}, None, 1
+    while page_no <= depths[-1]:
+        if page_no in depths:
+            cursors[page_no] = cursor
+        stmt, data = products_page_statement(sort, args.page_size, cursor)
+        _, cursor, _ = build_products_page(db.execute(stmt).all(), sort, args.page_size, data)
+        page_no += 1
+
+    key_col = {"price": Product.price_cents, "-price": Product.price_cents.desc(), "name": Product.name, "-name": Product.name.desc()}
+    order = [key_col[sort.value], Product.id] if sort is not ProductSort.ID else [Product.id]
+
+    print(f"{'página':>8} {'offset (ms)':>12} {'cursor (ms)':>12}")
+    for depth in depths:
+        offset_stmt = select(Product).order_by(*order).offset((depth - 1) * args.page_size).limit(args.page_size)
+        keyset_stmt, _ = products_page_statement(sort, args.page_size, cursors[depth])
+        offset_ms = timed(lambda: db.scalars(offset_stmt).all(), args.repeat)
+        keyset_ms = timed(lambda: db.execute(keyset_stmt).all(), args.repeat)
+        print(f"{depth:>8} {offset_ms:>12.2f} {keyset_ms:>12.2f}")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Micro-benchmark do custo do rate limit por requisição.
+
+Mede a chave (IP ou usuário autenticado) e a verificação do limite em cada
+backend: memory://, sqlite:// e resp:// (contra o servidor RESP local de
+app.tests.resp_server; passe --resp-uri para medir um Redis de verdade).
+
+Uso:
+    python -m benchmarks.bench_ratelimit --iterations 50000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("SECRET_KEY", "chave-de-benchmark")
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from starlette.requests import Request
+
+from app.auth.dependencies import AuthenticatedUser, user_cache
+from app.auth.jwt import create_access_token
+from app.ratelimit import rate_limit_key
+from app.tests.resp_server import RespStandIn
+
+
+def per_call_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def make_request(headers: dict) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("10.0.0.1", 1234),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=50_000)
+    parser.add_argument("--resp-uri", default=None)
+    args = parser.parse_args()
+
+    token = create_access_token({"sub": "bench@example.com"})
+    user_cache.set(token, AuthenticatedUser(id=1, email="bench@example.com", is_admin=False))
+    anonymous = make_request({})
+    authenticated = make_request({"Authorization": f"Bearer {token}"})
+
+    print(f"{'operação':<28} {'µs/chamada':>11}")
+    print(f"{'chave (IP)':<28} {per_call_us(lambda: rate_limit_key(anonymous), args.iterations):>11.2f}")
+    print(f"{'chave (usuário em cache)':<28} {per_call_us(lambda: rate_limit_key(authenticated), args.iterations):>11.2f}")
+
+    resp_server = None
+    resp_uri = args.resp_uri
+    if resp_uri is None:
+        resp_server = RespStandIn().start()
+        resp_uri = resp_server.uri
+
+    backends = {
+        "memory://": "memory://",
+        "sqlite://": f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'ratelimit.db')}",
+        "resp://": resp_uri,
+    }
+    # Limite alto: mede o caminho comum (requisição permitida)
+    item = parse(f"{args.iterations * 10}/hour")
+    try:
+        for label, uri in backends.items():
+            limiter = FixedWindowRateLimiter(storage_from_string(uri))
+            keys = [f"user:{i}" for i in range(1000)]
+            counter = iter(range(10**12))
+            us = per_call_us(lambda: limiter.hit(item, keys[next(counter) % 1000]), args.iterations)
+            print(f"{'hit ' + label:<28} {us:>11.2f}")
+    finally:
+        if resp_server is not None:
+            resp_server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Harness de carga por cenário, com latência por rota e baselines.
+
+Popula um banco SQLite temporário (usuários, produtos e pedidos antigos, em
+tamanho configurável), aplica as migrações e dispara usuários virtuais contra
+a aplicação, em processo (httpx + ASGITransport, sem rede) ou num uvicorn real.
+
+Cenários:
+    checkout  fluxo canônico: registro, login, navegação no catálogo,
+              carrinho, checkout e pagamento (cada usuário virtual repete)
+    browse    só leituras: listagem, busca, detalhe e /orders/me
+    replay    tráfego gravado (--replay arquivo.jsonl), uma requisição por
+              linha: {"method": "GET", "path": "/products/", "params": {...},
+              "json": {...}, "auth": true}. Com "auth" usa o token de um
+              usuário já populado.
+
+Mostra req/s e p50/p95/p99 por rota. Com --save-baseline o resultado vai para
+benchmarks/baselines/<nome>.json; com --compare, a diferença para ele.
+
+Uso:
+    python -m benchmarks.bench_scenarios --scenario checkout --target inprocess --concurrency 20 --duration 15
+    python -m benchmarks.bench_scenarios --target uvicorn --save-baseline main
+    python -m benchmarks.bench_scenarios --target uvicorn --compare main
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import httpx
+
+from benchmarks.bench_async_vs_sync import ROOT, free_port, wait_ready
+
+BASELINE_DIR = os.path.join(ROOT, "benchmarks", "baselines")
+PASSWORD = "password123"
+
+# Segmentos numéricos viram o parâmetro da rota (ex.: /payments/{id})
+NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def app_env(database: str, args) -> dict:
+    return {
+        "DATABASE_URL": f"sqlite:///{database}",
+        "SECRET_KEY": "chave-de-benchmark",
+        "RATE_LIMIT_ENABLED": "false",
+        "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+        "DB_ASYNC": "true" if args.async_db else "false",
+        "SWEEP_INTERVAL_SECONDS": "0",
+    }
+
+
+def seed(database: str, users: int, products: int, orders: int):
+    # O app só é importado aqui: app.config lê o ambiente (DATABASE_URL) na importação.
+    # INSERTs pelo Core, no banco já migrado: os defaults das colunas valem
+    # também para as colunas que vierem depois
+    from sqlalchemy import create_engine, insert
+
+    from app.auth.security import get_password_hash
+    from app.migrations import upgrade
+    from app.models.order import Order
+    from app.models.order_item import OrderItem
+    from app.models.order_status import OrderStatus
+    from app.models.product import Product
+    from app.models.user import User
+
+    engine = create_engine(f"sqlite:///{database}")
+    upgrade(engine)
+
+    hashed = get_password_hash(PASSWORD)
+    created_at = datetime.utcnow() - timedelta(days=30)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"email": f"bench{i}@example.com", "hashed_password": hashed, "is_admin": False}
+            for i in range(users)
+        ])
+        conn.execute(insert(Product), [
+            {
+                "name": f"Produto {i:06d}",
+                "description": f"descricao do produto {i}",
+                "price_cents": (i % 500 + 1) * 100,
+                "stock": 1_000_000,
+            }
+            for i in range(products)
+        ])
+        conn.execute(insert(Order), [
+            {
+                "id": i + 1,
+                "user_id": i % users + 1,
+                "status": OrderStatus.PAID,
+                "total_cents": 2 * ((i % 500) + 1) * 100,
+                "created_at": created_at,
+            }
+            for i in range(orders)
+        ])
+        conn.execute(insert(OrderItem), [
+            {
+                "order_id": i + 1,
+                "product_id": (i + k) % products + 1,
+                "quantity": 1,
+                "unit_price_cents": ((i + k) % 500 + 1) * 100,
+            }
+            for i in range(orders)
+            for k in range(2)
+        ])
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()
+
+
+class Recorder:
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    async def send(self, client: httpx.AsyncClient, method: str, path: str, route: Optional[str] = None, **kwargs):
+        route = f"{method} {route or NUMERIC_SEGMENT.sub('/{id}', path)}"
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.latencies.setdefault(route, []).append(time.perf_counter() - start)
+        if response is None or response.status_code >= 400:
+            self.errors[route] = self.errors.get(route, 0) + 1
+        return response
+
+
+async def login(client: httpx.AsyncClient, recorder: Recorder, email: str) -> dict:
+    response = await recorder.send(client, "POST", "/auth/login", data={"username": email, "password": PASSWORD})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def checkout_flow(client: httpx.AsyncClient, recorder: Recorder, rnd: random.Random, vu: int, products: int):
+    email = f"vu{vu}-{rnd.getrandbits(48):x}@example.com"
+    await recorder.send(client, "POST", "/auth/register", json={"email": email, "password": PASSWORD})
+    headers = await login(client, recorder, email)
+
+    await recorder.send(client, "GET", "/products/", params={"limit": 20, "sort": "price"})
+    await recorder.send(client, "GET", "/products/search", params={"q": f"produto {rnd.randrange(products)}"})
+    picked = rnd.sample(range(1, products + 1), 3)
+    for product_id in picked:
+        await recorder.send(client, "GET", f"/products/{product_id}")
+        await recorder.send(
+            client, "POST", "/cart/add", json={"product_id": product_id, "quantity": 1}, headers=headers
+        )
+
+    response = await recorder.send(client, "POST", "/checkout/", headers=headers)
+    if response is not None and response.status_code == 200:
+        order_id = response.json()["order_id"]
+        await recorder.send(
+            client, "POST", f"/payments/{order_id}",
+            headers=dict(headers, **{"Idempotency-Key": f"pay-{order_id}"}),
+        )
+
+
+async def browse_flow(client: httpx.AsyncClient, recorder: Recorder, rnd: random.Random, headers: dict, products: int):
+    roll = rnd.random()
+    if roll < 0.4:
+        await recorder.send(client, "GET", "/products/", params={"limit": 20, "sort": "price", "min_price": rnd.randrange(400)})
+    elif roll < 0.6:
+        await recorder.send(client, "GET", "/products/search", params={"q": f"produto {rnd.randrange(products)}"})
+    elif roll < 0.9:
+        await recorder.send(client, "GET", f"/products/{rnd.randrange(1, products + 1)}")
+    else:
+        await recorder.send(client, "GET", "/orders/me", params={"limit": 20}, headers=headers)
+
+
+async def replay_flow(client: httpx.AsyncClient, recorder: Recorder, entries, headers: dict):
+    entry = next(entries)
+    await recorder.send(
+        client,
+        entry.get("method", "GET"),
+        entry["path"],
+        route=entry.get("route"),
+        params=entry.get("params"),
+        json=entry.get("json"),
+        headers=headers if entry.get("auth") else None,
+    )
+
+
+async def run_load(transport_kwargs: dict, args, replay: Optional[list]) -> tuple[Recorder, float]:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=120, **transport_kwargs) as client:
+        # Sessão de um usuário já populado para as rotas autenticadas de browse/replay
+        headers = await login(client, Recorder(), "bench0@example.com")
+        entries = itertools.cycle(replay) if replay else None
+        deadline = time.perf_counter() + args.duration
+
+        async def virtual_user(vu: int):
+            rnd = random.Random(vu)
+            while time.perf_counter() < deadline:
+                if args.scenario == "checkout":
+                    await checkout_flow(client, recorder, rnd, vu, args.products)
+                elif args.scenario == "browse":
+                    await browse_flow(client, recorder, rnd, headers, args.products)
+                else:
+                    await replay_flow(client, recorder, entries, headers)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(virtual_user(vu) for vu in range(args.concurrency)))
+        return recorder, time.perf_counter() - started
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    # Nearest-rank, em ms
+    index = max(int(round(len(values) * fraction + 0.5)) - 1, 0)
+    return values[min(index, len(values) - 1)] * 1000
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    routes = {}
+    everything = []
+    for route, latencies in sorted(recorder.latencies.items()):
+        latencies.sort()
+        everything.extend(latencies)
+        routes[route] = {
+            "requests": len(latencies),
+            "errors": recorder.errors.get(route, 0),
+            "rps": len(latencies) / elapsed,
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+        }
+    everything.sort()
+    if everything:
+        routes["TOTAL"] = {
+            "requests": len(everything),
+            "errors": sum(recorder.errors.values()),
+            "rps": len(everything) / elapsed,
+            "p50": percentile(everything, 0.50),
+            "p95": percentile(everything, 0.95),
+            "p99": percentile(everything, 0.99),
+        }
+    return routes
+
+
+def print_report(routes: dict, baseline: Optional[dict]):
+    def delta(route: str, key: str) -> str:
+        before = (baseline or {}).get(route, {}).get(key)
+        if not before:
+            return ""
+        return f" ({(routes[route][key] - before) / before * 100:+.0f}%)"
+
+    print(f"{'rota':<32} {'reqs':>7} {'erros':>6} {'req/s':>14} {'p50 ms':>14} {'p95 ms':>14} {'p99 ms':>14}")
+    for route, r in routes.items():
+        print(
+            f"{route:<32} {r['requests']:>7} {r['errors']:>6} "
+            + " ".join(
+                f"{f'{r[key]:.1f}' + delta(route, key):>14}"
+                for key in ("rps", "p50", "p95", "p99")
+            )
+        )
+
+
+def start_server(workdir: str, database: str, port: int, args) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=ROOT, **app_env(database, args))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir,
+        env=env,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=["checkout", "browse", "replay"], default="checkout")
+    parser.add_argument("--replay", help="arquivo JSONL de tráfego gravado (cenário replay)")
+    parser.add_argument("--target", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--orders", type=int, default=20_000)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--async-db", action="store_true", help="rotas com AsyncSession (DB_ASYNC=true)")
+    parser.add_argument("--save-baseline", metavar="NOME")
+    parser.add_argument("--compare", metavar="NOME")
+    args = parser.parse_args()
+
+    replay = None
+    if args.scenario == "replay" or args.replay:
+        if not args.replay:
+            parser.error("o cenário replay precisa de --replay arquivo.jsonl")
+        args.scenario = "replay"
+        with open(args.replay, encoding="utf-8") as f:
+            replay = [json.loads(line) for line in f if line.strip()]
+
+    workdir = tempfile.mkdtemp()
+    database = os.path.join(workdir, "bench.db")
+    # Antes de qualquer importação do app (a configuração é lida do ambiente)
+    os.environ.update(app_env(database, args))
+    seed(database, args.users, args.products, args.orders)
+
+    if args.target == "inprocess":
+        from app.main import app
+
+        recorder, elapsed = asyncio.run(
+            run_load({"transport": httpx.ASGITransport(app=app), "base_url": "http://bench"}, args, replay)
+        )
+    else:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(workdir, database, port, args)
+        try:
+            wait_ready(base_url)
+            recorder, elapsed = asyncio.run(run_load({"base_url": base_url}, args, replay))
+        finally:
+            server.terminate()
+            server.wait()
+
+    routes = summarize(recorder, elapsed)
+    baseline = None
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json"), encoding="utf-8") as f:
+            baseline = json.load(f)["routes"]
+    print_report(routes, baseline)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save_baseline}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "scenario": args.scenario,
+                    "target": args.target,
+                    "concurrency": args.concurrency,
+                    "duration": args.duration,
+                    "dataset": {"users": args.users, "products": args.products, "orders": args.orders},
+                    "routes": routes,
+                },
+                f,
+                indent=2,
+            )
+        print(f"baseline salva em {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark de liquidação de pagamentos: POST /payments/batch vs uma chamada
+POST /payments/{id} por pedido.
+
+Popula um SQLite temporário com pedidos em PENDING_PAYMENT (com a reserva de
+estoque do checkout) e paga metade deles pedido a pedido e a outra metade em
+lotes, como chegariam do webhook do provedor. Roda em processo (httpx +
+ASGITransport, sem rede) e mostra pedidos liquidados por segundo.
+
+Uso:
+    python -m benchmarks.bench_settlement --orders 2000 --batch-size 500 --concurrency 10
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from benchmarks.bench_scenarios import PASSWORD, app_env
+
+
+def seed(database: str, orders: int, items_per_order: int, products: int):
+    # O app só é importado aqui: app.config lê o ambiente (DATABASE_URL) na importação
+    from sqlalchemy import create_engine
+
+    from app.auth.security import get_password_hash
+    from app.migrations import upgrade
+
+    upgrade(create_engine(f"sqlite:///{database}"))
+
+    conn = sqlite3.connect(database)
+    conn.execute(
+        "INSERT INTO users (email, hashed_password, is_admin) VALUES (?, ?, 1)",
+        ("bench0@example.com", get_password_hash(PASSWORD)),
+    )
+    conn.executemany(
+        "INSERT INTO products (name, description, price_cents, stock) VALUES (?, 'desc', 1000, 1000000)",
+        ((f"Produto {i:06d}",) for i in range(products)),
+    )
+    now = datetime.utcnow()
+    conn.executemany(
+        "INSERT INTO orders (id, user_id, status, total_cents, created_at) VALUES (?, 1, 'PENDING_PAYMENT', ?, ?)",
+        ((i + 1, 1000 * items_per_order, now.isoformat(" ")) for i in range(orders)),
+    )
+    lines = [
+        (i + 1, (i * items_per_order + k) % products + 1)
+        for i in range(orders)
+        for k in range(items_per_order)
+    ]
+    conn.executemany(
+        "INSERT INTO order_items (order_id, product_id, quantity, unit_price_cents) VALUES (?, ?, 1, 1000)", lines
+    )
+    expires_at = (now + timedelta(hours=1)).isoformat(" ")
+    conn.executemany(
+        "INSERT INTO stock_reservations (order_id, product_id, quantity, expires_at) VALUES (?, ?, 1, ?)",
+        ((order_id, product_id, expires_at) for order_id, product_id in lines),
+    )
+    conn.commit()
+    conn.close()
+
+
+async def run(args, order_ids: list[int]) -> dict[str, float]:
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        response = await client.post("/auth/login", data={"username": "bench0@example.com", "password": PASSWORD})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        half = len(order_ids) // 2
+        single, batched = order_ids[:half], order_ids[half:]
+        failures = 0
+
+        # Um pedido por chamada, com `concurrency` chamadas em paralelo
+        queue = list(reversed(single))
+        started = time.perf_counter()
+
+        async def worker():
+            nonlocal failures
+            while queue:
+                order_id = queue.pop()
+                response = await client.post(f"/payments/{order_id}", headers=headers)
+                failures += response.status_code != 200
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        single_elapsed = time.perf_counter() - started
+
+        # Lotes do tamanho que o webhook entrega
+        started = time.perf_counter()
+        for start in range(0, len(batched), args.batch_size):
+            response = await client.post(
+                "/payments/batch", json={"order_ids": batched[start:start + args.batch_size]}, headers=headers
+            )
+            failures += len(batched[start:start + args.batch_size]) - response.json()["paid"]
+        batch_elapsed = time.perf_counter() - started
+
+    if failures:
+        raise SystemExit(f"{failures} pedidos não foram pagos")
+    return {"por pedido": len(single) / single_elapsed, "em lote": len(batched) / batch_elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=2000, help="total (metade em cada modo)")
+    parser.add_argument("--items-per-order", type=int, default=3)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=500, help="pedidos por chamada em lote")
+    parser.add_argument("--concurrency", type=int, default=10, help="chamadas por pedido em paralelo")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--async-db", action="store_true", help="rotas com AsyncSession (DB_ASYNC=true)")
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(), "bench.db")
+    # Antes de qualquer importação do app (a configuração é lida do ambiente)
+    os.environ.update(app_env(database, args))
+    print(f"Populando {args.orders} pedidos pendentes em {database} ...")
+    seed(database, args.orders, args.items_per_order, args.products)
+
+    rates = asyncio.run(run(args, list(range(1, args.orders + 1))))
+    print(f"{'modo':>12} {'pedidos/s':>12}")
+    for mode, rate in rates.items():
+        print(f"{mode:>12} {rate:>12.1f}")
+    print(f"ganho do lote: {rates['em lote'] / rates['por pedido']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Stress da reserva de estoque em um único produto "quente".
+
+Várias threads disputam o mesmo SKU com baixas atômicas (try_decrement).
+Ao final verifica que nada foi vendido além do estoque e mostra o throughput.
+
+Uso:
+    python -m benchmarks.bench_stock_contention --threads 16 --stock 5000
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+import app.models  # noqa: F401 - registra os modelos no metadata
+from app.models.product import Product
+from app.stock import try_decrement
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--stock", type=int, default=5_000)
+    parser.add_argument("--attempts", type=int, default=500, help="tentativas por thread")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "stock.db")
+    engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 60}
+    )
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        hot = Product(name="Hot SKU", description="desc", price=1.0, stock=args.stock)
+        db.add(hot)
+        db.commit()
+        product_id = hot.id
+
+    sold = [0] * args.threads
+    rejected = [0] * args.threads
+
+    def buyer(index: int):
+        for _ in range(args.attempts):
+            with Session() as db:
+                if try_decrement(db, {product_id: 1}):
+                    rejected[index] += 1
+                else:
+                    sold[index] += 1
+                db.commit()
+
+    threads = [threading.Thread(target=buyer, args=(i,)) for i in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with Session() as db:
+        remaining = db.get(Product, product_id).stock
+
+    total = args.threads * args.attempts
+    print(f"tentativas:  {total}")
+    print(f"vendidas:    {sum(sold)}  (estoque inicial {args.stock}, restante {remaining})")
+    print(f"recusadas:   {sum(rejected)}")
+    print(f"throughput:  {total / elapsed:,.0f} reservas/s em {elapsed:.2f}s")
+    assert sum(sold) + remaining == args.stock, "oversell detectado!"
+    assert remaining >= 0
+
+
+if __name__ == "__main__":
+    main()